@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import frappe
+from frappe.utils import add_days, cint, get_datetime, now_datetime
+
+from epibus.epibus.utils.downsample import lttb
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_POINTS = 1000
+MAX_POINTS = 10000
+DEFAULT_RANGE_DAYS = 30
+
+# Ranges with up to this many rows are downsampled from the raw rows; larger ranges
+# are first reduced to min/max per bucket in SQL, so the worker never loads them whole
+MAX_RAW_ROWS = 20000
+
+# SQL buckets per requested point when pre-bucketing for LTTB
+PREBUCKET_FACTOR = 4
+
+
+@frappe.whitelist()
+def get_signal_history(signal, start=None, end=None, points=DEFAULT_POINTS, method="lttb"):
+    """Get the history of a signal, downsampled on the server for charting
+
+    Args:
+        signal: Name of the Modbus Signal
+        start: Start of the range. Defaults to DEFAULT_RANGE_DAYS before end.
+        end: End of the range. Defaults to now.
+        points: Maximum number of points to return
+        method: "lttb" for a shape-preserving line, or "minmax" for min/max envelopes
+
+    Returns:
+        dict: {"success": True, "method": ..., "count": rows in range, "points": [...]}
+            Points are [timestamp, value] for lttb and raw data, or
+            [timestamp, min, max] for minmax.
+    """
+    try:
+        if not frappe.has_permission("Modbus Signal History", "read"):
+            return {"success": False, "message": "Not permitted to read signal history"}
+
+        if method not in ("lttb", "minmax"):
+            return {"success": False, "message": f"Unknown downsampling method {method}"}
+
+        end_dt = get_datetime(end) if end else now_datetime()
+        start_dt = get_datetime(start) if start else add_days(end_dt, -DEFAULT_RANGE_DAYS)
+        if start_dt >= end_dt:
+            return {"success": False, "message": "Start must be before end"}
+
+        points = min(max(cint(points) or DEFAULT_POINTS, 3), MAX_POINTS)
+
+        count = frappe.db.sql("""
+            select count(*) from `tabModbus Signal History`
+            where `signal` = %s and ts >= %s and ts <= %s
+        """, (signal, start_dt, end_dt))[0][0]
+
+        if count <= points:
+            data = [[str(ts), value] for ts, value in _get_raw(signal, start_dt, end_dt)]
+            return {"success": True, "method": "raw", "count": count, "points": data}
+
+        if method == "minmax":
+            buckets = _get_buckets(signal, start_dt, end_dt, points)
+            data = [[str(start_dt + timedelta(microseconds=float(b.bucket_offset))), b.min_value, b.max_value]
+                    for b in buckets]
+            return {"success": True, "method": method, "count": count, "points": data}
+
+        if count <= MAX_RAW_ROWS:
+            series = [((ts - start_dt).total_seconds(), value)
+                      for ts, value in _get_raw(signal, start_dt, end_dt)]
+        else:
+            # Keep both extremes of every bucket so LTTB can still pick out spikes
+            series = []
+            for b in _get_buckets(signal, start_dt, end_dt, points * PREBUCKET_FACTOR):
+                offset = float(b.bucket_offset) / 1e6
+                series.append((offset, b.min_value))
+                if b.max_value != b.min_value:
+                    series.append((offset, b.max_value))
+
+        data = [[str(start_dt + timedelta(seconds=offset)), value] for offset, value in lttb(series, points)]
+        return {"success": True, "method": method, "count": count, "points": data}
+
+    except Exception as e:
+        logger.error(f"Error getting history for signal {signal}: {e!s}")
+        return {"success": False, "message": str(e)}
+
+
+def _get_raw(signal, start_dt, end_dt):
+    return frappe.db.sql("""
+        select ts, value from `tabModbus Signal History`
+        where `signal` = %s and ts >= %s and ts <= %s
+        order by ts
+    """, (signal, start_dt, end_dt))
+
+
+def _get_buckets(signal, start_dt, end_dt, buckets):
+    """Aggregate a range into equal-width time buckets: mean offset (microseconds), min and max"""
+    width = max((end_dt - start_dt).total_seconds() * 1e6 / buckets, 1)
+    return frappe.db.sql("""
+        select floor(timestampdiff(microsecond, %(start)s, ts) / %(width)s) as bucket,
+            avg(timestampdiff(microsecond, %(start)s, ts)) as bucket_offset,
+            min(value) as min_value,
+            max(value) as max_value
+        from `tabModbus Signal History`
+        where `signal` = %(signal)s and ts >= %(start)s and ts <= %(end)s
+        group by bucket
+        order by bucket
+    """, {"signal": signal, "start": start_dt, "end": end_dt, "width": width}, as_dict=True)
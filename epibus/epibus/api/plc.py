@@ -1,31 +1,50 @@
-import frappe
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import frappe
 from frappe.realtime import publish_realtime
-from epibus.epibus.utils.truthy import truthy, parse_value
-from epibus.epibus.utils.epinomy_logger import get_logger
-from epibus.epibus.doctype.modbus_event.modbus_event import ModbusEvent
+from frappe.utils import convert_utc_to_system_timezone
+from pymodbus.client import ModbusTcpClient
+
+from epibus.epibus.utils import (
+    action_dispatch,
+    action_profiler,
+    address_index,
+    event_sink,
+    live_values,
+    sequence,
+    subscriptions,
+    value_codec,
+)
+from epibus.epibus.utils.action_cache import execute_server_script, get_action_context, get_cached_doc
+from epibus.epibus.utils.epinomy_logger import get_logger, log_error
+from epibus.epibus.utils.ingest_load import ingest_request
+from epibus.epibus.utils.plc_bridge_adapter import get_bridge_connections
+from epibus.epibus.utils.realtime_batcher import queue_signal_update
+from epibus.epibus.utils.signal_handler import SignalHandler
 
 logger = get_logger(__name__)
 
 @frappe.whitelist(allow_guest=True)
 def get_signals():
     """Get all Modbus signals for the React dashboard
-    
+
     Returns the complete Modbus Connection document structure with nested signals
     """
     try:
         # This function now uses the same implementation as get_all_signals
         # but formats the response to match what the frontend expects
         connections_data = get_all_signals_internal()
-        
+
         if not connections_data.get("success", False):
             return {"success": False, "message": connections_data.get("message", "Unknown error")}
-            
+
         return connections_data
 
     except Exception as e:
-        logger.error(f"❌ Error getting signals: {str(e)}")
+        logger.error("❌ Error getting signals: %s", e)
         return {"success": False, "message": str(e)}
 
 @frappe.whitelist(allow_guest=True)
@@ -36,156 +55,214 @@ def update_signal():
         signal_id = frappe.local.form_dict.get('signal_id')
         value = frappe.local.form_dict.get('value')
 
-        logger.info(f"🔄 Received signal update: {signal_id} = {value}")
+        logger.info("🔄 Received signal update: %s = %s", signal_id, value)
 
-        # Parse value based on signal type using our helper functions
         signal = frappe.get_doc("Modbus Signal", signal_id)
 
-        # Use the JavaScript-like parsing
-        if "Digital" in signal.get("signal_type", ""):
-            # Parse digital values in a JavaScript-like way
-            parsed_value = parse_value(value)
-            # For digital values, ensure we get a boolean
-            if not isinstance(parsed_value, bool):
-                parsed_value = truthy(parsed_value)
-            logger.debug(f"📊 Parsed digital value: {value} -> {parsed_value}")
-        else:
-            # For non-digital values, convert to float
-            try:
-                parsed_value = float(value)
-                logger.debug(f"📊 Parsed analog value: {value} -> {parsed_value}")
-            except (ValueError, TypeError):
-                logger.error(f"❌ Error converting {value} to float")
-                return {"success": False, "message": f"Cannot convert {value} to a number"}
+        # bool for digital signals, float otherwise
+        try:
+            parsed_value = value_codec.coerce(signal.signal_type, value)
+            logger.debug("📊 Parsed %s value: %s -> %s", signal.signal_type, value, parsed_value)
+        except ValueError:
+            logger.error("❌ Error converting %s to a number", value)
+            return {"success": False, "message": f"Cannot convert {value} to a number"}
+
+        logger.info("🔄 Writing value: %s (%s) = %s (original: %s)", signal.signal_name, signal_id, parsed_value, value)
 
-        logger.info(f"🔄 Writing value: {signal.signal_name} ({signal_id}) = {parsed_value} (original: {value})")
+        # Fast write: the dashboard gets immediate feedback below and the next
+        # scan confirms the value, so skip the read-back
+        success = signal.write_signal(parsed_value, verify=False)
 
-        # Write signal directly using the signal's write_signal method
-        success = signal.write_signal(parsed_value)
-        
         if success:
-            # Publish update to realtime for immediate feedback
-            publish_realtime(
-                event='modbus_signal_update',
-                message={
-                    'signal': signal_id,
-                    'signal_name': signal.signal_name,
-                    'value': parsed_value,
-                    'timestamp': time.time(),
-                    'source': 'write_request'
-                }
+            # Queue update for the realtime batch for immediate feedback
+            queue_signal_update(
+                signal_id,
+                parsed_value,
+                source='write_request',
+                signal_name=signal.signal_name
             )
-            
+
             # Log the update
-            frappe.get_doc({
-                "doctype": "Modbus Event",
-                "event_type": "Signal Update",
-                "connection": signal.parent,
-                "signal": signal_id,
-                "new_value": str(parsed_value),
-                "message": f"Signal {signal.signal_name} updated to {parsed_value} via API"
-            }).insert(ignore_permissions=True)
-            
+            event_sink.log_event(
+                event_type="Signal Update",
+                connection=signal.parent,
+                signal=signal_id,
+                new_value=parsed_value,
+                message=f"Signal {signal.signal_name} updated to {parsed_value} via API"
+            )
+
             return {"success": True, "message": f"Updated signal {signal.signal_name}"}
         else:
             return {"success": False, "message": f"Failed to update signal {signal.signal_name}"}
 
     except Exception as e:
-        logger.error(f"❌ Error updating signal: {str(e)}")
+        logger.error("❌ Error updating signal: %s", e)
         return {"success": False, "message": str(e)}
 
+PLC_STATUS_CACHE_KEY = "epibus:plc_status"
+PLC_STATUS_SIGNATURE_KEY = "epibus:plc_status_signature"
+BRIDGE_HEALTH_MAX_AGE = 15  # Seconds since the bridge's last successful read
+
 @frappe.whitelist(allow_guest=True)
 def get_plc_status():
-    """Get current PLC status"""
+    """Get current PLC status
+
+    The result is cached in Redis for a few seconds and shared by all workers.
+    Connection health comes from the PLC Bridge when it is reachable; any device
+    it does not report on is probed directly, concurrently and with a short timeout.
+    `plc:status` is only published when a connection's status actually changes.
+    """
     try:
-        # Check if any Modbus connections are enabled and connected
-        connections = frappe.get_all(
-            "Modbus Connection",
-            filters={"enabled": 1},
-            fields=["name", "device_name", "host", "port"]
+        status = frappe.cache().get_value(PLC_STATUS_CACHE_KEY)
+        if status:
+            return {"success": True, "status": status}
+
+        settings = frappe.get_cached_doc("Modbus Settings")
+        status = probe_plc_status(settings.plc_status_probe_timeout or 1.0)
+
+        frappe.cache().set_value(
+            PLC_STATUS_CACHE_KEY, status,
+            expires_in_sec=settings.plc_status_cache_seconds or 2
         )
-        
-        # Default status
-        status = {
-            "connected": False,
-            "connections": [],
-            "timestamp": time.time()
-        }
-        
-        # Check each connection
-        for conn in connections:
-            try:
-                # Get a signal from this connection to test
-                signals = frappe.get_all(
-                    "Modbus Signal",
-                    filters={"parent": conn.name},
-                    limit=1
-                )
-                
-                if signals:
-                    signal_doc = frappe.get_doc("Modbus Signal", signals[0].name)
-                    # Try to read the signal to test connection
-                    try:
-                        signal_doc.read_signal()
-                        conn_status = True
-                    except Exception:
-                        conn_status = False
-                else:
-                    conn_status = False
-                    
-                status["connections"].append({
-                    "name": conn.name,
-                    "device_name": conn.device_name,
-                    "connected": conn_status
-                })
-                
-                # If any connection is working, set overall status to connected
-                if conn_status:
-                    status["connected"] = True
-                    
-            except Exception as conn_error:
-                logger.error(f"❌ Error checking connection {conn.name}: {str(conn_error)}")
-                status["connections"].append({
-                    "name": conn.name,
-                    "device_name": conn.device_name,
-                    "connected": False,
-                    "error": str(conn_error)
-                })
-        
-        # Publish status to frontend
-        publish_realtime('plc:status', status)
-        
+
+        # Publish status to frontend only when something changed
+        signature = json.dumps(
+            sorted((c["name"], c["connected"]) for c in status["connections"])
+        )
+        if frappe.cache().get_value(PLC_STATUS_SIGNATURE_KEY) != signature:
+            frappe.cache().set_value(PLC_STATUS_SIGNATURE_KEY, signature)
+            publish_realtime('plc:status', status)
+
         return {"success": True, "status": status}
 
     except Exception as e:
-        logger.error(f"❌ Error getting PLC status: {str(e)}")
+        logger.error("❌ Error getting PLC status: %s", e)
         return {"success": False, "message": str(e)}
 
+def probe_plc_status(probe_timeout=1.0):
+    """Build the PLC status for all enabled connections
+
+    Args:
+        probe_timeout (float): Timeout in seconds for each direct device probe
+
+    Returns:
+        dict: Overall status with one entry per enabled connection
+    """
+    connections = frappe.get_all(
+        "Modbus Connection",
+        filters={"enabled": 1},
+        fields=["name", "device_name", "host", "port"]
+    )
+
+    status = {
+        "connected": False,
+        "connections": [],
+        "timestamp": time.time()
+    }
+
+    if not connections:
+        return status
+
+    # One query for the first signal of every connection, used as the probe target
+    probe_signals = {}
+    for signal in frappe.get_all(
+        "Modbus Signal",
+        filters={"parent": ["in", [conn.name for conn in connections]]},
+        fields=["parent", "signal_type", "modbus_address"],
+        order_by="idx asc"
+    ):
+        probe_signals.setdefault(signal.parent, signal)
+
+    bridge_connections = get_bridge_connections(timeout=probe_timeout) or {}
+
+    results = {}
+    to_probe = []
+    for conn in connections:
+        bridge_status = bridge_connections.get(conn.name)
+        if bridge_status and bridge_status.get("last_success"):
+            results[conn.name] = {
+                "connected": bridge_status.get("status") == "Connected"
+                and time.time() - bridge_status["last_success"] <= BRIDGE_HEALTH_MAX_AGE,
+                "source": "plc_bridge"
+            }
+        elif conn.name in probe_signals:
+            to_probe.append(conn)
+        else:
+            # No signals to read from this connection
+            results[conn.name] = {"connected": False, "source": "probe"}
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=min(len(to_probe), 8)) as executor:
+            futures = {
+                executor.submit(
+                    _probe_device,
+                    conn.host,
+                    conn.port,
+                    probe_signals[conn.name].signal_type,
+                    probe_signals[conn.name].modbus_address,
+                    probe_timeout
+                ): conn.name
+                for conn in to_probe
+            }
+            for future, conn_name in futures.items():
+                try:
+                    results[conn_name] = {"connected": future.result(), "source": "probe"}
+                except Exception as conn_error:
+                    logger.error("❌ Error checking connection %s: %s", conn_name, conn_error)
+                    results[conn_name] = {"connected": False, "source": "probe", "error": str(conn_error)}
+
+    for conn in connections:
+        conn_status = {"name": conn.name, "device_name": conn.device_name}
+        conn_status.update(results[conn.name])
+        status["connections"].append(conn_status)
+
+        # If any connection is working, set overall status to connected
+        if conn_status["connected"]:
+            status["connected"] = True
+
+    return status
+
+def _probe_device(host, port, signal_type, address, timeout):
+    """Read one signal from a device with a short timeout, without retries
+
+    Runs in a worker thread, so it only uses plain values and never touches frappe.
+    """
+    client = ModbusTcpClient(host=host, port=port, timeout=timeout, retries=0)
+    try:
+        if not client.connect():
+            return False
+        SignalHandler(client).read(signal_type, address)
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
 @frappe.whitelist(allow_guest=True)
 def reload_signals():
     """Reload signals in the PLC bridge"""
     try:
         # Clear any caches
         frappe.cache().delete_key("modbus_signals")
-        
+
         # Get fresh data from the database
-        connections_data = get_all_signals_internal()
-        
+        get_all_signals_internal()
+
         # Publish an event to notify clients that signals have been reloaded
         publish_realtime(
             event='signals_reloaded',
             message={"timestamp": time.time()}
         )
-        
+
         return {"success": True, "message": "Signals reloaded successfully"}
 
     except Exception as e:
-        logger.error(f"❌ Error reloading signals: {str(e)}")
+        logger.error("❌ Error reloading signals: %s", e)
         return {"success": False, "message": str(e)}
 
 def get_all_signals_internal():
     """Internal function to get all signals with their connections
-    
+
     This is used by both get_signals() and get_all_signals() to avoid code duplication
     """
     try:
@@ -193,69 +270,70 @@ def get_all_signals_internal():
         cached_data = frappe.cache().get_value("modbus_signals")
         if cached_data:
             return cached_data
-            
+
         # Get enabled Modbus Connections with all fields
         connections = frappe.get_all(
             "Modbus Connection",
             filters={"enabled": 1},
             fields=["name", "device_name", "device_type", "host", "port", "enabled"]
         )
-        
+
         # Initialize connections list with signals
         connection_data = []
-        
+
         # Get signals for each connection
         for conn in connections:
             # Get basic signal information
             conn_signals = frappe.get_all(
                 "Modbus Signal",
                 filters={"parent": conn.name},
-                fields=["name", "signal_name", "signal_type", "modbus_address"]
+                fields=["name", "signal_name", "signal_type", "modbus_address",
+                        "data_type", "word_order", "byte_order", "scale"]
             )
-            
+
             # Process each signal
             processed_signals = []
             for signal in conn_signals:
                 try:
                     # Get the full document to access methods and virtual fields
                     signal_doc = frappe.get_doc("Modbus Signal", signal["name"])
-                    
+
                     # Use the document's read_signal method to get the current value
                     try:
                         value = signal_doc.read_signal()
                         signal["value"] = value
                     except Exception as e:
-                        logger.warning(f"⚠️ Error reading signal {signal['signal_name']}: {str(e)}")
+                        logger.warning("⚠️ Error reading signal %s: %s", signal['signal_name'], e)
                         # Fallback to default values based on signal type
                         signal["value"] = False if "Digital" in signal["signal_type"] else 0
-                    
+
                     # Add the PLC address virtual field
                     signal["plc_address"] = signal_doc.get_plc_address()
-                    
+
                 except Exception as e:
-                    logger.error(f"❌ Error processing signal {signal['name']}: {str(e)}")
+                    logger.error("❌ Error processing signal %s: %s", signal['name'], e)
                     # Set default values
                     signal["value"] = False if "Digital" in signal["signal_type"] else 0
                     signal["plc_address"] = None
-                
+
                 processed_signals.append(signal)
-            
+
             # Add signals to the connection
             conn_data = conn.copy()
             conn_data["signals"] = processed_signals
             connection_data.append(conn_data)
-        
+
         result = {
             "success": True,
             "data": connection_data
         }
-        
+
         # Cache the result for a short time (10 seconds)
         frappe.cache().set_value("modbus_signals", result, expires_in_sec=10)
-        
+
         return result
     except Exception as e:
-        logger.error(f"Error getting all signals: {str(e)}")
+        logger.error("Error getting all signals: %s", e)
         return {"success": False, "message": str(e)}
 
 @frappe.whitelist(allow_guest=True)
@@ -263,148 +341,304 @@ def get_all_signals():
     """Get all signals with their connections in a single call"""
     return get_all_signals_internal()
 
+@frappe.whitelist(allow_guest=True)
+def get_read_plan():
+    """Get the PLC Bridge's read plan: signals grouped into block reads per connection
+
+    Built from the precomputed address index, so the bridge can read each run of
+    adjacent addresses with one Modbus request instead of one request per signal.
+    """
+    try:
+        connections = frappe.get_all("Modbus Connection", filters={"enabled": 1}, pluck="name")
+        return {
+            "success": True,
+            "data": address_index.get_read_plan(connections),
+            "conflicts": address_index.get_conflicts()
+        }
+
+    except Exception as e:
+        logger.error("❌ Error building read plan: %s", e)
+        return {"success": False, "message": str(e)}
+
+@frappe.whitelist(allow_guest=True)
+def get_demand():
+    """Get how many subscribers each signal has
+
+    The PLC Bridge polls signals with subscribers at its fast rate and all other
+    signals at its slow background rate.
+    """
+    try:
+        return {"success": True, "data": subscriptions.get_demand()}
+
+    except Exception as e:
+        logger.error("❌ Error getting signal demand: %s", e)
+        return {"success": False, "message": str(e)}
+
 @frappe.whitelist(allow_guest=True)
 def signal_update():
-    """Handle a signal update from the PLC Bridge"""
+    """Handle a signal update from the PLC Bridge
+
+    Updates carrying the bridge's ``epoch`` and per-signal ``seq`` are processed at
+    most once; duplicates are acknowledged without side effects. Refused with
+    HTTP 429 and Retry-After while the backend is overloaded.
+    """
     try:
-        data = frappe.local.form_dict
-        signal_name = data.get("name")
-        value = data.get("value")
-        timestamp = data.get("timestamp", time.time())
-        
-        if not signal_name or value is None:
-            return {"success": False, "message": "Invalid signal update"}
-        
-        # Get signal document
-        if not frappe.db.exists("Modbus Signal", signal_name):
-            return {"success": False, "message": f"Signal {signal_name} not found"}
-        
-        signal = frappe.get_doc("Modbus Signal", signal_name)
-        
-        # Log the update
-        frappe.get_doc({
-            "doctype": "Modbus Event",
-            "event_type": "Signal Update",
-            "connection": signal.parent,
-            "signal": signal_name,
-            "new_value": str(value),
-            "message": f"Signal {signal.signal_name} updated to {value} via PLC Bridge"
-        }).insert(ignore_permissions=True)
-        
-        # Find and process actions triggered by this signal
-        process_signal_actions(signal_name, value)
-        
-        # Broadcast to Frappe real-time
-        publish_realtime(
-            event='modbus_signal_update',
-            message={
-                'signal': signal_name,
-                'signal_name': signal.signal_name,
-                'value': value,
-                'timestamp': timestamp,
-                'source': 'plc_bridge'
+        with ingest_request() as retry_after:
+            if retry_after:
+                return {"success": False, "overloaded": True, "retry_after": retry_after}
+
+            data = frappe.local.form_dict
+            signal_name = data.get("name")
+            value = data.get("value")
+
+            if not signal_name or value is None:
+                return {"success": False, "message": "Invalid signal update"}
+
+            result = _apply_signal_updates([data])[0]
+            if result == "not_found":
+                return {"success": False, "message": f"Signal {signal_name} not found"}
+            if result == "duplicate":
+                return {"success": True, "duplicate": True}
+            if result == "invalid":
+                return {"success": False, "message": f"Invalid value for signal {signal_name}"}
+            return {"success": True}
+
+    except Exception as e:
+        logger.error("Error handling signal update: %s", e)
+        return {"success": False, "message": str(e)}
+
+@frappe.whitelist(allow_guest=True)
+def signal_updates():
+    """Handle a batch of signal updates from the PLC Bridge
+
+    Expects ``updates``: a list of dicts with name, value, timestamp, epoch and seq,
+    as sent one at a time to signal_update. Refused as a whole with HTTP 429 and
+    Retry-After while the backend is overloaded, so the bridge can widen its batches.
+
+    Returns:
+        dict: {"success": True, "applied": n, "duplicates": n, "not_found": [names], "invalid": [names]}
+    """
+    try:
+        with ingest_request() as retry_after:
+            if retry_after:
+                return {"success": False, "overloaded": True, "retry_after": retry_after}
+
+            updates = frappe.local.form_dict.get("updates")
+            if isinstance(updates, str):
+                updates = json.loads(updates)
+            if not isinstance(updates, list):
+                return {"success": False, "message": "updates must be a list"}
+
+            updates = [u for u in updates if isinstance(u, dict) and u.get("name") and u.get("value") is not None]
+            results = _apply_signal_updates(updates)
+
+            return {
+                "success": True,
+                "applied": results.count("applied"),
+                "duplicates": results.count("duplicate"),
+                "not_found": [u["name"] for u, r in zip(updates, results, strict=True) if r == "not_found"],
+                "invalid": [u["name"] for u, r in zip(updates, results, strict=True) if r == "invalid"]
             }
-        )
-        
-        return {"success": True}
-        
+
     except Exception as e:
-        logger.error(f"Error handling signal update: {str(e)}")
+        logger.error("Error handling signal updates: %s", e)
         return {"success": False, "message": str(e)}
 
-def process_signal_actions(signal_name, value):
-    """Process actions triggered by a signal update"""
+def _apply_signal_updates(updates):
+    """Log, run actions for and broadcast signal updates from the PLC Bridge
+
+    Signals are resolved with one query and sequence numbers checked with one
+    Redis round trip for the whole batch. Values are typed by value_codec - bool
+    for digital signals, float otherwise - whatever type the bridge sent.
+
+    Returns:
+        list: "applied", "duplicate", "not_found" or "invalid" per update
+    """
+    names = list({u["name"] for u in updates})
+    signals = {}
+    if names:
+        for row in frappe.get_all(
+            "Modbus Signal",
+            filters={"name": ["in", names]},
+            fields=["name", "parent", "signal_name", "signal_type"]
+        ):
+            signals[row.name] = row
+
+    # Retried or re-sent updates must not log events or run actions twice
+    known = [u for u in updates if u["name"] in signals]
+    accepted = iter(sequence.accept_updates((u["name"], u.get("epoch"), u.get("seq")) for u in known))
+
+    results = []
+    applied = []
+    for update in updates:
+        signal = signals.get(update["name"])
+        if signal is None:
+            results.append("not_found")
+            continue
+
+        if not next(accepted):
+            logger.debug("Ignoring duplicate update %s:%s for %s", update.get('epoch'), update.get('seq'), signal.name)
+            results.append("duplicate")
+            continue
+
+        try:
+            update = dict(update, value=value_codec.coerce(signal.signal_type, update["value"]))
+        except ValueError:
+            logger.warning("Ignoring update of %s with invalid value %r", signal.name, update["value"])
+            results.append("invalid")
+            continue
+
+        applied.append((signal, update))
+        results.append("applied")
+
+    # Make the new values visible before any action runs
+    live_values.set_values(
+        {"signal": signal.name, "value": update["value"], "source": "plc_bridge", "ts": update.get("timestamp")}
+        for signal, update in applied
+    )
+
+    event_sink.log_events([{
+        "event_type": "Signal Update",
+        "connection": signal.parent,
+        "signal": signal.name,
+        "new_value": str(update["value"]),
+        "message": f"Signal {signal.signal_name} updated to {update['value']} via PLC Bridge"
+    } for signal, update in applied])
+
+    for signal, update in applied:
+        # Find and process actions triggered by this signal
+        process_signal_actions(signal.name, update["value"], update.get("timestamp"))
+
+        # Broadcast to Frappe real-time as part of the current batch
+        queue_signal_update(
+            signal.name,
+            update["value"],
+            timestamp=update.get("timestamp", time.time()),
+            source='plc_bridge',
+            signal_name=signal.signal_name
+        )
+
+    return results
+
+def process_signal_actions(signal_name, value, changed_at=None):
+    """Process actions triggered by a signal update
+
+    Actions whose condition is met are handed to action_dispatch, which runs
+    Inline ones here, in order, and Independent ones concurrently on background
+    workers, and records the change's end-to-end latency.
+
+    The PLC Bridge and the signal monitor both call this for the changes they
+    see. Each change is claimed first (sequence.claim_change), so when both
+    report the same change its actions run once.
+
+    Args:
+        changed_at: Epoch seconds the PLC Bridge read the change (default: now)
+    """
     try:
+        if not sequence.claim_change(signal_name, value):
+            logger.debug("Actions for %s = %s already ran", signal_name, value)
+            return
+
         # Find applicable actions with direct signal link
         actions = frappe.get_all(
             "Modbus Action",
             filters={
                 "modbus_signal": signal_name,
                 "enabled": 1,
-                "trigger_type": "Signal Change"
+                "script_type": "Signal Change"
             },
-            fields=["name", "signal_condition", "signal_value", "server_script"]
+            fields=["name", "signal_condition", "signal_value", "server_script", "execution_mode",
+                    "rate_limit_mode", "rate_limit_edge", "min_interval_ms", "max_in_flight"]
         )
-        
-        logger.info(f"Found {len(actions)} potential actions for signal {signal_name}")
-        
-        # Process each action based on condition
+
+        logger.info("Found %s potential actions for signal %s", len(actions), signal_name)
+
+        # Check each action's condition
+        matched = []
         for action in actions:
             try:
-                # Check if condition is met
-                condition_met = False
-                condition_desc = "unknown"
-                
-                if not action.signal_condition or action.signal_condition == "Any Change":
-                    condition_met = True
-                    condition_desc = "any change"
-                elif action.signal_condition == "Equals":
-                    try:
-                        # Handle different value types
-                        if isinstance(value, bool):
-                            # Boolean comparison
-                            target_value = action.signal_value.lower() == "true"
-                            condition_met = value == target_value
-                        elif "." in action.signal_value:
-                            # Float comparison
-                            target_value = float(action.signal_value)
-                            condition_met = float(value) == target_value
-                        else:
-                            # Integer comparison
-                            target_value = int(action.signal_value)
-                            condition_met = int(value) == target_value
-                        
-                        condition_desc = f"equals {target_value}"
-                    except (ValueError, TypeError):
-                        # Handle conversion errors
-                        logger.warning(f"⚠️ Invalid value comparison: {value} == {action.signal_value}")
-                        # Fall back to string comparison
-                        condition_met = str(value) == action.signal_value
-                        condition_desc = f"string equals {action.signal_value}"
-                
-                elif action.signal_condition == "Greater Than":
-                    try:
-                        target_value = float(action.signal_value)
-                        condition_met = float(value) > target_value
-                        condition_desc = f"greater than {target_value}"
-                    except (ValueError, TypeError):
-                        logger.error(f"❌ Invalid comparison for non-numeric value: {value} > {action.signal_value}")
-                
-                elif action.signal_condition == "Less Than":
-                    try:
-                        target_value = float(action.signal_value)
-                        condition_met = float(value) < target_value
-                        condition_desc = f"less than {target_value}"
-                    except (ValueError, TypeError):
-                        logger.error(f"❌ Invalid comparison for non-numeric value: {value} < {action.signal_value}")
-                
-                # Execute action if condition is met
+                condition_met, condition_desc = _check_condition(action, value)
                 if condition_met:
-                    logger.info(f"✅ Condition met for action {action.name}: {condition_desc}")
-                    
-                    # Execute action
-                    execute_action(action.name, signal_name, value, condition_desc)
+                    logger.info("✅ Condition met for action %s: %s", action.name, condition_desc)
+                    matched.append((action, condition_desc))
                 else:
-                    logger.debug(f"⏭️ Condition not met for action {action.name}: {condition_desc}")
-                    
+                    logger.debug("⏭️ Condition not met for action %s: %s", action.name, condition_desc)
+
             except Exception as e:
-                logger.error(f"❌ Error processing action {action.name}: {str(e)}")
-                
+                logger.error("❌ Error processing action %s: %s", action.name, e)
+
+        if matched:
+            action_dispatch.dispatch(signal_name, value, matched, changed_at)
+
     except Exception as e:
-        logger.error(f"❌ Error processing signal actions: {str(e)}")
+        logger.error("❌ Error processing signal actions: %s", e)
+
+def _check_condition(action, value):
+    """Whether a signal value meets an action's condition
+
+    Returns:
+        tuple: (condition met, description of the condition)
+    """
+    condition_met = False
+    condition_desc = "unknown"
+
+    if not action.signal_condition or action.signal_condition == "Any Change":
+        condition_met = True
+        condition_desc = "any change"
+    elif action.signal_condition == "Equals":
+        try:
+            # Handle different value types
+            if isinstance(value, bool):
+                # Boolean comparison
+                target_value = action.signal_value.lower() == "true"
+                condition_met = value == target_value
+            elif "." in action.signal_value:
+                # Float comparison
+                target_value = float(action.signal_value)
+                condition_met = float(value) == target_value
+            else:
+                # Integer comparison
+                target_value = int(action.signal_value)
+                condition_met = int(value) == target_value
+
+            condition_desc = f"equals {target_value}"
+        except (ValueError, TypeError):
+            # Handle conversion errors
+            logger.warning("⚠️ Invalid value comparison: %s == %s", value, action.signal_value)
+            # Fall back to string comparison
+            condition_met = str(value) == action.signal_value
+            condition_desc = f"string equals {action.signal_value}"
+
+    elif action.signal_condition == "Greater Than":
+        try:
+            target_value = float(action.signal_value)
+            condition_met = float(value) > target_value
+            condition_desc = f"greater than {target_value}"
+        except (ValueError, TypeError):
+            logger.error("❌ Invalid comparison for non-numeric value: %s > %s", value, action.signal_value)
+
+    elif action.signal_condition == "Less Than":
+        try:
+            target_value = float(action.signal_value)
+            condition_met = float(value) < target_value
+            condition_desc = f"less than {target_value}"
+        except (ValueError, TypeError):
+            logger.error("❌ Invalid comparison for non-numeric value: %s < %s", value, action.signal_value)
+
+    return condition_met, condition_desc
 
 def execute_action(action_name, signal_name, value, condition_desc=None):
     """Execute a Modbus Action"""
+    with action_profiler.profile_action(action_name, signal_name):
+        return _execute_action(action_name, signal_name, value, condition_desc)
+
+def _execute_action(action_name, signal_name, value, condition_desc=None):
     try:
-        # Get the action document
-        action_doc = frappe.get_doc("Modbus Action", action_name)
-        
-        # Get the signal document
-        signal_doc = frappe.get_doc("Modbus Signal", signal_name)
-        
-        # Get the parent connection
-        connection_doc = frappe.get_doc("Modbus Connection", signal_doc.parent)
-        
+        # Resolve action, signal and connection from the per-worker cache
+        with action_profiler.span("context"):
+            action_doc, signal_doc, connection_doc = get_action_context(action_name, signal_name)
+            script_doc = get_cached_doc("Server Script", action_doc.server_script) if action_doc.server_script else None
+
         # Setup context for the script
         frappe.flags.modbus_context = {
             "action": action_doc,
@@ -414,103 +648,142 @@ def execute_action(action_name, signal_name, value, condition_desc=None):
             "params": {p.parameter: p.value for p in action_doc.parameters},
             "logger": logger  # Provide logger to scripts
         }
-        
+
         # Log the action execution start
-        logger.info(f"🔄 Executing action {action_name} for signal {signal_name} = {value}")
+        logger.info("🔄 Executing action %s for signal %s = %s", action_name, signal_name, value)
         if condition_desc:
-            logger.info(f"Trigger condition: {condition_desc}")
-        
+            logger.info("Trigger condition: %s", condition_desc)
+
         # Execute the script
         result = None
-        if action_doc.server_script:
-            script_doc = frappe.get_doc("Server Script", action_doc.server_script)
-            result = script_doc.execute_method()
-            
+        if script_doc:
+            with action_profiler.span("script", script_doc.name):
+                result = execute_server_script(script_doc)
+
             # Log the execution
-            frappe.get_doc({
-                "doctype": "Modbus Event",
-                "event_type": "Action Execution",
-                "connection": connection_doc.name,
-                "signal": signal_name,
-                "action": action_name,
-                "new_value": str(value),
-                "status": "Success",
-                "message": f"Successfully executed action '{action_name}' for signal '{signal_name}' with value {value}"
-            }).insert(ignore_permissions=True)
-        
+            event_sink.log_event(
+                event_type="Action Execution",
+                connection=connection_doc.name,
+                signal=signal_name,
+                action=action_name,
+                new_value=value,
+                status="Success",
+                message=f"Successfully executed action '{action_name}' for signal '{signal_name}' with value {value}"
+            )
+
         # Clear context
         frappe.flags.modbus_context = None
-        
-        logger.info(f"✅ Executed action {action_name} successfully")
+
+        logger.info("✅ Executed action %s successfully", action_name)
         return result
-        
+
     except Exception as e:
-        logger.error(f"❌ Error executing action {action_name}: {str(e)}")
-        
+        logger.error("❌ Error executing action %s: %s", action_name, e)
+        profile = action_profiler.current_profile()
+        if profile:
+            profile.failed = True
+
         # Log the error
         try:
-            frappe.get_doc({
-                "doctype": "Modbus Event",
-                "event_type": "Action Execution",
-                "connection": connection_doc.name if 'connection_doc' in locals() else None,
-                "signal": signal_name,
-                "action": action_name,
-                "new_value": str(value) if 'value' in locals() else None,
-                "status": "Failed",
-                "error_message": str(e),
-                "message": f"Failed to execute action '{action_name}' for signal '{signal_name}': {str(e)}"
-            }).insert(ignore_permissions=True)
-        except Exception as log_error:
-            logger.error(f"❌ Error logging action failure: {str(log_error)}")
-        frappe.log_error(f"Error executing Modbus Action {action_name}: {str(e)}")
+            event_sink.log_event(
+                event_type="Action Execution",
+                connection=connection_doc.name if 'connection_doc' in locals() else None,
+                signal=signal_name,
+                action=action_name,
+                new_value=value if 'value' in locals() else None,
+                status="Failed",
+                error_message=str(e),
+                message=f"Failed to execute action '{action_name}' for signal '{signal_name}': {e!s}"
+            )
+        except Exception as event_error:
+            logger.error("❌ Error logging action failure: %s", event_error)
+        log_error(
+            f"Error executing Modbus Action {action_name}: {e!s}",
+            message=frappe.get_traceback(),
+            fingerprint=f"execute_action:{action_name}:{type(e).__name__}",
+            reference_doctype="Modbus Action",
+            reference_name=action_name,
+        )
         return {"success": False, "error": str(e)}
 
 @frappe.whitelist(allow_guest=True)
 def log_event():
     """Log an event from the PLC Bridge
-    
+
     This endpoint is called by the PLC Bridge to log events to Frappe.
-    It maps the event_data fields to the ModbusEvent.log_event parameters.
+    Prefer log_events, which accepts a batch of events per call.
     """
     try:
         # Get the event data from the request
         event_data = frappe.local.form_dict
         if isinstance(event_data, str):
             event_data = json.loads(event_data)
-            
-        # Extract fields from event_data
-        event_type = event_data.get('event_type')
-        status = event_data.get('status', 'Success')
-        signal = event_data.get('signal')
-        action = event_data.get('action')
-        message = event_data.get('message')
-        
-        # Get the signal document to find its parent connection (device)
-        device = None
-        if signal:
-            try:
-                signal_doc = frappe.get_doc("Modbus Signal", signal)
-                device = signal_doc.parent
-            except Exception as e:
-                logger.warning(f"Could not get device for signal {signal}: {str(e)}")
-        
-        # If we couldn't get the device from the signal, use a default
-        if not device:
-            device = "Unknown Device"
-        
-        # Log the event using the ModbusEvent.log_event method
-        ModbusEvent.log_event(
-            event_type=event_type,
-            device=device,
-            status=status,
-            signal=signal,
-            action=action,
-            message=message
-        )
-        
+
+        _log_bridge_events([event_data])
         return {"success": True}
-        
+
     except Exception as e:
-        logger.error(f"Error logging event: {str(e)}")
+        logger.error("Error logging event: %s", e)
         return {"success": False, "message": str(e)}
-        return {"success": False, "error": str(e)}
+
+@frappe.whitelist(allow_guest=True)
+def log_events():
+    """Log a batch of events from the PLC Bridge
+
+    Expects ``events``: a list of dicts with event_type, status, signal, connection,
+    action, message, error_message, previous_value, new_value and timestamp (all
+    optional except event_type). Connections are resolved for all signals at once
+    and the events are buffered for a single bulk insert.
+    """
+    try:
+        events = frappe.local.form_dict.get("events")
+        if isinstance(events, str):
+            events = json.loads(events)
+
+        if not isinstance(events, list):
+            return {"success": False, "message": "events must be a list"}
+
+        logged = _log_bridge_events(events)
+        return {"success": True, "logged": logged}
+
+    except Exception as e:
+        logger.error("Error logging events: %s", e)
+        return {"success": False, "message": str(e)}
+
+BRIDGE_EVENT_FIELDS = (
+    "event_type", "status", "connection", "signal", "action", "message",
+    "error_message", "previous_value", "new_value", "timestamp",
+)
+
+def _log_bridge_events(events):
+    """Resolve the connection of each event's signal with one query and buffer the events"""
+    events = [e for e in events if isinstance(e, dict) and e.get("event_type")]
+
+    signals = {e["signal"] for e in events if e.get("signal") and not e.get("connection")}
+    parents = {}
+    if signals:
+        parents = dict(frappe.get_all(
+            "Modbus Signal",
+            filters={"name": ["in", list(signals)]},
+            fields=["name", "parent"],
+            as_list=True
+        ))
+        for missing in signals - set(parents):
+            logger.warning("Could not get device for signal %s", missing)
+
+    buffered = []
+    for e in events:
+        event = {field: e.get(field) for field in BRIDGE_EVENT_FIELDS}
+        if not event["connection"] and event["signal"]:
+            event["connection"] = parents.get(event["signal"])
+        if isinstance(event["timestamp"], (int, float)):
+            event["timestamp"] = convert_utc_to_system_timezone(
+                datetime.fromtimestamp(event["timestamp"], timezone.utc)
+            ).replace(tzinfo=None)
+        for field in ("previous_value", "new_value"):
+            if event[field] is not None:
+                event[field] = str(event[field])
+        buffered.append(event)
+
+    event_sink.log_events(buffered)
+    return len(buffered)
@@ -88,4 +88,121 @@ def create_prerequisites_command(context):
 	finally:
 		frappe.destroy()
 
-commands = [load_items_command, create_prerequisites_command]
\ No newline at end of file
+@click.command('import-signal-map')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--connection', required=True, help='Modbus Connection to import into')
+@click.option('--apply', is_flag=True, default=False, help='Write the changes (default is a dry run)')
+@click.option('--remove-missing', is_flag=True, default=False, help='Delete signals that are not in the CSV')
+@click.option('--host', help='Host for a new Modbus Connection')
+@click.option('--port', type=int, default=502, help='Port for a new Modbus Connection')
+@pass_context
+def import_signal_map_command(context, csv_path, connection, apply, remove_missing, host, port):
+	"""Import a Modbus signal map from a PLC program CSV (e.g. plc_programs/Beachside.csv)"""
+	from epibus.epibus.utils.signal_import import import_signal_map
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+
+	try:
+		with open(csv_path, encoding='utf-8-sig') as f:
+			content = f.read()
+
+		result = import_signal_map(connection, content, dry_run=not apply, remove_missing=remove_missing,
+			host=host, port=port)
+		diff = result['diff']
+
+		click.echo(f"{'Creating' if diff['create'] else 'Updating'} Modbus Connection {connection}")
+		for signal in diff['added']:
+			click.echo(f"  + {signal['signal_name']}: {signal['signal_type']} {signal['modbus_address']} ({signal['plc_address']})")
+		for update in diff['updated']:
+			changes = ', '.join(f"{field} {old} -> {new}" for field, (old, new) in update['changes'].items())
+			click.echo(f"  ~ {update['signal_name']}: {changes}")
+		for signal in diff['removed']:
+			click.echo(f"  - {signal['signal_name']}")
+		for signal in diff['unmatched']:
+			click.echo(f"  ? {signal['signal_name']} (not in CSV, kept)")
+		for error in diff['errors']:
+			click.echo(f"  ❌ line {error['line'] or '-'}: {error['message']}")
+		click.echo(f"{len(diff['added'])} added, {len(diff['updated'])} updated, {diff['unchanged']} unchanged, "
+			f"{len(diff['removed'])} removed")
+
+		if not result['success']:
+			click.echo(f"❌ {result.get('message', 'Import failed')} - nothing was written")
+			return
+
+		if result['applied']:
+			frappe.db.commit()
+			click.echo("✅ Signal map imported")
+		else:
+			click.echo("Dry run - pass --apply to write these changes")
+
+	except Exception as e:
+		frappe.db.rollback()
+		click.echo(f"❌ Import failed: {str(e)}")
+		raise
+	finally:
+		frappe.destroy()
+
+@click.command('test-connections')
+@click.option('--rounds', type=int, default=3, help='Times each connection\'s signals are read')
+@pass_context
+def test_connections_command(context, rounds):
+	"""Test all enabled Modbus Connections concurrently and store the timings"""
+	from epibus.epibus.utils.connection_test import run_connection_test
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+
+	def ms(value):
+		return f"{value:.1f}" if value is not None else "-"
+
+	def delta(value):
+		return f"{value:+.1f}" if value is not None else "-"
+
+	try:
+		result = run_connection_test(rounds)
+		frappe.db.commit()
+
+		click.echo(f"Modbus Connection Test {result['name']}: {result['connections_tested']} connection(s) "
+			f"in {result['duration']:.2f}s")
+		for row in result['results']:
+			click.echo(f"  {'✅' if row['status'] == 'Success' else '❌'} {row['connection']}: {row['status']}, "
+				f"{row['requests']} requests, min/p50/p99 {ms(row['latency_min_ms'])}/{ms(row['latency_p50_ms'])}/"
+				f"{ms(row['latency_p99_ms'])} ms, {row['throughput']:.1f} signals/s")
+			if row['error']:
+				click.echo(f"      {row['error']}")
+			for address in (row['failed_addresses'] or '').splitlines():
+				click.echo(f"      failed: {address}")
+
+		for connection, change in result['comparison'].items():
+			click.echo(f"  vs {result['previous']} {connection}: p50 {delta(change['latency_p50_ms'])} ms, "
+				f"p99 {delta(change['latency_p99_ms'])} ms, throughput {change['throughput']:+.1f} signals/s")
+
+	except Exception as e:
+		frappe.db.rollback()
+		click.echo(f"❌ Connection test failed: {str(e)}")
+		raise
+	finally:
+		frappe.destroy()
+
+@click.command('run-signal-monitor')
+@click.option('--interval', type=float, default=None, help='Seconds between scans (default 0.25)')
+@pass_context
+def run_signal_monitor_command(context, interval):
+	"""Monitor signals continuously and publish their changes (run under supervisor)"""
+	from epibus.epibus.utils.signal_monitor import SCAN_INTERVAL, run_monitor
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+
+	try:
+		click.echo(f"Signal monitor running on {site}")
+		run_monitor(interval or SCAN_INTERVAL)
+	finally:
+		frappe.destroy()
+
+commands = [load_items_command, create_prerequisites_command, import_signal_map_command, test_connections_command,
+	run_signal_monitor_command]
\ No newline at end of file
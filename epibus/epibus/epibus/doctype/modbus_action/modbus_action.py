@@ -7,10 +7,11 @@ from frappe.core.doctype.server_script.server_script import ServerScript
 from frappe import _
 from typing import cast
 
-import logging
+from epibus.epibus.utils.action_cache import get_cached_doc
+from epibus.epibus.utils.action_profiler import current_profile, profile_action, span
+from epibus.epibus.utils.action_throttle import MAX_TRAILING_INTERVAL_MS
 from epibus.epibus.utils.epinomy_logger import get_logger
 logger = get_logger(__name__)
-logger.setLevel(logging.DEBUG)
 
 
 class ModbusAction(Document):
@@ -33,8 +34,13 @@ class ModbusAction(Document):
         enabled: DF.Check
         event_frequency: DF.Literal["All", "Hourly", "Daily", "Weekly", "Monthly",
                                     "Yearly", "Hourly Long", "Daily Long", "Weekly Long", "Monthly Long", "Cron"]
+        execution_mode: DF.Literal["Inline", "Independent", "After Independent"]
+        max_in_flight: DF.Int
+        min_interval_ms: DF.Int
         modbus_signal: DF.Link
         parameters: DF.Table[ModbusParameter]
+        rate_limit_edge: DF.Literal["Leading", "Trailing"]
+        rate_limit_mode: DF.Literal["None", "Debounce", "Throttle"]
         reference_doctype: DF.Link | None
         script_type: DF.Literal["DocType Event",
                                 "Scheduler Event", "Signal Change", "API"]
@@ -51,15 +57,36 @@ class ModbusAction(Document):
         if not self.server_script:
             frappe.throw(_("Server Script is required"))
 
+        self.validate_rate_limit()
+
+    def validate_rate_limit(self):
+        if self.max_in_flight and self.max_in_flight < 0:
+            frappe.throw(_("Max In-Flight can't be negative"))
+
+        if (self.rate_limit_mode or "None") == "None":
+            return
+
+        if not self.min_interval_ms or self.min_interval_ms <= 0:
+            frappe.throw(_("Minimum Interval is required for {0}").format(self.rate_limit_mode))
+
+        if self.rate_limit_edge == "Trailing" and self.min_interval_ms > MAX_TRAILING_INTERVAL_MS:
+            frappe.throw(_("Minimum Interval of a trailing {0} can't exceed {1} ms").format(
+                self.rate_limit_mode, MAX_TRAILING_INTERVAL_MS))
+
     @frappe.whitelist(methods=['POST'])
     def execute_script(self, event_doc=None):
         """Execute the linked server script"""
+        with profile_action(self.name):
+            return self._execute_script(event_doc)
+
+    def _execute_script(self, event_doc=None):
         logger.debug(
-            f"Executing script for Modbus Action {self.name} ({self.action_name})")
+            "Executing script for Modbus Action %s (%s)", self.name, self.action_name)
 
         try:
-            script: ServerScript = cast(ServerScript, frappe.get_doc(
-                "Server Script", self.server_script))
+            with span("context"):
+                script: ServerScript = cast(ServerScript, get_cached_doc(
+                    "Server Script", self.server_script))
 
             # Set up the context for API script execution
             frappe.form_dict.connection_id = self.connection
@@ -69,38 +96,43 @@ class ModbusAction(Document):
             frappe.form_dict.params = params
 
             # Log parameters for debugging
-            logger.debug(f"Script parameters: {params}")
+            logger.debug("Script parameters: %s", params)
 
             if script.script_type == "API":
-                logger.debug(f"Executing API script {script.name}")
-                result = script.execute_method()
+                logger.debug("Executing API script %s", script.name)
+                with span("script", script.name):
+                    result = script.execute_method()
 
                 if not result:
-                    logger.error(f"Script {script.name} returned no result")
+                    logger.error("Script %s returned no result", script.name)
                     return {
                         "status": "error",
                         "value": None,
                         "error": "Script returned nothing"
                     }
 
-                logger.debug(f"Script execution result: {result}")
+                logger.debug("Script execution result: %s", result)
 
                 return result
             else:
                 logger.debug(
-                    f"Executing non-API script {script.name} with event_doc: {event_doc is not None}")
-                result = script.execute_doc(event_doc) if event_doc else None
+                    "Executing non-API script %s with event_doc: %s", script.name, event_doc is not None)
+                with span("script", script.name):
+                    result = script.execute_doc(event_doc) if event_doc else None
                 return result
         except Exception as e:
             logger.exception(
-                f"Error executing script for Modbus Action {self.name}: {str(e)}")
+                "Error executing script for Modbus Action %s: %s", self.name, e)
+            profile = current_profile()
+            if profile:
+                profile.failed = True
             return {
                 "status": "error",
                 "value": None,
                 "error": str(e)
             }
         finally:
-            logger.debug(f"Clearing modbus context for action {self.name}")
+            logger.debug("Clearing modbus context for action %s", self.name)
             frappe.flags.modbus_context = None
 
 
@@ -115,22 +147,22 @@ def test_action_script(action_name):
     Returns:
         dict: Result of script execution
     """
-    logger.info(f"Testing script for Modbus Action: {action_name}")
+    logger.info("Testing script for Modbus Action: %s", action_name)
     
     try:
         # Get the Modbus Action document
         action_doc = frappe.get_doc("Modbus Action", action_name)
 
         # Skip all signal checks and directly execute the script
-        logger.info(f"Directly executing server script: {action_doc.server_script}")
+        logger.info("Directly executing server script: %s", action_doc.server_script)
         
         # Execute the script
         result = action_doc.execute_script()
-        logger.info(f"Script execution result: {result}")
+        logger.info("Script execution result: %s", result)
         return result
     
     except Exception as e:
-        logger.exception(f"Error testing script for Modbus Action {action_name}: {str(e)}")
+        logger.exception("Error testing script for Modbus Action %s: %s", action_name, e)
         return {
             "status": "error",
             "error": str(e)
@@ -144,7 +176,7 @@ def get_signals_for_connection(doctype, txt, searchfield, start, page_len, filte
     Custom query to fetch signals for a connection with formatted display names
     """
     logger.debug(
-        f"🔍 Getting signals for connection: {filters.get('connection')}")
+        "🔍 Getting signals for connection: %s", filters.get('connection'))
 
     # Query for signals matching the parent (connection)
     signals = frappe.get_all(
@@ -165,7 +197,7 @@ def get_signals_for_connection(doctype, txt, searchfield, start, page_len, filte
         display_name = f"{signal.signal_name} ({signal.signal_type}) - Address: {signal.modbus_address}"
         formatted_signals.append([signal.name, display_name])
 
-    logger.debug(f"📊 Found {len(formatted_signals)} signals")
+    logger.debug("📊 Found %s signals", len(formatted_signals))
     return formatted_signals
 
 
@@ -182,7 +214,7 @@ def check_recent_events(action_name, signal_name):
         dict: Result with found status and event info
     """
     logger.debug(
-        f"🔍 Checking recent events for action: {action_name}, signal: {signal_name}")
+        "🔍 Checking recent events for action: %s, signal: %s", action_name, signal_name)
 
     try:
         # Get the action document for reference
@@ -206,7 +238,7 @@ def check_recent_events(action_name, signal_name):
 
         if events:
             logger.info(
-                f"✅ Found {len(events)} recent events for {action_name}")
+                "✅ Found %s recent events for %s", len(events), action_name)
             # Format the event information for display
             event_info = "<ul>"
             for event in events[:3]:  # Show max 3 recent events
@@ -219,14 +251,14 @@ def check_recent_events(action_name, signal_name):
                 "event_count": len(events)
             }
         else:
-            logger.warning(f"⚠️ No recent events found for {action_name}")
+            logger.warning("⚠️ No recent events found for %s", action_name)
             return {
                 "found": False,
                 "event_info": "No events found in the last 15 seconds"
             }
 
     except Exception as e:
-        logger.error(f"❌ Error checking recent events: {str(e)}")
+        logger.error("❌ Error checking recent events: %s", e)
         return {
             "found": False,
             "error": str(e)
@@ -244,7 +276,7 @@ def test_doctype_event(self):
     Returns:
         dict: Test result
     """
-    logger.debug(f"🧪 Testing DocType Event script for {self.name}")
+    logger.debug("🧪 Testing DocType Event script for %s", self.name)
 
     try:
         # Get the referenced server script
@@ -287,7 +319,7 @@ def test_doctype_event(self):
         }
 
         logger.debug(
-            f"🧩 Set up test context with connection {connection_doc.name}")
+            "🧩 Set up test context with connection %s", connection_doc.name)
 
         try:
             # Execute the script with the dummy doc
@@ -312,7 +344,7 @@ def test_doctype_event(self):
             }
 
         except Exception as e:
-            logger.error(f"❌ Error executing script: {str(e)}")
+            logger.error("❌ Error executing script: %s", e)
             return {
                 "status": "error",
                 "error": str(e)
@@ -322,7 +354,7 @@ def test_doctype_event(self):
             frappe.flags.modbus_context = None
 
     except Exception as e:
-        logger.error(f"❌ Error in test setup: {str(e)}")
+        logger.error("❌ Error in test setup: %s", e)
         return {
             "status": "error",
             "error": f"Test setup failed: {str(e)}"
@@ -340,7 +372,7 @@ def direct_test_script(action_name):
     Returns:
         dict: Result of script execution
     """
-    logger.info(f"Direct test of script for Modbus Action: {action_name}")
+    logger.info("Direct test of script for Modbus Action: %s", action_name)
     
     try:
         # Get the Modbus Action document
@@ -361,16 +393,16 @@ def direct_test_script(action_name):
         script_doc = frappe.get_doc("Server Script", action_doc.server_script)
         
         # Execute the script
-        logger.info(f"Executing server script: {script_doc.name}")
+        logger.info("Executing server script: %s", script_doc.name)
         result = script_doc.execute_method()
-        logger.info(f"Script execution result: {result}")
+        logger.info("Script execution result: %s", result)
         
         return {
             "status": "success",
             "result": result
         }
     except Exception as e:
-        logger.exception(f"Error in direct test of script: {str(e)}")
+        logger.exception("Error in direct test of script: %s", e)
         return {
             "status": "error",
             "error": str(e)
@@ -391,7 +423,7 @@ def test_scheduler_event(self):
     Returns:
         dict: Test result
     """
-    logger.debug(f"🧪 Testing Scheduler Event script for {self.name}")
+    logger.debug("🧪 Testing Scheduler Event script for %s", self.name)
 
     try:
         # Get the referenced server script
@@ -422,7 +454,7 @@ def test_scheduler_event(self):
         }
 
         logger.debug(
-            f"🧩 Set up test context with connection {connection_doc.name}")
+            "🧩 Set up test context with connection %s", connection_doc.name)
 
         try:
             # Execute the script without any arguments (as scheduler would)
@@ -447,7 +479,7 @@ def test_scheduler_event(self):
             }
 
         except Exception as e:
-            logger.error(f"❌ Error executing script: {str(e)}")
+            logger.error("❌ Error executing script: %s", e)
             return {
                 "status": "error",
                 "error": str(e)
@@ -457,7 +489,7 @@ def test_scheduler_event(self):
             frappe.flags.modbus_context = None
 
     except Exception as e:
-        logger.error(f"❌ Error in test setup: {str(e)}")
+        logger.error("❌ Error in test setup: %s", e)
         return {
             "status": "error",
             "error": f"Test setup failed: {str(e)}"
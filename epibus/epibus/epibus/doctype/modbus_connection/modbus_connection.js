@@ -16,6 +16,28 @@ frappe.ui.form.on("Modbus Connection", {
                     });
                 });
             }, __('Actions'));
+
+            frm.add_custom_button(__('Refresh Values'), function () {
+                frm.call({
+                    method: 'refresh_values',
+                    doc: frm.doc,
+                    freeze: true,
+                    freeze_message: __('Reading Signals...'),
+                }).then(r => {
+                    if (r.message && !r.message.success) {
+                        frappe.show_alert({
+                            message: r.message.message || __('Some signals could not be read'),
+                            indicator: 'orange'
+                        });
+                    }
+                    frm.reload_doc();
+                });
+            }, __('Actions'));
+        }
+
+        // Ask the PLC Bridge to poll this connection's signals at the fast rate while the form is open
+        if (!frm.is_new()) {
+            subscribe_signals(frm);
         }
 
         // Update PLC addresses for all signals on load
@@ -41,6 +63,39 @@ frappe.ui.form.on('Modbus Signal', {
     }
 });
 
+const SUBSCRIPTION_TTL = 60;
+
+function subscribe_signals(frm) {
+    const renew = () => {
+        // Let the lease expire once the user has left the form
+        if (cur_frm !== frm || frm.doc.name !== frm.__subscribed_doc) {
+            clearInterval(frm.__subscription_timer);
+            frm.__subscription_timer = null;
+            return;
+        }
+        frappe.call({
+            method: 'epibus.epibus.utils.subscriptions.subscribe_signals',
+            type: 'POST',
+            args: {
+                signals: (frm.doc.signals || []).map(signal => signal.name),
+                lease_id: frm.__subscription_lease,
+                ttl: SUBSCRIPTION_TTL,
+                source: 'form'
+            },
+        }).then(r => {
+            if (r.message && r.message.success) {
+                frm.__subscription_lease = r.message.lease_id;
+            }
+        });
+    };
+
+    frm.__subscribed_doc = frm.doc.name;
+    renew();
+    if (!frm.__subscription_timer) {
+        frm.__subscription_timer = setInterval(renew, SUBSCRIPTION_TTL * 500);
+    }
+}
+
 function update_plc_address(frm, cdt, cdn) {
     const row = locals[cdt][cdn];
     if (row.signal_type && row.modbus_address !== undefined) {
@@ -1,18 +1,22 @@
 # Copyright (c) 2024, Applied Relevance and contributors
 # For license information, please see license.txt
 
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Optional
+
 import frappe
 from frappe.model.document import Document
 from pymodbus.client import ModbusTcpClient
 from pymodbus.framer import FramerType
 
-from epibus.epibus.utils.signal_handler import SignalHandler
-import asyncio
-from contextlib import contextmanager
-from typing import Optional
-import time
-
+from epibus.epibus.utils import address_index, live_values, plc_bridge_adapter
+from epibus.epibus.utils.action_profiler import spanned
 from epibus.epibus.utils.epinomy_logger import get_logger
+from epibus.epibus.utils.modbus_pool import lease_client
+from epibus.epibus.utils.signal_handler import SignalHandler, SignalRequest, register_count
+
 logger = get_logger(__name__)
 
 
@@ -23,9 +27,10 @@ class ModbusConnection(Document):
     from typing import TYPE_CHECKING
 
     if TYPE_CHECKING:
-        from epibus.epibus.doctype.modbus_signal.modbus_signal import ModbusSignal
         from frappe.types import DF
 
+        from epibus.epibus.doctype.modbus_signal.modbus_signal import ModbusSignal
+
         device_name: DF.Data
         device_type: DF.Literal["PLC", "Robot", "Simulator", "Other"]
         enabled: DF.Check
@@ -33,22 +38,62 @@ class ModbusConnection(Document):
         port: DF.Int
         signals: DF.Table[ModbusSignal]
         thumbnail: DF.AttachImage | None
+        unit_id: DF.Int
     # end: auto-generated types
 
-    _client: Optional[ModbusTcpClient] = None
+    _client: ModbusTcpClient | None = None
     _last_used: float = 0
     _connection_timeout: int = 30  # Seconds before connection is considered stale
 
     def validate(self):
         self.validate_connection_settings()
+        self.validate_signal_addresses()
 
     def validate_connection_settings(self):
         if not (1 <= self.port <= 65535):
             frappe.throw("Port must be between 1 and 65535")
 
+    def validate_signal_addresses(self):
+        """Warn about signals that share a Modbus address"""
+        from epibus.epibus.doctype.modbus_signal.modbus_signal import SIGNAL_TYPE_MAPPINGS
+
+        entries = [
+            {
+                "name": signal.signal_name,
+                "connection": self.name,
+                "function_code": SIGNAL_TYPE_MAPPINGS[signal.signal_type]["function_code"],
+                "modbus_address": signal.modbus_address,
+                "width": register_count(signal.signal_type, signal.data_type),
+            }
+            for signal in self.signals
+            if signal.signal_type in SIGNAL_TYPE_MAPPINGS
+        ]
+
+        for conflict in address_index.find_conflicts(entries):
+            frappe.msgprint(
+                f"Signals {', '.join(conflict['signals'])} share Modbus address "
+                f"{conflict['modbus_address']} (function code {conflict['function_code']})",
+                title="Duplicate Signal Address",
+                indicator="orange"
+            )
+
+    def lease_client(self):
+        """Lease a connected client from the process-wide Modbus connection pool
+
+        Use as a context manager; the client goes back to the pool afterwards and is
+        reused by later requests and jobs in this worker.
+
+        Returns:
+            ContextManager[ModbusTcpClient]: Lease yielding a connected client
+        """
+        return lease_client(self.host, self.port, self.unit_id or 1)
+
     def get_client(self):
         """Get a ModbusTcpClient instance, reusing existing connection if valid
 
+        Deprecated: the client lives on this document instance only. Use
+        lease_client() to share pooled connections across the worker.
+
         Returns:
             ModbusTcpClient: Connected client instance
 
@@ -66,7 +111,7 @@ class ModbusConnection(Document):
             if self._client:
                 try:
                     self._client.close()
-                except:
+                except Exception:
                     pass
                 self._client = None
 
@@ -107,7 +152,7 @@ class ModbusConnection(Document):
                 <thead>
                     <tr>
                         <th>Signal Name</th>
-                        <th>Type</th> 
+                        <th>Type</th>
                         <th>Address</th>
                         <th>Status</th>
                     </tr>
@@ -139,60 +184,146 @@ class ModbusConnection(Document):
 
     @frappe.whitelist()
     def test_connection(self):
-        """Test connection to device and read all signals"""
+        """Test connection to device and read all signals
+
+        In PLC Bridge I/O mode the bridge's connection health and signal snapshot
+        are used, so the test does not open a second client to the PLC.
+        """
         logger.info(
-            f"Testing connection to device {self.device_name} at {self.host}:{self.port}")
+            "Testing connection to device %s at %s:%s", self.device_name, self.host, self.port)
+
+        if plc_bridge_adapter.use_bridge_io():
+            return self._test_connection_via_bridge()
 
         try:
-            client = self.get_client()
-            handler = SignalHandler(client)
             results = []
-
-            # Collect results
-            for signal in self.signals:
-                try:
-                    value = handler.read(
-                        signal.signal_type, signal.modbus_address)
-
-                    if isinstance(value, bool):
-                        state = "HIGH" if value else "LOW"
-                        indicator_color = "green" if value else "gray"
+            with self.lease_client() as client:
+                handler = SignalHandler(client, self.unit_id)
+
+                # Collect results - one block read per run of adjacent addresses
+                values = handler.read_many(
+                    [SignalRequest.from_signal(signal) for signal in self.signals])
+                for signal, value in zip(self.signals, values, strict=True):
+                    if isinstance(value, Exception):
+                        results.append(self._signal_result(signal, error=value))
                     else:
-                        state = str(value)
-                        indicator_color = "blue"
-
-                    results.append({
-                        "signal_name": signal.signal_name,
-                        "type": signal.signal_type,
-                        "address": signal.modbus_address,
-                        "state": state,
-                        "status": "success",
-                        "indicator": indicator_color
-                    })
-                    logger.debug(
-                        f"Successfully read signal {signal.signal_name}: {state}")
-
-                except Exception as e:
-                    results.append({
-                        "signal_name": signal.signal_name,
-                        "type": signal.signal_type,
-                        "address": signal.modbus_address,
-                        "state": f"Error: {str(e)}",
-                        "status": "error",
-                        "indicator": "red"
-                    })
-                    logger.error(
-                        f"Error reading signal {signal.signal_name}: {str(e)}")
+                        results.append(self._signal_result(signal, value))
 
             logger.info("Connection test completed successfully")
             return f"Connection successful - {self._build_results_table(results)}"
 
         except Exception as e:
-            error_msg = f"Connection failed: {str(e)}"
+            error_msg = f"Connection failed: {e!s}"
+            logger.error(error_msg)
+            return frappe.msgprint(error_msg, title="Connection Failed", indicator='red')
+
+    def _test_connection_via_bridge(self):
+        """Test the connection using the PLC Bridge's view of the device"""
+        bridge_connections = plc_bridge_adapter.get_bridge_connections()
+        if bridge_connections is None:
+            error_msg = "Connection failed: PLC Bridge unavailable"
             logger.error(error_msg)
             return frappe.msgprint(error_msg, title="Connection Failed", indicator='red')
 
+        status = bridge_connections.get(self.name)
+        if not status or status.get("status") != "Connected":
+            error_msg = f"Connection failed: PLC Bridge is not connected to {self.host}:{self.port}"
+            logger.error(error_msg)
+            return frappe.msgprint(error_msg, title="Connection Failed", indicator='red')
+
+        results = []
+        for signal in self.signals:
+            try:
+                # Served from the bridge snapshot, or read directly if it is stale
+                results.append(self._signal_result(signal, signal.read_signal()))
+            except Exception as e:
+                results.append(self._signal_result(signal, error=e))
+
+        logger.info("Connection test via PLC Bridge completed successfully")
+        return f"Connection successful - {self._build_results_table(results)}"
+
+    def _signal_result(self, signal, value=None, error=None):
+        """Build a connection test result row for a signal"""
+        if error is not None:
+            logger.error(
+                "Error reading signal %s: %s", signal.signal_name, error)
+            return {
+                "signal_name": signal.signal_name,
+                "type": signal.signal_type,
+                "address": signal.modbus_address,
+                "state": f"Error: {error!s}",
+                "status": "error",
+                "indicator": "red"
+            }
+
+        if isinstance(value, bool):
+            state = "HIGH" if value else "LOW"
+            indicator_color = "green" if value else "gray"
+        else:
+            state = str(value)
+            indicator_color = "blue"
+
+        logger.debug(
+            "Successfully read signal %s: %s", signal.signal_name, state)
+        return {
+            "signal_name": signal.signal_name,
+            "type": signal.signal_type,
+            "address": signal.modbus_address,
+            "state": state,
+            "status": "success",
+            "indicator": indicator_color
+        }
+
+    def onload(self):
+        """Prefetch the live values of all signals with one Redis call"""
+        entries = live_values.get_values([s.name for s in self.signals if s.name])
+        for signal in self.signals:
+            signal._live_value = entries.get(signal.name) or {}
+
+    @frappe.whitelist(methods=['POST'])
+    def refresh_values(self):
+        """Read every signal now and update the live value cache
+
+        Returns:
+            dict: success flag, values keyed by signal name and errors keyed by signal name
+        """
+        values = {}
+        errors = {}
+
+        try:
+            if plc_bridge_adapter.use_bridge_io():
+                for signal in self.signals:
+                    try:
+                        values[signal.name] = signal.read_signal()
+                    except Exception as e:
+                        errors[signal.name] = str(e)
+            else:
+                with self.lease_client() as client:
+                    handler = SignalHandler(client, self.unit_id)
+                    results = handler.read_many(
+                        [SignalRequest.from_signal(signal) for signal in self.signals])
+                    for signal, value in zip(self.signals, results, strict=True):
+                        if isinstance(value, Exception):
+                            errors[signal.name] = str(value)
+                        else:
+                            values[signal.name] = value
+
+            # Both modes: the bridge's snapshot values go into the live value cache too
+            live_values.set_values(
+                {"signal": name, "value": value, "source": "read"}
+                for name, value in values.items()
+            )
+
+        except Exception as e:
+            logger.error("Error refreshing values for %s: %s", self.device_name, e)
+            return {"success": False, "message": str(e), "values": values, "errors": errors}
+
+        if errors:
+            logger.warning("Failed to refresh %s signal(s) on %s", len(errors), self.device_name)
+        return {"success": not errors, "values": values, "errors": errors}
+
     @frappe.whitelist(methods=['GET'])
+    @spanned("modbus_io", "device_name")
     def read_signal(self, signal):
         """Read value from a signal
 
@@ -203,12 +334,12 @@ class ModbusConnection(Document):
             bool|float: Current value of the signal
         """
         logger.debug(
-            f"Reading signal {signal.signal_name} from {self.device_name}")
+            "Reading signal %s from %s", signal.signal_name, self.device_name)
 
         try:
-            client = self.get_client()
-            handler = SignalHandler(client)
-            value = handler.read(signal.signal_type, signal.modbus_address)
+            with self.lease_client() as client:
+                handler = SignalHandler(client, self.unit_id)
+                value = handler.read(*SignalRequest.from_signal(signal))
 
             # No need to update the database for virtual fields
             # The value is returned directly and should not be persisted
@@ -217,10 +348,11 @@ class ModbusConnection(Document):
             return value
 
         except Exception as e:
-            logger.error(f"Error reading signal: {str(e)}")
+            logger.error("Error reading signal: %s", e)
             raise
 
     @frappe.whitelist(methods=['POST'])
+    @spanned("modbus_io", "device_name")
     def write_signal(self, signal, value):
         """Write value to a signal
 
@@ -229,17 +361,17 @@ class ModbusConnection(Document):
             value: bool|float value to write
         """
         logger.debug(
-            f"Writing value {value} to signal {signal.signal_name} on {self.device_name}")
+            "Writing value %s to signal %s on %s", value, signal.signal_name, self.device_name)
 
         try:
-            client = self.get_client()
-            handler = SignalHandler(client)
-            handler.write(signal.signal_type, signal.modbus_address, value)
+            with self.lease_client() as client:
+                handler = SignalHandler(client, self.unit_id)
+                request = SignalRequest.from_signal(signal)
+                handler.write_many([(request, value)])
 
-            # Read back value to verify write
-            current_value = handler.read(
-                signal.signal_type, signal.modbus_address)
+                # Read back value to verify write
+                handler.read(*request)
 
         except Exception as e:
-            logger.error(f"Error writing signal: {str(e)}")
+            logger.error("Error writing signal: %s", e)
             raise
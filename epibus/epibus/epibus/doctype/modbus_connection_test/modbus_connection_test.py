@@ -0,0 +1,29 @@
+# Copyright (c) 2026, Applied Relevance and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class ModbusConnectionTest(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		from epibus.epibus.doctype.modbus_connection_test_result.modbus_connection_test_result import (
+			ModbusConnectionTestResult,
+		)
+
+		connections_failed: DF.Int
+		connections_tested: DF.Int
+		duration: DF.Float
+		results: DF.Table[ModbusConnectionTestResult]
+		rounds: DF.Int
+		started_at: DF.Datetime
+		total_requests: DF.Int
+	# end: auto-generated types
+	pass
@@ -0,0 +1,28 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from epibus.epibus.utils.connection_test import percentile
+
+
+class TestModbusConnectionTest(FrappeTestCase):
+	def test_percentile(self):
+		values = [float(i) for i in range(100, 0, -1)]
+
+		self.assertEqual(percentile(values, 50), 50.0)
+		self.assertEqual(percentile(values, 95), 95.0)
+		self.assertEqual(percentile(values, 99), 99.0)
+		self.assertEqual(percentile(values, 100), 100.0)
+		self.assertEqual(percentile(values, 0), 1.0)
+
+	def test_percentile_nearest_rank(self):
+		# Nearest rank: the smallest value with at least pct% of values at or below it
+		self.assertEqual(percentile([0.3, 0.1, 0.2], 50), 0.2)
+		self.assertEqual(percentile([0.3, 0.1, 0.2], 34), 0.2)
+		self.assertEqual(percentile([0.3, 0.1, 0.2], 33), 0.1)
+		self.assertEqual(percentile([0.004, 0.002, 0.009, 0.001], 95), 0.009)
+		self.assertEqual(percentile([0.25], 95), 0.25)
+
+	def test_percentile_empty(self):
+		self.assertIsNone(percentile([], 50))
@@ -0,0 +1,32 @@
+# Copyright (c) 2026, Applied Relevance and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class ModbusConnectionTestResult(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		connection: DF.Link
+		error: DF.SmallText | None
+		failed_addresses: DF.SmallText | None
+		failed_signals: DF.Int
+		latency_min_ms: DF.Float
+		latency_p50_ms: DF.Float
+		latency_p99_ms: DF.Float
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+		requests: DF.Int
+		signals: DF.Int
+		status: DF.Literal["Success", "Partial", "Failed"]
+		throughput: DF.Float
+	# end: auto-generated types
+	pass
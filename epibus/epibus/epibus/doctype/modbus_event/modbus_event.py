@@ -1,9 +1,8 @@
 import frappe
-from frappe.utils import now
 from frappe.model.document import Document
+from epibus.epibus.utils import event_sink
 from epibus.epibus.utils.epinomy_logger import get_logger
 from epibus.epibus.doctype.modbus_action.modbus_action import ModbusAction
-from typing import cast
 import traceback
 
 logger = get_logger(__name__)
@@ -33,7 +32,10 @@ class ModbusEvent(Document):
     @staticmethod
     def log_event(event_type, device, status="Success", signal=None, action=None,
                   previous_value=None, new_value=None, error=None, message=None):
-        """Create a new Modbus Event log entry
+        """Record a Modbus Event
+
+        The event is buffered and written in bulk by the event sink, so this is
+        cheap enough to call from the request path.
 
         Args:
             event_type (str): Type of event (Read/Write/etc)
@@ -47,31 +49,21 @@ class ModbusEvent(Document):
             message (str, optional): Narrative description of the event
         """
         try:
-            event: ModbusEvent = cast(ModbusEvent, frappe.get_doc({
-                "doctype": "Modbus Event",
-                "event_type": event_type,
-                "status": status,
-                "device": device,
-                "signal": signal,
-                "action": action,
-                "previous_value": str(previous_value) if previous_value is not None else None,
-                "new_value": str(new_value) if new_value is not None else None,
-                "timestamp": now(),
-                "stack_trace": None,
-                "error_message": "",
-                "message": message
-            }))
-
-            if error:
-                event.error_message = str(error)
-                event.stack_trace = traceback.format_exc()
-
-            event.insert(ignore_permissions=True)
-            logger.debug(
-                f"Created Modbus Event: {event.name} - {event_type} on {device}")
+            event_sink.log_event(
+                event_type=event_type,
+                connection=device,
+                status=status,
+                signal=signal,
+                action=action,
+                previous_value=previous_value,
+                new_value=new_value,
+                message=message,
+                error_message=str(error) if error else "",
+                stack_trace=traceback.format_exc() if error else None,
+            )
 
         except Exception as e:
-            logger.error(f"Failed to create Modbus Event: {str(e)}")
+            logger.error("Failed to create Modbus Event: %s", e)
             # Don't raise - we don't want event logging to interrupt operations
 
     def validate(self):
@@ -97,3 +89,8 @@ class ModbusEvent(Document):
 
         if not hasattr(action_doc, 'execute_script'):
             frappe.throw("The action does not have an execute_script method")
+
+
+def on_doctype_update():
+    """Index used by retention purges and rollups, which scan by event type and age"""
+    frappe.db.add_index("Modbus Event", ["event_type", "creation"])
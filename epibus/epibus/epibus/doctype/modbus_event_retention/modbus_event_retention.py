@@ -0,0 +1,23 @@
+# Copyright (c) 2026, Applied Relevance and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class ModbusEventRetention(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		event_type: DF.Literal["Informational", "Read", "Write", "Signal Update", "Connection Test", "Action Execution", "Error"]
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+		retention_days: DF.Int
+	# end: auto-generated types
+	pass
@@ -0,0 +1,25 @@
+# Copyright (c) 2026, Applied Relevance and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class ModbusEventRollup(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		connection: DF.Link | None
+		event_count: DF.Int
+		event_type: DF.Data | None
+		failure_count: DF.Int
+		period: DF.Literal["Hourly", "Daily"]
+		period_start: DF.Datetime
+		signal: DF.Link | None
+	# end: auto-generated types
+	pass
@@ -11,9 +11,22 @@ class ModbusSettings(Document):
 	from typing import TYPE_CHECKING
 
 	if TYPE_CHECKING:
+		from epibus.epibus.doctype.modbus_event_retention.modbus_event_retention import ModbusEventRetention
 		from frappe.types import DF
 
+		archive_purged_events: DF.Check
+		bridge_max_staleness: DF.Float
+		default_event_retention_days: DF.Int
 		enable_triggers: DF.Check
+		event_purge_batch_size: DF.Int
+		event_retention_rules: DF.Table[ModbusEventRetention]
+		io_mode: DF.Literal["Direct", "PLC Bridge"]
+		plc_bridge_url: DF.Data | None
+		plc_status_cache_seconds: DF.Int
+		plc_status_probe_timeout: DF.Float
 		polling_interval: DF.Int
+		publish_per_signal_events: DF.Check
+		signal_history_retention_days: DF.Int
+		write_mode: DF.Literal["Verified", "Fast"]
 	# end: auto-generated types
 	pass
@@ -25,6 +25,23 @@ frappe.ui.form.on('Modbus Signal', {
                     }
                 });
             }, __('Actions'));
+
+            frm.add_custom_button(__('Stop Monitoring'), function () {
+                frappe.call({
+                    method: 'epibus.epibus.utils.signal_monitor.stop_monitoring',
+                    type: 'POST',
+                    args: {
+                        'signal_id': frm.doc.name
+                    },
+                }).then(r => {
+                    if (r.message && r.message.success) {
+                        frappe.show_alert({
+                            message: __('Stopped monitoring signal'),
+                            indicator: 'orange'
+                        });
+                    }
+                });
+            }, __('Actions'));
         }
     }
 });
@@ -1,25 +1,35 @@
 # Copyright (c) 2024, Applied Relevance and contributors
 # For license information, please see license.txt
 
+import time
+from functools import lru_cache
+from typing import Any, Literal, TypeGuard, cast, overload
+
 import frappe
-from frappe.model.document import Document
 from frappe import _
-from typing import cast, Union, Optional, overload, TypeVar, Any, TypeGuard, Literal
-from epibus.epibus.utils.epinomy_logger import get_logger
-from epibus.epibus.utils.signal_handler import SignalHandler
-from epibus.epibus.doctype.modbus_event.modbus_event import ModbusEvent
+from frappe.model.document import Document
+from frappe.utils import sbool
+
 from epibus.epibus.doctype.modbus_connection.modbus_connection import ModbusConnection
+from epibus.epibus.doctype.modbus_event.modbus_event import ModbusEvent
+from epibus.epibus.utils import live_values, plc_bridge_adapter, value_codec
+from epibus.epibus.utils.action_cache import get_cached_doc
+from epibus.epibus.utils.action_profiler import spanned
+from epibus.epibus.utils.epinomy_logger import get_logger, log_error
+from epibus.epibus.utils.signal_handler import SignalHandler, SignalRequest, register_count
 from epibus.epibus.utils.signal_monitor import publish_signal_update
 
 logger = get_logger(__name__)
 
-NumericValue = Union[float, int]
-SignalValue = Union[bool, NumericValue]
+NumericValue = float | int
+SignalValue = bool | NumericValue
 
-# Define Signal Types and their corresponding PLC address configurations
+# Define Signal Types and their corresponding PLC address configurations.
+# function_code is the Modbus read function code of the table the signal lives in.
 SIGNAL_TYPE_MAPPINGS = {
     "Digital Output Coil": {
         "prefix": "QX",
+        "function_code": 1,
         "modbus_range": (0, 999),
         "access": "RW",
         "bit_addressed": True,
@@ -28,6 +38,7 @@ SIGNAL_TYPE_MAPPINGS = {
     },
     "Digital Input Contact": {
         "prefix": "IX",
+        "function_code": 2,
         "modbus_range": (0, 999),
         "access": "R",
         "bit_addressed": True,
@@ -36,6 +47,7 @@ SIGNAL_TYPE_MAPPINGS = {
     },
     "Analog Input Register": {
         "prefix": "IW",
+        "function_code": 4,
         "modbus_range": (0, 1023),
         "access": "R",
         "bit_addressed": False,
@@ -43,6 +55,7 @@ SIGNAL_TYPE_MAPPINGS = {
     },
     "Analog Output Register": {
         "prefix": "QW",
+        "function_code": 3,
         "modbus_range": (0, 1023),
         "access": "RW",
         "bit_addressed": False,
@@ -50,6 +63,7 @@ SIGNAL_TYPE_MAPPINGS = {
     },
     "Holding Register": {
         "prefix": "MW",
+        "function_code": 3,
         "modbus_range": (0, 1023),
         "access": "RW",
         "bit_addressed": False,
@@ -58,6 +72,35 @@ SIGNAL_TYPE_MAPPINGS = {
 }
 
 
+@lru_cache(maxsize=8192)
+def plc_address_for(signal_type: str, modbus_address: int) -> str | None:
+    """Get the IEC 61131-3 PLC address (e.g. %QX1.3) of a Modbus address
+
+    Args:
+        signal_type: A key of SIGNAL_TYPE_MAPPINGS
+        modbus_address: Modbus address of the signal
+
+    Returns:
+        str: The PLC address, or None if it cannot be calculated
+    """
+    signal_config = SIGNAL_TYPE_MAPPINGS.get(signal_type)
+    if not signal_config or modbus_address is None:
+        return None
+
+    modbus_address = int(modbus_address)
+    if signal_config["bit_addressed"]:
+        # For bit-addressed signals (Digital I/O)
+        plc_major = signal_config["plc_major_start"] + (modbus_address // 8)
+        plc_minor = modbus_address % 8
+        if plc_minor > signal_config["plc_minor_max"]:
+            return None
+        return f"%{signal_config['prefix']}{plc_major}.{plc_minor}"
+
+    # For word-addressed signals (Analog and Holding Registers)
+    plc_major = signal_config["plc_major_start"] + modbus_address
+    return f"%{signal_config['prefix']}{plc_major}"
+
+
 def is_bool(value: SignalValue) -> TypeGuard[bool]:
     """Type guard to ensure a value is boolean"""
     return isinstance(value, bool)
@@ -101,23 +144,40 @@ def is_signal_writable(signal_id: str) -> bool:
         frappe.throw(_("Signal id cannot be empty"))
 
     signal = cast(ModbusSignal, frappe.get_doc("Modbus Signal", signal_id))
-    
+
     # Check if the signal type has write access
     signal_config = SIGNAL_TYPE_MAPPINGS.get(signal.signal_type, {})
     is_writable = signal_config.get("access", "") == "RW"
-    
-    logger.debug(f"Signal {signal.signal_name} ({signal.signal_type}) is writable: {is_writable}")
-    
+
+    logger.debug("Signal %s (%s) is writable: %s", signal.signal_name, signal.signal_type, is_writable)
+
     return is_writable
 
 
 @frappe.whitelist(methods=['POST'])
-def toggle_signal(signal_id: str, value: Optional[bool] = None) -> bool:
+def refresh_signal_value(signal_id: str) -> dict[str, Any] | None:
+    """Read a signal now and update its live value
+
+    Args:
+        signal_id (str): The name of the ModbusSignal document to read
+
+    Returns:
+        dict: The refreshed live value entry {value, ts, quality, source, age}
+    """
+    if not signal_id:
+        frappe.throw(_("Signal id cannot be empty"))
+
+    signal = cast(ModbusSignal, frappe.get_doc("Modbus Signal", signal_id))
+    return signal.refresh_value()
+
+
+@frappe.whitelist(methods=['POST'])
+def toggle_signal(signal_id: str, value: bool | None = None) -> bool:
     """Toggle a digital signal between True/False or set to specific value
 
     Args:
         signal_name (str): The name of the ModbusSignal document to toggle
-        value (Optional[bool]): If provided, set to this specific boolean value instead of toggling
+        value (bool | None): If provided, set to this specific boolean value instead of toggling
 
     Returns:
         bool: New value of the signal after toggle/set
@@ -149,14 +209,15 @@ def toggle_signal(signal_id: str, value: Optional[bool] = None) -> bool:
             current_value = read_bool_signal(signal)
             new_value = not current_value
 
-        # Write the new value and ensure boolean return
-        result = signal.write_signal(new_value)
+        # Write the new value and ensure boolean return. Toggles are interactive and
+        # frequent, so they skip the read-back; the next scan confirms the value.
+        result = signal.write_signal(new_value, verify=False)
         if not is_bool(result):
             frappe.throw(_("Invalid toggle result - expected boolean value"))
         return result
 
     except Exception as e:
-        logger.error(f"Error toggling signal {signal.signal_name}: {str(e)}")
+        logger.error("Error toggling signal %s: %s", signal.signal_name, e)
         raise
 
 
@@ -169,6 +230,8 @@ class ModbusSignal(Document):
     if TYPE_CHECKING:
         from frappe.types import DF
 
+        byte_order: DF.Literal["Big", "Little"]
+        data_type: DF.Literal["UINT16", "INT16", "UINT32", "INT32", "FLOAT32"]
         digital_value: DF.Check
         float_value: DF.Float
         modbus_address: DF.Int
@@ -176,9 +239,13 @@ class ModbusSignal(Document):
         parentfield: DF.Data
         parenttype: DF.Data
         plc_address: DF.Data | None
+        scale: DF.Float
         signal_name: DF.Data
         signal_type: DF.Literal["Digital Output Coil", "Digital Input Contact",
                                 "Analog Input Register", "Analog Output Register", "Holding Register"]
+        value_age: DF.Float
+        value_quality: DF.Data | None
+        word_order: DF.Literal["Big", "Little"]
     # end: auto-generated types
 
     def validate(self):
@@ -189,7 +256,7 @@ class ModbusSignal(Document):
             self.calculate_plc_address()
         except Exception as e:
             logger.error(
-                f"Validation error for ModbusSignal {self.name}: {str(e)}")
+                "Validation error for ModbusSignal %s: %s", self.name, e)
             raise
 
     def validate_signal_type(self):
@@ -202,8 +269,9 @@ class ModbusSignal(Document):
         """Validate Modbus address is within correct range for the signal type"""
         signal_config = SIGNAL_TYPE_MAPPINGS[self.signal_type]
         modbus_start, modbus_end = signal_config["modbus_range"]
+        last_address = self.modbus_address + register_count(self.signal_type, self.data_type) - 1
 
-        if not modbus_start <= self.modbus_address <= modbus_end:
+        if not (modbus_start <= self.modbus_address and last_address <= modbus_end):
             frappe.throw(
                 _(
                     "Modbus address {0} out of range ({1}-{2}) for signal type {3}"
@@ -215,22 +283,13 @@ class ModbusSignal(Document):
     @frappe.whitelist(methods=['POST'])
     def calculate_plc_address(self):
         """Calculate and set the PLC address based on signal type and Modbus address"""
-        signal_config = SIGNAL_TYPE_MAPPINGS[self.signal_type]
+        self.plc_address = plc_address_for(self.signal_type, self.modbus_address)
+        if not self.plc_address:
+            frappe.throw(_("Invalid bit address calculated"))
 
-        if signal_config["bit_addressed"]:
-            # For bit-addressed signals (Digital I/O)
-            plc_major = signal_config["plc_major_start"] + \
-                (self.modbus_address // 8)
-            plc_minor = self.modbus_address % 8
-
-            if plc_minor > signal_config["plc_minor_max"]:
-                frappe.throw(_("Invalid bit address calculated"))
-
-            self.plc_address = f"%{signal_config['prefix']}{plc_major}.{plc_minor}"
-        else:
-            # For word-addressed signals (Analog and Holding Registers)
-            plc_major = signal_config["plc_major_start"] + self.modbus_address
-            self.plc_address = f"%{signal_config['prefix']}{plc_major}"
+    def coerce_value(self, value: Any) -> SignalValue:
+        """Convert a raw value to the type SignalHandler returns for this signal type"""
+        return value_codec.coerce(self.signal_type, value)
 
     @overload
     def read_signal(self) -> bool:
@@ -243,9 +302,21 @@ class ModbusSignal(Document):
         ...
 
     @frappe.whitelist(methods=['GET'])
+    @spanned("modbus_io", "signal_name")
     def read_signal(self) -> SignalValue:
-        """Read the current value of the signal"""
-        logger.debug(f"Reading signal {self.signal_name}")
+        """Read the current value of the signal
+
+        In PLC Bridge I/O mode (Modbus Settings) the value comes from the bridge's
+        snapshot if it is within the staleness bound; otherwise the device is read directly.
+        """
+        logger.debug("Reading signal %s", self.signal_name)
+
+        if self.name and plc_bridge_adapter.use_bridge_io():
+            try:
+                value = plc_bridge_adapter.read_signal_via_bridge(str(self.name))
+                return self.coerce_value(value)
+            except plc_bridge_adapter.PLCBridgeError as e:
+                logger.debug("%s - reading %s directly", e, self.signal_name)
 
         try:
             device_doc = cast(
@@ -253,9 +324,12 @@ class ModbusSignal(Document):
                     "Modbus Connection", self.parent)
             )
 
-            with device_doc.get_client() as client:
-                handler = SignalHandler(client)
-                value = handler.read(self.signal_type, self.modbus_address)
+            with device_doc.lease_client() as client:
+                handler = SignalHandler(client, device_doc.unit_id)
+                value = handler.read(*SignalRequest.from_signal(self))
+
+                if self.name:
+                    live_values.set_value(str(self.name), value, source="read")
 
                 # Log successful read event
                 # ModbusEvent.log_event(
@@ -290,63 +364,94 @@ class ModbusSignal(Document):
         ...
 
     @frappe.whitelist(methods=['POST'])
-    def write_signal(self, value: SignalValue) -> SignalValue:
-        """Write a value to the signal"""
-        logger.debug(f"Writing value {value} to signal {self.signal_name}")
+    @spanned("modbus_io", "signal_name")
+    def write_signal(self, value: SignalValue, verify: bool | None = None) -> SignalValue:
+        """Write a value to the signal
 
-        try:
-            # Get current value for event log
-            try:
-                current_value = self.read_signal()
-            except Exception:
-                current_value = None
+        By default the value is read back after writing (Verified write mode). With
+        verify=False, or Fast write mode in Modbus Settings, this is a single Modbus
+        transaction: the previous value for the event log comes from the live value
+        cache, the value is not read back - the next scan confirms it - and the event
+        is buffered for a bulk insert.
 
-            device_doc = cast(
-                ModbusConnection, frappe.get_doc(
-                    "Modbus Connection", self.parent)
-            )
+        Args:
+            value: Value to write
+            verify: Read the value back after writing. Defaults to the configured write
+                mode, Verified unless set to Fast.
+
+        Returns:
+            The value read back, or the written value when not verifying
+        """
+        logger.debug("Writing value %s to signal %s", value, self.signal_name)
+
+        if verify is None:
+            verify = frappe.db.get_single_value("Modbus Settings", "write_mode", cache=True) != "Fast"
+        else:
+            verify = sbool(verify)
 
-            with device_doc.get_client() as client:
-                handler = SignalHandler(client)
-                handler.write(self.signal_type, self.modbus_address, value)
-
-                # Read back value
-                new_value = handler.read(self.signal_type, self.modbus_address)
-
-                # Convert and validate read-back value based on input and output types
-                if isinstance(value, bool):
-                    # If input was boolean, ensure output is boolean
-                    if isinstance(new_value, (int, float)):
-                        # Convert numeric 0/1 to boolean safely
-                        new_value = bool(new_value)
-                    elif not isinstance(new_value, bool):
-                        frappe.throw(
-                            _("Invalid return type from boolean write operation"))
-                elif isinstance(value, (int, float)):
-                    # If input was numeric, ensure output is numeric
-                    if isinstance(new_value, bool):
-                        frappe.throw(
-                            _("Expected numeric value from write operation, got boolean"))
-                    elif isinstance(new_value, (int, float)):
-                        # Ensure consistent numeric type
-                        new_value = float(new_value) if isinstance(
-                            value, float) else int(new_value)
-
-                # Log successful write event
-                ModbusEvent.log_event(
-                    event_type="Write",
-                    device=self.parent,
-                    signal=self.name,
-                    previous_value=current_value,
-                    new_value=new_value,
-                    message=f"Successfully wrote value {new_value} to signal {self.signal_name} (Address: {self.modbus_address}, Type: {self.signal_type})"
+        # Previous value for the event log, without a Modbus round trip
+        live = live_values.get_value(str(self.name)) if self.name else None
+        current_value = live["value"] if live else None
+
+        try:
+            if self.name and plc_bridge_adapter.use_bridge_io():
+                # The bridge queues the write behind its own scan, so the PLC only ever
+                # sees one client. No direct fallback: a timed-out write may still land.
+                new_value = plc_bridge_adapter.write_signal_via_bridge(str(self.name), value, verify=verify)
+            else:
+                device_doc = cast(ModbusConnection, get_cached_doc("Modbus Connection", self.parent))
+
+                with device_doc.lease_client() as client:
+                    handler = SignalHandler(client, device_doc.unit_id)
+                    request = SignalRequest.from_signal(self)
+                    handler.write_many([(request, value)])
+
+                    if verify:
+                        # Read back value
+                        new_value = handler.read(*request)
+                    else:
+                        new_value = value
+
+            # Convert and validate read-back value based on input and output types
+            if isinstance(value, bool):
+                # If input was boolean, ensure output is boolean
+                if isinstance(new_value, (int, float)):
+                    # Convert numeric 0/1 to boolean safely
+                    new_value = bool(new_value)
+                elif not isinstance(new_value, bool):
+                    frappe.throw(
+                        _("Invalid return type from boolean write operation"))
+            elif isinstance(value, (int, float)):
+                # If input was numeric, ensure output is numeric
+                if isinstance(new_value, bool):
+                    frappe.throw(
+                        _("Expected numeric value from write operation, got boolean"))
+                elif isinstance(new_value, (int, float)):
+                    # Ensure consistent numeric type
+                    new_value = float(new_value) if isinstance(
+                        value, float) else int(new_value)
+
+            if self.name:
+                live_values.set_value(
+                    str(self.name), new_value, source="write",
+                    quality=live_values.QUALITY_GOOD if verify else live_values.QUALITY_UNVERIFIED
                 )
 
-                # Publish immediate update
-                if self.name:
-                    publish_signal_update(str(self.name), new_value)
+            # Log successful write event
+            ModbusEvent.log_event(
+                event_type="Write",
+                device=self.parent,
+                signal=self.name,
+                previous_value=current_value,
+                new_value=new_value,
+                message=f"Successfully wrote value {new_value} to signal {self.signal_name} (Address: {self.modbus_address}, Type: {self.signal_type})"
+            )
+
+            # Publish immediate update
+            if self.name:
+                publish_signal_update(str(self.name), new_value)
 
-                return new_value
+            return new_value
 
         except Exception as e:
             # Log failed write event
@@ -362,11 +467,11 @@ class ModbusSignal(Document):
             raise
 
     @frappe.whitelist(methods=['POST'])
-    def toggle_signal(self, value: Optional[bool] = None) -> bool:
+    def toggle_signal(self, value: bool | None = None) -> bool:
         """Toggle a digital signal between True/False or set to specific value
 
         Args:
-            value (Optional[bool]): If provided, set to this specific boolean value instead of toggling
+            value (bool | None): If provided, set to this specific boolean value instead of toggling
 
         Returns:
             bool: New value of the signal after toggle/set
@@ -380,18 +485,47 @@ class ModbusSignal(Document):
     @frappe.whitelist(methods=['POST'])
     def toggle_location_pin(self) -> bool:
         """DEPRECATED: Use toggle_signal() instead"""
-        frappe.log_error(
-            "toggle_location_pin() is deprecated, use toggle_signal() instead",
+        log_error(
             "Deprecated Method Used",
+            message="toggle_location_pin() is deprecated, use toggle_signal() instead",
         )
         return self.toggle_signal()
 
-    def get_digital_value(self) -> bool:
-        """Virtual field getter for digital value"""
+    def get_live_value(self) -> dict[str, Any] | None:
+        """Get the signal's entry in the live value cache
+
+        Modbus Connection prefetches the entries of all its signals on load, so
+        rendering a connection costs one Redis call rather than one per signal.
+
+        Returns:
+            dict: {value, ts, quality, source, age}, or None if the signal has no live value
+        """
+        entry = getattr(self, "_live_value", None)
+        if entry is None:
+            entry = (live_values.get_value(str(self.name)) if self.name else None) or {}
+            self._live_value = entry
+        return live_values.with_age(entry) if entry else None
+
+    @frappe.whitelist(methods=['POST'])
+    def refresh_value(self) -> dict[str, Any] | None:
+        """Read the signal now, bypassing the live value cache
+
+        Returns:
+            dict: The refreshed live value entry
+        """
         value = self.read_signal()
-        if not isinstance(value, bool):
-            frappe.throw(_("Invalid signal state - expected boolean value"))
-        return value
+        self._live_value = {
+            "value": value, "ts": time.time(), "quality": live_values.QUALITY_GOOD, "source": "read"
+        }
+        return self.get_live_value()
+
+    # Frappe fills virtual fields from properties of the same name
+
+    @property
+    def digital_value(self) -> bool:
+        """Virtual field: digital value, from the live value cache"""
+        entry = self.get_live_value()
+        return bool(entry["value"]) if entry else False
 
     def set_digital_value(self, value: bool) -> None:
         """Virtual field setter for digital value"""
@@ -399,12 +533,28 @@ class ModbusSignal(Document):
             frappe.throw(_("Digital value must be boolean"))
         self.write_signal(value)
 
-    def get_float_value(self) -> float:
-        """Virtual field getter for float value"""
-        value = self.read_signal()
-        if not isinstance(value, (int, float)):
-            frappe.throw(_("Invalid signal state - expected numeric value"))
-        return float(value)
+    @property
+    def float_value(self) -> float:
+        """Virtual field: float value, from the live value cache"""
+        entry = self.get_live_value()
+        if not entry or isinstance(entry["value"], bool):
+            return 0.0
+        try:
+            return float(entry["value"])
+        except (TypeError, ValueError):
+            return 0.0
+
+    @property
+    def value_quality(self) -> str | None:
+        """Virtual field: the live value's quality"""
+        entry = self.get_live_value()
+        return entry["quality"] if entry else None
+
+    @property
+    def value_age(self) -> float | None:
+        """Virtual field: the live value's age in seconds"""
+        entry = self.get_live_value()
+        return round(entry["age"], 1) if entry else None
 
     def set_float_value(self, value: float) -> None:
         """Virtual field setter for float value"""
@@ -412,24 +562,9 @@ class ModbusSignal(Document):
             frappe.throw(_("Float value must be numeric"))
         self.write_signal(float(value))
 
-    def get_plc_address(self) -> Optional[str]:
+    def get_plc_address(self) -> str | None:
         """Virtual field getter for PLC address"""
         if not self.signal_type or self.modbus_address is None:
             return None
 
-        signal_config = SIGNAL_TYPE_MAPPINGS[self.signal_type]
-
-        if signal_config["bit_addressed"]:
-            # For bit-addressed signals (Digital I/O)
-            plc_major = signal_config["plc_major_start"] + \
-                (self.modbus_address // 8)
-            plc_minor = self.modbus_address % 8
-
-            if plc_minor > signal_config["plc_minor_max"]:
-                return None
-
-            return f"%{signal_config['prefix']}{plc_major}.{plc_minor}"
-        else:
-            # For word-addressed signals (Analog and Holding Registers)
-            plc_major = signal_config["plc_major_start"] + self.modbus_address
-            return f"%{signal_config['prefix']}{plc_major}"
+        return plc_address_for(self.signal_type, self.modbus_address)
@@ -0,0 +1,48 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from epibus.epibus.utils import live_values
+
+SIGNAL = "_Test Live Signal"
+
+
+class TestModbusSignal(FrappeTestCase):
+	def tearDown(self):
+		live_values.clear(SIGNAL)
+
+	def get_signal(self, signal_type):
+		doc = frappe.get_doc({"doctype": "Modbus Signal", "signal_name": SIGNAL, "signal_type": signal_type})
+		doc.name = SIGNAL
+		return doc
+
+	def test_live_value_fields(self):
+		live_values.set_value(SIGNAL, True, source="write", quality=live_values.QUALITY_UNVERIFIED)
+
+		doc = self.get_signal("Digital Output Coil")
+
+		self.assertEqual(doc.value_quality, live_values.QUALITY_UNVERIFIED)
+		self.assertIs(doc.digital_value, True)
+		self.assertEqual(doc.float_value, 0.0)
+		self.assertGreaterEqual(doc.value_age, 0)
+		# The form gets virtual fields through as_dict
+		values = doc.as_dict()
+		self.assertEqual(values.value_quality, live_values.QUALITY_UNVERIFIED)
+		self.assertEqual(values.digital_value, 1)
+
+	def test_analog_live_value(self):
+		live_values.set_value(SIGNAL, 12.5, source="read")
+
+		doc = self.get_signal("Holding Register")
+
+		self.assertEqual(doc.float_value, 12.5)
+		self.assertEqual(doc.value_quality, live_values.QUALITY_GOOD)
+
+	def test_no_live_value(self):
+		doc = self.get_signal("Holding Register")
+
+		self.assertIsNone(doc.value_quality)
+		self.assertIsNone(doc.value_age)
+		self.assertEqual(doc.float_value, 0.0)
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Applied Relevance and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Modbus Signal History", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,27 @@
+# Copyright (c) 2026, Applied Relevance and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ModbusSignalHistory(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		connection: DF.Link | None
+		name: DF.Int | None
+		signal: DF.Link
+		ts: DF.Datetime
+		value: DF.Float
+	# end: auto-generated types
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Modbus Signal History", ["signal", "ts"])
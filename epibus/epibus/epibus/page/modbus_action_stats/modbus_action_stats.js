@@ -0,0 +1,112 @@
+// epibus/epibus/page/modbus_action_stats/modbus_action_stats.js
+const ACTION_STATS_SPANS = ['context', 'script', 'modbus_io', 'event_log', 'other', 'total'];
+
+frappe.pages['modbus-action-stats'].on_page_load = function (wrapper) {
+    const page = frappe.ui.make_app_page({
+        parent: wrapper,
+        title: __('Modbus Action Latency'),
+        single_column: true
+    });
+
+    const minutes = page.add_field({
+        fieldname: 'minutes',
+        label: __('Period'),
+        fieldtype: 'Select',
+        options: [
+            { value: '5', label: __('Last 5 minutes') },
+            { value: '15', label: __('Last 15 minutes') },
+            { value: '60', label: __('Last hour') }
+        ],
+        default: '60',
+        change: () => refresh()
+    });
+
+    const action = page.add_field({
+        fieldname: 'action',
+        label: __('Modbus Action'),
+        fieldtype: 'Link',
+        options: 'Modbus Action',
+        change: () => refresh()
+    });
+
+    page.set_primary_action(__('Refresh'), () => refresh(), 'refresh');
+
+    const $body = $('<div class="modbus-action-stats"></div>').appendTo(page.main);
+
+    const ms = value => (value === null || value === undefined) ? '-' : `${Number(value).toFixed(1)}`;
+    const bound = value => (value === null || value === undefined) ? '&gt; 10000' : `&le; ${value}`;
+
+    function render(stats) {
+        const actions = Object.keys(stats.actions || {});
+        let html = `<p class="text-muted">${__('Timings in ms. Percentiles are histogram bucket bounds; spans exclude time spent in nested spans.')}</p>`;
+
+        if (!actions.length) {
+            html += `<p>${__('No action executions in this period.')}</p>`;
+        }
+
+        actions.forEach(name => {
+            const spans = stats.actions[name];
+            const total = spans.total || {};
+            html += `<h5 class="mt-4">${frappe.utils.escape_html(name)}
+                <small class="text-muted">${total.count || 0} ${__('executions')}, ${total.failed || 0} ${__('failed')}</small></h5>
+                <table class="table table-bordered table-sm">
+                <thead><tr><th>${__('Span')}</th><th>${__('Count')}</th><th>${__('Mean')}</th>
+                <th>p50</th><th>p95</th><th>p99</th></tr></thead><tbody>`;
+            ACTION_STATS_SPANS.filter(span => spans[span]).forEach(span => {
+                const s = spans[span];
+                html += `<tr${span === 'total' ? ' class="font-weight-bold"' : ''}><td>${span}</td><td>${s.count}</td>
+                    <td>${ms(s.mean_ms)}</td><td>${bound(s.p50_ms)}</td><td>${bound(s.p95_ms)}</td><td>${bound(s.p99_ms)}</td></tr>`;
+            });
+            html += '</tbody></table>';
+        });
+
+        const changes = Object.keys(stats.changes || {});
+        if (changes.length) {
+            html += `<h5 class="mt-4">${__('Signal Changes')}
+                <small class="text-muted">${__('From the PLC Bridge reading a change to its last action finishing')}</small></h5>
+                <table class="table table-bordered table-sm">
+                <thead><tr><th>${__('Signal')}</th><th>${__('Changes')}</th><th>${__('Actions')}</th><th>${__('Parallel')}</th>
+                <th>${__('Mean')}</th><th>p50</th><th>p95</th><th>p99</th></tr></thead><tbody>`;
+            changes.forEach(signal => {
+                const c = stats.changes[signal];
+                html += `<tr><td>${frappe.utils.escape_html(signal)}</td><td>${c.count}</td><td>${c.actions}</td><td>${c.parallel}</td>
+                    <td>${ms(c.mean_ms)}</td><td>${bound(c.p50_ms)}</td><td>${bound(c.p95_ms)}</td><td>${bound(c.p99_ms)}</td></tr>`;
+            });
+            html += '</tbody></table>';
+        }
+
+        html += `<h5 class="mt-4">${__('Slowest Executions')}</h5>
+            <table class="table table-bordered table-sm">
+            <thead><tr><th>${__('When')}</th><th>${__('Action')}</th><th>${__('Signal')}</th><th>${__('Total')}</th><th>${__('Span Stack')}</th></tr></thead><tbody>`;
+        (stats.slowest || []).forEach(execution => {
+            const stack = (execution.stack || []).map(([path, elapsed]) =>
+                `<div><code>${frappe.utils.escape_html(path)}</code> ${ms(elapsed)}</div>`).join('');
+            html += `<tr${execution.failed ? ' class="text-danger"' : ''}>
+                <td>${frappe.datetime.comment_when(frappe.datetime.convert_to_user_tz(new Date(execution.ts * 1000)))}</td>
+                <td>${frappe.utils.escape_html(execution.action)}</td>
+                <td>${frappe.utils.escape_html(execution.signal || '')}</td>
+                <td>${ms(execution.timings.total)}</td><td>${stack}</td></tr>`;
+        });
+        html += '</tbody></table>';
+
+        $body.html(html);
+    }
+
+    function refresh() {
+        frappe.call({
+            method: 'epibus.epibus.utils.action_profiler.get_action_stats',
+            args: {
+                minutes: minutes.get_value() || 60,
+                action: action.get_value() || null
+            }
+        }).then(r => {
+            if (r.message && r.message.success) {
+                render(r.message);
+            } else {
+                $body.html(`<p class="text-danger">${frappe.utils.escape_html((r.message && r.message.message) || __('Could not load action statistics'))}</p>`);
+            }
+        });
+    }
+
+    refresh();
+};
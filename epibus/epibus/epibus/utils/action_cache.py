@@ -0,0 +1,285 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Per-worker cache of Modbus Action execution context and compiled Server Scripts.
+
+Cached documents are validated against the ``modified`` timestamp published to
+Redis on save, so a trigger costs a few Redis lookups instead of four
+``frappe.get_doc`` calls and a script compile.
+
+The cached documents are shared by every trigger in the worker, so actions'
+Server Scripts get private copies of them (``get_action_context``): a script
+that changes its context can't change the next run's.
+
+DocType Event actions are found through a dispatch table keyed by (doctype, doc
+event method), built once per worker and rebuilt when any Modbus Action changes,
+so a document event no action listens to costs one dict lookup.
+"""
+
+from typing import Any, Optional
+
+import frappe
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+try:
+    from frappe.utils.safe_exec import (
+        SERVER_SCRIPT_FILE_PREFIX,
+        FrappeTransformer,
+        ServerScriptNotEnabled,
+        get_safe_globals,
+        is_safe_exec_enabled,
+        patched_qb,
+        safe_exec_flags,
+    )
+    from RestrictedPython import compile_restricted
+except ImportError:  # Older Frappe versions: fall back to ServerScript.execute_method
+    compile_restricted = None
+
+logger = get_logger(__name__)
+
+# Redis hash of "<doctype>::<name>" -> str(modified)
+MODIFIED_CACHE_KEY = "epibus:doc_modified"
+
+# Doctypes whose documents make up an action's execution context
+CONTEXT_DOCTYPES = ("Modbus Action", "Modbus Connection", "Server Script")
+
+# {(site, doctype, name): (modified, doc)}
+_doc_cache: dict[tuple[str, str, str], tuple[str, Any]] = {}
+
+# {(site, script name): (modified, code object)}
+_code_cache: dict[tuple[str, str], tuple[str, Any]] = {}
+
+# {(site, signal name): connection name}
+_signal_parents: dict[tuple[str, str], str] = {}
+
+# Redis key holding the version of the DocType Event dispatch table; changed on every
+# Modbus Action change so each worker rebuilds its table
+DISPATCH_VERSION_KEY = "epibus:doc_event_dispatch_version"
+
+# Modbus Action doctype_event -> document event method
+DOCTYPE_EVENT_METHODS = {
+    "Before Insert": "before_insert",
+    "After Insert": "after_insert",
+    "Before Save": "validate",
+    "After Save": "on_update",
+    "Before Submit": "before_submit",
+    "After Submit": "on_submit",
+    "Before Cancel": "before_cancel",
+    "After Cancel": "on_cancel",
+    "Before Delete": "on_trash",
+    "After Delete": "after_delete",
+    "Before Save (Submitted Document)": "before_update_after_submit",
+    "After Save (Submitted Document)": "on_update_after_submit",
+}
+
+# {site: (version, {(doctype, method): [action names]})}
+_dispatch_tables: dict[str, tuple[str, dict[tuple[str, str], list[str]]]] = {}
+
+
+def _cache_field(doctype: str, name: str) -> str:
+    return f"{doctype}::{name}"
+
+
+def _get_modified(doctype: str, name: str) -> str:
+    """Get the current ``modified`` timestamp of a document, as published in Redis"""
+    field = _cache_field(doctype, name)
+    modified = frappe.cache().hget(MODIFIED_CACHE_KEY, field)
+
+    if modified is None:
+        db_modified = frappe.db.get_value(doctype, name, "modified")
+        if db_modified is None:
+            raise frappe.DoesNotExistError(f"{doctype} {name} not found")
+        modified = str(db_modified)
+        frappe.cache().hset(MODIFIED_CACHE_KEY, field, modified)
+
+    return modified
+
+
+def get_cached_doc(doctype: str, name: str):
+    """Get a document from the per-worker cache, reloading it if it was modified
+
+    Args:
+        doctype: One of CONTEXT_DOCTYPES
+        name: Document name
+
+    Returns:
+        Document: The cached document instance
+    """
+    key = (frappe.local.site, doctype, name)
+    modified = _get_modified(doctype, name)
+
+    cached = _doc_cache.get(key)
+    if cached and cached[0] == modified:
+        return cached[1]
+
+    doc = frappe.get_doc(doctype, name)
+    _doc_cache[key] = (str(doc.modified), doc)
+    return doc
+
+
+def copy_doc(doc):
+    """A private copy of a cached document: its fields and child rows, nothing else
+
+    Built from the stored fields, so neither virtual fields (live values) nor
+    per-instance state such as an open Modbus client are copied.
+    """
+    values = doc.get_valid_dict(ignore_virtual=True)
+    values["doctype"] = doc.doctype
+    for df in doc.meta.get_table_fields():
+        values[df.fieldname] = [row.get_valid_dict(ignore_virtual=True) for row in doc.get(df.fieldname)]
+    return frappe.get_doc(values)
+
+
+def get_action_context(action_name: str, signal_name: str) -> tuple[Any, Any, Any]:
+    """Resolve the action, signal and connection documents for an action trigger
+
+    The signal is taken from the cached connection's ``signals`` table rather than
+    loaded on its own, so it is invalidated together with its connection. The
+    documents are copies of the cached ones, for the action's Server Script to use.
+
+    Returns:
+        tuple: (action_doc, signal_doc, connection_doc)
+    """
+    action_doc = get_cached_doc("Modbus Action", action_name)
+
+    parent_key = (frappe.local.site, signal_name)
+    connection_doc = signal_doc = None
+    if parent_key in _signal_parents:
+        connection_doc = get_cached_doc("Modbus Connection", _signal_parents[parent_key])
+        signal_doc = _find_signal(connection_doc, signal_name)
+
+    if signal_doc is None:
+        # Not seen yet, or the signal moved to another connection since we cached its parent
+        parent = frappe.db.get_value("Modbus Signal", signal_name, "parent")
+        if not parent:
+            raise frappe.DoesNotExistError(f"Modbus Signal {signal_name} not found")
+        _signal_parents[parent_key] = parent
+        connection_doc = get_cached_doc("Modbus Connection", parent)
+        signal_doc = _find_signal(connection_doc, signal_name)
+
+    connection_doc = copy_doc(connection_doc)
+    return copy_doc(action_doc), _find_signal(connection_doc, signal_name), connection_doc
+
+
+def _find_signal(connection_doc, signal_name: str):
+    for signal in connection_doc.signals:
+        if signal.name == signal_name:
+            return signal
+    return None
+
+
+def _get_code(script_doc):
+    """Get the compiled code object for a Server Script, compiling it at most once per version"""
+    key = (frappe.local.site, script_doc.name)
+    modified = str(script_doc.modified)
+
+    cached = _code_cache.get(key)
+    if cached and cached[0] == modified:
+        return cached[1]
+
+    filename = f"{SERVER_SCRIPT_FILE_PREFIX}: {frappe.scrub(script_doc.name)}"
+    code = compile_restricted(script_doc.script, filename=filename, policy=FrappeTransformer)
+    _code_cache[key] = (modified, code)
+    logger.debug("Compiled Server Script %s", script_doc.name)
+    return code
+
+
+def execute_server_script(script_doc):
+    """Execute an API Server Script using its cached compiled code
+
+    Mirrors ``ServerScript.execute_method``. Rate-limited scripts are delegated to
+    Frappe so the rate limiter keeps working.
+
+    Returns:
+        The script's ``frappe.flags``, as returned by ``ServerScript.execute_method``
+    """
+    if compile_restricted is None or script_doc.script_type != "API" or script_doc.enable_rate_limit:
+        return script_doc.execute_method()
+
+    if not is_safe_exec_enabled():
+        frappe.throw(
+            "Server Scripts are disabled. Please enable server scripts from bench configuration.",
+            ServerScriptNotEnabled,
+        )
+
+    if frappe.session.user == "Guest" and not script_doc.allow_guest:
+        raise frappe.PermissionError
+
+    exec_globals = get_safe_globals()
+    with safe_exec_flags(), patched_qb():
+        exec(_get_code(script_doc), exec_globals, None)
+
+    return exec_globals.frappe.flags
+
+
+def _dispatch_version() -> str:
+    # Cached in frappe.local for the rest of the request, so a bulk submit costs one Redis call
+    return frappe.cache().get_value(DISPATCH_VERSION_KEY, generator=lambda: frappe.generate_hash(length=10))
+
+
+def _build_dispatch_table() -> dict[tuple[str, str], list[str]]:
+    table: dict[tuple[str, str], list[str]] = {}
+    for action in frappe.get_all(
+        "Modbus Action",
+        filters={"enabled": 1, "script_type": "DocType Event", "reference_doctype": ["is", "set"]},
+        fields=["name", "reference_doctype", "doctype_event"],
+        order_by="name asc",
+    ):
+        method = DOCTYPE_EVENT_METHODS.get(action.doctype_event)
+        if method:
+            table.setdefault((action.reference_doctype, method), []).append(action.name)
+    return table
+
+
+def get_doc_event_actions(doctype: str, method: str) -> list[str]:
+    """Names of the enabled DocType Event actions for a document event
+
+    Args:
+        doctype: DocType of the document
+        method: Document event method (validate, on_update, on_submit, ...)
+    """
+    site = frappe.local.site
+    version = _dispatch_version()
+
+    cached = _dispatch_tables.get(site)
+    if cached is None or cached[0] != version:
+        cached = _dispatch_tables[site] = (version, _build_dispatch_table())
+        logger.debug("Built DocType Event dispatch table: %s (doctype, event) key(s)", len(cached[1]))
+
+    return cached[1].get((doctype, method), [])
+
+
+def invalidate_doc(doc, method=None):
+    """Document event hook: publish the new ``modified`` timestamp and drop local copies"""
+    try:
+        field = _cache_field(doc.doctype, doc.name)
+        if method == "on_trash":
+            frappe.cache().hdel(MODIFIED_CACHE_KEY, field)
+        else:
+            frappe.cache().hset(MODIFIED_CACHE_KEY, field, str(doc.modified))
+
+        site = frappe.local.site
+        _doc_cache.pop((site, doc.doctype, doc.name), None)
+        if doc.doctype == "Server Script":
+            _code_cache.pop((site, doc.name), None)
+        elif doc.doctype == "Modbus Action":
+            frappe.cache().set_value(DISPATCH_VERSION_KEY, frappe.generate_hash(length=10))
+            _dispatch_tables.pop(site, None)
+        elif doc.doctype == "Modbus Connection":
+            for key in [k for k, parent in _signal_parents.items() if k[0] == site and parent == doc.name]:
+                _signal_parents.pop(key, None)
+
+    except Exception as e:
+        logger.error("Error invalidating cached %s %s: %s", doc.doctype, doc.name, e)
+
+
+def clear_cache() -> None:
+    """Drop every cached document and code object for the current site"""
+    site = frappe.local.site
+    for cache in (_doc_cache, _code_cache, _signal_parents):
+        for key in [k for k in cache if k[0] == site]:
+            cache.pop(key, None)
+    _dispatch_tables.pop(site, None)
+    frappe.cache().delete_key(MODIFIED_CACHE_KEY)
+    frappe.cache().delete_value(DISPATCH_VERSION_KEY)
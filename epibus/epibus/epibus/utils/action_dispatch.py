@@ -0,0 +1,164 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Runs the Signal Change actions of one signal change.
+
+Each action's ``execution_mode`` says how it runs:
+
+- ``Inline``: in the request that reported the change, one after another
+- ``Independent``: on a background worker, concurrently with the change's other
+  independent actions, so a slow stock rollback doesn't hold up a notification
+- ``After Independent``: once all of the change's independent actions have
+  finished - a barrier for actions that must see their effects
+
+Independent actions are joined through a Redis hash per change counting the jobs
+still running; the job that finishes last runs the barrier actions and records the
+change's end-to-end latency (``action_profiler.record_change``). Without
+independent actions everything runs inline and the latency is recorded here.
+
+Every execution still passes the action's debounce/throttle gate.
+"""
+
+import json
+import time
+from typing import Any, Optional
+
+import frappe
+from frappe.utils import flt
+
+from epibus.epibus.utils.action_profiler import record_change
+from epibus.epibus.utils.action_throttle import RateLimit, gate
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+CHANGE_KEY = "epibus:signal_change"
+
+# Seconds a change's join state is kept if its jobs never finish
+CHANGE_TTL = 3600
+
+INLINE = "Inline"
+INDEPENDENT = "Independent"
+AFTER_INDEPENDENT = "After Independent"
+
+
+def _change_key(change_id: str) -> str:
+    return frappe.cache().make_key(f"{CHANGE_KEY}:{change_id}")
+
+
+def _run(action: str, limit: RateLimit | None, signal_name: str, value: Any,
+         condition: str | None = None) -> None:
+    """Execute one action through its rate limit gate. Never raises."""
+    from epibus.api.plc import execute_action
+
+    payload = {"kind": "signal", "signal": signal_name, "value": value, "condition": condition}
+    try:
+        with gate(action, limit, payload) as admitted:
+            if admitted:
+                execute_action(action, signal_name, value, condition)
+    except Exception as e:
+        logger.error("Error executing action %s for %s: %s", action, signal_name, e)
+
+
+def _limit_of(action: str) -> RateLimit | None:
+    from epibus.epibus.utils.action_cache import get_cached_doc
+    return RateLimit.from_action(get_cached_doc("Modbus Action", action))
+
+
+def dispatch(signal_name: str, value: Any, matched: list[tuple[Any, str]],
+             changed_at: float | None = None) -> str | None:
+    """Run the actions of a signal change whose conditions are met
+
+    Args:
+        signal_name: Modbus Signal name
+        value: The new value
+        matched: (action row, condition description) pairs, in execution order; rows
+            need name, execution_mode and the rate limit fields
+        changed_at: Epoch seconds the change was read (default: now)
+
+    Returns:
+        str: Id of the change's join state, if any action was sent to background workers
+    """
+    changed_at = flt(changed_at) or time.time()
+
+    by_mode: dict[str, list[tuple[Any, str]]] = {INLINE: [], INDEPENDENT: [], AFTER_INDEPENDENT: []}
+    for action, condition in matched:
+        by_mode.get(action.get("execution_mode") or INLINE, by_mode[INLINE]).append((action, condition))
+
+    independent = by_mode[INDEPENDENT]
+    change_id = None
+    if independent:
+        # Register the join before any job can finish
+        change_id = frappe.generate_hash(length=12)
+        cache = frappe.cache()
+        key = _change_key(change_id)
+        pipe = cache.pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            "signal": signal_name,
+            "value": json.dumps(value, default=str),
+            "changed_at": changed_at,
+            "remaining": len(independent),
+            "actions": len(matched),
+            "barrier": json.dumps([[a.name, c] for a, c in by_mode[AFTER_INDEPENDENT]]),
+        })
+        pipe.expire(key, CHANGE_TTL)
+        pipe.execute()
+
+        for action, condition in independent:
+            frappe.enqueue(
+                "epibus.epibus.utils.action_dispatch.run_independent",
+                queue="short",
+                change_id=change_id,
+                action=action.name,
+                signal_name=signal_name,
+                value=value,
+                condition=condition,
+            )
+        logger.debug("Change %s of %s: %s independent action(s) queued", change_id, signal_name, len(independent))
+
+    for action, condition in by_mode[INLINE]:
+        _run(action.name, RateLimit.from_action(action), signal_name, value, condition)
+
+    if not independent:
+        for action, condition in by_mode[AFTER_INDEPENDENT]:
+            _run(action.name, RateLimit.from_action(action), signal_name, value, condition)
+        record_change(signal_name, changed_at, len(matched))
+
+    return change_id
+
+
+def run_independent(change_id: str, action: str, signal_name: str, value: Any,
+                    condition: str | None = None) -> None:
+    """Background job: run one independent action, then join the change"""
+    try:
+        _run(action, _limit_of(action), signal_name, value, condition)
+    finally:
+        _join(change_id)
+
+
+def _join(change_id: str) -> None:
+    """Count a finished independent action; the last one runs the barrier actions"""
+    cache = frappe.cache()
+    key = _change_key(change_id)
+    remaining = cache.hincrby(key, "remaining", -1)
+    if remaining > 0:
+        return
+
+    # Raw hash (not RedisWrapper.hgetall, which unpickles)
+    pipe = cache.pipeline(transaction=False)
+    pipe.hgetall(key)
+    pipe.delete(key)
+    state = {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in (pipe.execute()[0] or {}).items()
+    }
+    if remaining < 0 or "signal" not in state:
+        logger.warning("Join state of change %s expired before its actions finished", change_id)
+        return
+
+    signal_name = state["signal"]
+    value = json.loads(state["value"])
+    for action, condition in json.loads(state["barrier"]):
+        _run(action, _limit_of(action), signal_name, value, condition)
+
+    record_change(signal_name, float(state["changed_at"]), int(state["actions"]), parallel=True)
@@ -0,0 +1,358 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Per-action execution profiling.
+
+An action execution is wrapped in ``profile_action``; inside it, ``span`` times its
+phases:
+
+- ``context``: loading the action, signal, connection and Server Script
+- ``script``: running the Server Script, excluding the spans below
+- ``modbus_io``: signal reads and writes made by the script
+- ``event_log``: buffering Modbus Events
+
+Spans nest, and each records its exclusive time, so the spans of an execution add
+up to its total (the remainder is reported as ``other``). ``span`` does nothing
+outside a profiled execution, so it is safe to use on shared code paths.
+
+Timings go into histograms in Redis, one hash per ``WINDOW`` seconds kept for
+``WINDOWS`` windows, so statistics cover a rolling period and old data expires on
+its own. The slowest executions of each window are kept with their span stacks.
+
+Signal changes get a histogram of their own (``record_change``): the time from the
+PLC Bridge reading a change to the last of its actions finishing, across the
+request and any background workers that ran them.
+"""
+
+import functools
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+STATS_KEY = "epibus:action_stats"
+SLOWEST_KEY = "epibus:action_slowest"
+CHANGE_STATS_KEY = "epibus:change_stats"
+
+# Seconds per histogram window, and windows kept
+WINDOW = 300
+WINDOWS = 12
+
+# Slowest executions kept per window
+SLOWEST_PER_WINDOW = 20
+
+# Histogram bucket upper bounds in milliseconds; slower timings go in the "inf" bucket
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+SPANS = ("context", "script", "modbus_io", "event_log", "other", "total")
+
+_PROFILE_ATTR = "epibus_action_profile"
+
+
+class ActionProfile:
+    """Span timings of one action execution"""
+
+    def __init__(self, action: str, signal: str | None = None):
+        self.action = action
+        self.signal = signal
+        self.started = time.perf_counter()
+        self.exclusive: dict[str, float] = {}
+        # Open spans: [name, detail, start, time spent in child spans]
+        self._stack: list[list] = []
+        # Closed spans as (path, elapsed ms), in the order they finished
+        self.stack_summary: list[tuple[str, float]] = []
+        self.failed = False
+
+    def enter(self, name: str, detail: str | None = None) -> None:
+        self._stack.append([name, detail, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        name, detail, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.exclusive[name] = self.exclusive.get(name, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][3] += elapsed
+
+        path = " > ".join(
+            f"{frame[0]}({frame[1]})" if frame[1] else frame[0]
+            for frame in [*self._stack, [name, detail]]
+        )
+        self.stack_summary.append((path, round(elapsed * 1000, 3)))
+
+    def timings_ms(self) -> dict[str, float]:
+        """Exclusive milliseconds per span, plus other and total"""
+        total = time.perf_counter() - self.started
+        timings = {name: seconds * 1000 for name, seconds in self.exclusive.items()}
+        timings["other"] = max(total * 1000 - sum(timings.values()), 0.0)
+        timings["total"] = total * 1000
+        return timings
+
+
+def current_profile() -> ActionProfile | None:
+    return getattr(frappe.local, _PROFILE_ATTR, None)
+
+
+@contextmanager
+def profile_action(action: str, signal: str | None = None):
+    """Profile an action execution; nested calls join the outer profile
+
+    Yields:
+        ActionProfile: The active profile
+    """
+    outer = current_profile()
+    if outer is not None:
+        yield outer
+        return
+
+    profile = ActionProfile(action, signal)
+    setattr(frappe.local, _PROFILE_ATTR, profile)
+    try:
+        yield profile
+    except Exception:
+        profile.failed = True
+        raise
+    finally:
+        setattr(frappe.local, _PROFILE_ATTR, None)
+        record(profile)
+
+
+@contextmanager
+def span(name: str, detail: str | None = None):
+    """Time a phase of the current action execution, if there is one"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+
+    profile.enter(name, detail)
+    try:
+        yield
+    finally:
+        profile.exit()
+
+
+def spanned(name: str, detail_attr: str | None = None):
+    """Method decorator: run the method inside ``span(name)``, labelled with an attribute of self"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with span(name, getattr(self, detail_attr, None) if detail_attr else None):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _bucket(ms: float) -> str:
+    for bound in BUCKETS_MS:
+        if ms <= bound:
+            return str(bound)
+    return "inf"
+
+
+def _window_start(ts: float) -> int:
+    return int(ts // WINDOW * WINDOW)
+
+
+def _add_timing(pipe, stats_key: str, prefix: str, ms: float) -> None:
+    pipe.hincrby(stats_key, f"{prefix}|{_bucket(ms)}", 1)
+    pipe.hincrby(stats_key, f"{prefix}|count", 1)
+    pipe.hincrbyfloat(stats_key, f"{prefix}|sum", ms)
+
+
+def record(profile: ActionProfile) -> None:
+    """Add an execution's timings to the current window. Never raises."""
+    try:
+        timings = profile.timings_ms()
+        now = time.time()
+        window = _window_start(now)
+        ttl = WINDOW * (WINDOWS + 1)
+
+        cache = frappe.cache()
+        stats_key = cache.make_key(f"{STATS_KEY}:{window}")
+        slowest_key = cache.make_key(f"{SLOWEST_KEY}:{window}")
+
+        pipe = cache.pipeline(transaction=False)
+        for name, ms in timings.items():
+            _add_timing(pipe, stats_key, f"{profile.action}|{name}", ms)
+        if profile.failed:
+            pipe.hincrby(stats_key, f"{profile.action}|total|failed", 1)
+        pipe.expire(stats_key, ttl)
+
+        execution = {
+            "action": profile.action,
+            "signal": profile.signal,
+            "ts": now,
+            "failed": profile.failed,
+            "timings": {name: round(ms, 3) for name, ms in timings.items()},
+            "stack": profile.stack_summary,
+            "id": frappe.generate_hash(length=8),
+        }
+        pipe.zadd(slowest_key, {json.dumps(execution, default=str): timings["total"]})
+        pipe.zremrangebyrank(slowest_key, 0, -(SLOWEST_PER_WINDOW + 1))
+        pipe.expire(slowest_key, ttl)
+        pipe.execute()
+
+    except Exception as e:
+        logger.warning("Could not record profile of action %s: %s", profile.action, e)
+
+
+def record_change(signal: str, changed_at: float, actions: int, parallel: bool = False) -> float:
+    """Record the end-to-end latency of a signal change whose actions have all finished
+
+    Args:
+        signal: Modbus Signal name
+        changed_at: Epoch seconds the change was read by the PLC Bridge
+        actions: Number of actions the change ran
+        parallel: Whether any of them ran on background workers
+
+    Returns:
+        float: The latency in milliseconds
+    """
+    ms = max(time.time() - changed_at, 0.0) * 1000
+    try:
+        cache = frappe.cache()
+        stats_key = cache.make_key(f"{CHANGE_STATS_KEY}:{_window_start(time.time())}")
+        pipe = cache.pipeline(transaction=False)
+        _add_timing(pipe, stats_key, f"{signal}|change", ms)
+        pipe.hincrby(stats_key, f"{signal}|change|actions", actions)
+        if parallel:
+            pipe.hincrby(stats_key, f"{signal}|change|parallel", 1)
+        pipe.expire(stats_key, WINDOW * (WINDOWS + 1))
+        pipe.execute()
+
+    except Exception as e:
+        logger.warning("Could not record change latency of %s: %s", signal, e)
+
+    logger.debug("Change of %s: %s action(s) done in %.1f ms", signal, actions, ms)
+    return ms
+
+
+def _merge_windows(results, name_filter: str | None = None) -> dict[tuple[str, str], dict[str, float]]:
+    """Sum "<name>|<span>|<key>" counters over windows"""
+    merged: dict[tuple[str, str], dict[str, float]] = {}
+    for raw in results:
+        for field, value in (raw or {}).items():
+            field = field.decode() if isinstance(field, bytes) else field
+            name, span_name, key = field.rsplit("|", 2)
+            if name_filter and name != name_filter:
+                continue
+            values = merged.setdefault((name, span_name), {})
+            values[key] = values.get(key, 0) + float(value)
+    return merged
+
+
+def _summarize(values: dict[str, float], extra: tuple[str, ...] = ()) -> dict[str, Any]:
+    n = int(values.get("count", 0))
+    buckets = {key: int(v) for key, v in values.items() if key not in ("count", "sum", *extra)}
+    stats = {
+        "count": n,
+        "mean_ms": values.get("sum", 0) / n if n else None,
+        "p50_ms": _percentile(buckets, n, 50),
+        "p95_ms": _percentile(buckets, n, 95),
+        "p99_ms": _percentile(buckets, n, 99),
+        "buckets": buckets,
+    }
+    for key in extra:
+        stats[key] = int(values.get(key, 0))
+    return stats
+
+
+def _percentile(buckets: dict[str, int], count: int, pct: float) -> float | None:
+    """Upper bound of the bucket holding the pct-th percentile
+
+    None if there are no timings, or if the percentile is beyond the last bound.
+    """
+    if not count:
+        return None
+    rank = math.ceil(count * pct / 100)
+    seen = 0
+    for bound in BUCKETS_MS:
+        seen += buckets.get(str(bound), 0)
+        if seen >= rank:
+            return float(bound)
+    return None
+
+
+def get_stats(action: str | None = None, minutes: int = 60, slowest: int = SLOWEST_PER_WINDOW) -> dict[str, Any]:
+    """Latency statistics per action and span over the last ``minutes``
+
+    Percentiles are the upper bounds of histogram buckets, in milliseconds.
+
+    Args:
+        action: Only this action
+        minutes: Period to cover, up to WINDOW * WINDOWS seconds
+        slowest: Number of slowest executions to return
+
+    Returns:
+        dict: actions (action -> span -> count, mean_ms, p50_ms, p95_ms, p99_ms,
+            buckets; total also has failed), changes (signal -> the same, plus
+            actions and parallel counts; only without an action filter), slowest
+            executions, and the period covered
+    """
+    count = min(max(math.ceil(cint(minutes) * 60 / WINDOW), 1), WINDOWS)
+    current = _window_start(time.time())
+    windows = [current - i * WINDOW for i in range(count)]
+
+    cache = frappe.cache()
+    pipe = cache.pipeline(transaction=False)
+    for window in windows:
+        pipe.hgetall(cache.make_key(f"{STATS_KEY}:{window}"))
+    for window in windows:
+        pipe.zrevrange(cache.make_key(f"{SLOWEST_KEY}:{window}"), 0, slowest - 1)
+    for window in windows:
+        pipe.hgetall(cache.make_key(f"{CHANGE_STATS_KEY}:{window}"))
+    results = pipe.execute()
+
+    actions: dict[str, dict[str, Any]] = {}
+    for (action_name, span_name), values in sorted(_merge_windows(results[:count], action).items()):
+        extra = ("failed",) if span_name == "total" else ()
+        actions.setdefault(action_name, {})[span_name] = _summarize(values, extra)
+
+    changes: dict[str, dict[str, Any]] = {}
+    if not action:
+        for (signal_name, _), values in sorted(_merge_windows(results[2 * count:]).items()):
+            changes[signal_name] = _summarize(values, ("actions", "parallel"))
+
+    executions = []
+    for members in results[count:2 * count]:
+        for member in members or []:
+            try:
+                execution = json.loads(member)
+            except (TypeError, ValueError):
+                continue
+            if not action or execution.get("action") == action:
+                executions.append(execution)
+    executions.sort(key=lambda e: e["timings"]["total"], reverse=True)
+
+    return {
+        "actions": actions,
+        "changes": changes,
+        "slowest": executions[:slowest],
+        "since": windows[-1],
+        "window": WINDOW,
+        "buckets_ms": list(BUCKETS_MS),
+    }
+
+
+@frappe.whitelist()
+def get_action_stats(action: str | None = None, minutes: int = 60) -> dict[str, Any]:
+    """Execution latency statistics of Modbus Actions - see get_stats"""
+    try:
+        if not frappe.has_permission("Modbus Action", "read"):
+            return {"success": False, "message": "Not permitted to read Modbus Actions"}
+
+        stats = get_stats(action, minutes)
+        stats["success"] = True
+        return stats
+
+    except Exception as e:
+        logger.error("Error getting action stats: %s", e)
+        return {"success": False, "message": str(e)}
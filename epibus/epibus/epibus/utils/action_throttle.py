@@ -0,0 +1,265 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Debounce, throttle and concurrency limits for Modbus Actions.
+
+A bouncing photo-eye or a PLC that rewrites a coil every cycle can trigger the
+same action many times a second. Each action can set:
+
+- ``rate_limit_mode``: Debounce (one execution per burst of triggers; a burst
+  ends after ``min_interval_ms`` without triggers) or Throttle (at most one
+  execution per ``min_interval_ms``)
+- ``rate_limit_edge``: Leading (run on the first trigger, drop the rest) or
+  Trailing (run once at the end, with the latest trigger's value)
+- ``max_in_flight``: most executions running at once, across all workers
+
+Triggers go through ``gate`` before the action's script is loaded. The state is
+kept in Redis, so the limits hold across web workers; an action without limits
+costs no Redis calls at all. Trailing executions are coalesced: each trigger
+replaces the pending payload and sets the action's due time in a sorted set
+(``DUE_KEY``). ``run_due`` - called every scan by the signal monitor process and
+on every scheduler tick - enqueues one job per action that has come due, which
+runs the latest payload. No worker sleeps waiting for a deadline.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, NamedTuple, Optional
+
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "epibus:throttle"
+
+# Sorted set of actions with a pending trailing run, scored by due time (epoch ms)
+DUE_KEY = "epibus:throttle:due"
+
+# Longest trailing interval - pending payloads must outlive it
+MAX_TRAILING_INTERVAL_MS = 60000
+
+# Milliseconds a trailing run is pushed back while the action has no free in-flight slot
+IN_FLIGHT_RETRY_MS = 100
+
+# Seconds after which a leaked in-flight count or an unrun payload is dropped
+STALE_AFTER = 300
+
+
+class RateLimit(NamedTuple):
+    mode: str
+    edge: str
+    interval_ms: int
+    max_in_flight: int
+
+    @property
+    def trailing(self) -> bool:
+        return self.mode != "None" and self.edge == "Trailing"
+
+    @classmethod
+    def from_action(cls, action) -> Optional["RateLimit"]:
+        """Limits of a Modbus Action (document or dict), or None if it has none"""
+        mode = action.get("rate_limit_mode") or "None"
+        interval_ms = cint(action.get("min_interval_ms"))
+        max_in_flight = cint(action.get("max_in_flight"))
+
+        if interval_ms <= 0:
+            mode = "None"
+        if mode == "None" and max_in_flight <= 0:
+            return None
+        return cls(mode, action.get("rate_limit_edge") or "Leading", interval_ms, max_in_flight)
+
+
+def _key(action: str, part: str) -> str:
+    return frappe.cache().make_key(f"{KEY_PREFIX}:{action}:{part}")
+
+
+def _acquire_slot(action: str, limit: RateLimit) -> bool:
+    if limit.max_in_flight <= 0:
+        return True
+
+    cache = frappe.cache()
+    key = _key(action, "in_flight")
+    pipe = cache.pipeline(transaction=False)
+    pipe.incr(key)
+    pipe.expire(key, STALE_AFTER)
+    count = pipe.execute()[0]
+    if count <= limit.max_in_flight:
+        return True
+
+    cache.decr(key)
+    return False
+
+
+def _release_slot(action: str, limit: RateLimit) -> None:
+    if limit.max_in_flight > 0:
+        frappe.cache().decr(_key(action, "in_flight"))
+
+
+def _leading_edge(action: str, limit: RateLimit) -> bool:
+    """Whether this trigger opens a new window (and should run)"""
+    if limit.mode == "None":
+        return True
+
+    cache = frappe.cache()
+    key = _key(action, "window")
+    if limit.mode == "Throttle":
+        # Fixed window from the execution that opened it
+        return bool(cache.set(key, 1, px=limit.interval_ms, nx=True))
+
+    # Debounce: every trigger extends the quiet period
+    pipe = cache.pipeline(transaction=False)
+    pipe.set(key, 1, px=limit.interval_ms, nx=True)
+    pipe.pexpire(key, limit.interval_ms)
+    return bool(pipe.execute()[0])
+
+
+def _due_key() -> str:
+    return frappe.cache().make_key(DUE_KEY)
+
+
+def _defer(action: str, limit: RateLimit, payload: dict[str, Any]) -> None:
+    """Store the latest payload and make sure a trailing run is due for it"""
+    cache = frappe.cache()
+    due_ms = int(time.time() * 1000) + limit.interval_ms
+
+    pipe = cache.pipeline(transaction=False)
+    pipe.set(_key(action, "pending"), json.dumps(payload, default=str), ex=STALE_AFTER)
+    if limit.mode == "Debounce":
+        # Each trigger pushes the deadline back
+        pipe.zadd(_due_key(), {action: due_ms})
+    else:
+        # The first deferred trigger of an interval sets its end
+        pipe.zadd(_due_key(), {action: due_ms}, nx=True)
+    pipe.execute()
+
+
+@contextmanager
+def gate(action: str, limit: RateLimit | None, payload: dict[str, Any]):
+    """Decide whether a trigger of an action runs now
+
+    Yields True if the caller should execute the action; its in-flight slot is
+    released on exit. Yields False if the trigger was dropped, or deferred to a
+    trailing execution. Fails open: if Redis can't be reached, the trigger runs.
+
+    Args:
+        action: Modbus Action name
+        limit: The action's limits (``RateLimit.from_action``); None runs every trigger
+        payload: What a trailing execution needs to run this trigger (see ``run_payload``)
+    """
+    if limit is None:
+        yield True
+        return
+
+    try:
+        if limit.trailing:
+            _defer(action, limit, payload)
+            admitted = False
+        else:
+            admitted = _acquire_slot(action, limit)
+            if admitted and not _leading_edge(action, limit):
+                _release_slot(action, limit)
+                admitted = False
+    except Exception as e:
+        logger.warning("Rate limit check failed for action %s, running it: %s", action, e)
+        yield True
+        return
+
+    if not admitted:
+        logger.debug("Trigger of action %s %s", action, 'deferred' if limit.trailing else 'dropped')
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        try:
+            _release_slot(action, limit)
+        except Exception as e:
+            logger.warning("Could not release in-flight slot of action %s: %s", action, e)
+
+
+def run_payload(action: str, payload: dict[str, Any]) -> Any:
+    """Execute an action for a stored trigger
+
+    Payloads are ``{"kind": "signal", "signal", "value", "condition"}`` for Signal
+    Change triggers and ``{"kind": "doc", "doctype", "name"}`` for DocType Events.
+    """
+    if payload.get("kind") == "signal":
+        from epibus.api.plc import execute_action
+        return execute_action(action, payload["signal"], payload["value"], payload.get("condition"))
+
+    if payload.get("kind") == "doc":
+        if not frappe.db.exists(payload["doctype"], payload["name"]):
+            logger.info("Skipping trailing run of %s: %s %s is gone", action, payload['doctype'], payload['name'])
+            return None
+        from epibus.epibus.utils.action_cache import get_cached_doc
+        doc = frappe.get_doc(payload["doctype"], payload["name"])
+        return get_cached_doc("Modbus Action", action).execute_script(doc)
+
+    logger.error("Unknown trigger payload for action %s: %s", action, payload)
+    return None
+
+
+def run_due() -> int:
+    """Enqueue the trailing runs that have come due
+
+    Called every scan by the signal monitor process and on every scheduler tick.
+    Each due action is claimed by removing it from the sorted set, so concurrent
+    callers never enqueue the same run twice.
+
+    Returns:
+        int: Number of runs enqueued
+    """
+    cache = frappe.cache()
+    key = _due_key()
+    due = cache.zrangebyscore(key, "-inf", int(time.time() * 1000))
+    if not due:
+        return 0
+
+    enqueued = 0
+    for action in due:
+        if not cache.zrem(key, action):
+            continue
+        frappe.enqueue(
+            "epibus.epibus.utils.action_throttle.run_trailing",
+            queue="short",
+            action=action.decode() if isinstance(action, bytes) else action,
+        )
+        enqueued += 1
+    return enqueued
+
+
+def run_trailing(action: str) -> None:
+    """Background job: run the latest deferred trigger of an action that came due"""
+    from epibus.epibus.utils.action_cache import get_cached_doc
+
+    cache = frappe.cache()
+    if not frappe.db.exists("Modbus Action", action):
+        cache.delete(_key(action, "pending"))
+        return
+    limit = RateLimit.from_action(get_cached_doc("Modbus Action", action))
+
+    pipe = cache.pipeline(transaction=False)
+    pipe.get(_key(action, "pending"))
+    pipe.delete(_key(action, "pending"))
+    raw = pipe.execute()[0]
+    if not raw:
+        return
+
+    if limit is not None and not _acquire_slot(action, limit):
+        # Try again shortly rather than hold this worker; a newer trigger's payload wins
+        pipe = cache.pipeline(transaction=False)
+        pipe.set(_key(action, "pending"), raw, ex=STALE_AFTER, nx=True)
+        pipe.zadd(_due_key(), {action: int(time.time() * 1000) + IN_FLIGHT_RETRY_MS}, nx=True)
+        pipe.execute()
+        return
+
+    try:
+        run_payload(action, json.loads(raw))
+    finally:
+        if limit is not None:
+            _release_slot(action, limit)
@@ -0,0 +1,222 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Precomputed address index of all Modbus Signals.
+
+Built once from ``SIGNAL_TYPE_MAPPINGS`` and kept in Redis until a Modbus Connection
+is saved or deleted, the index answers in O(1):
+
+- PLC address (``%QX1.3``) -> signal, per connection
+- (connection, function code, Modbus address) -> signal
+- which signals share an address within a connection (conflicts)
+
+It also produces the PLC Bridge's read plan: each connection's signals grouped
+into contiguous block reads per function code.
+
+Server Scripts can use it through ``frappe.call("epibus.epibus.utils.address_index.lookup_signal", ...)``.
+"""
+
+from collections.abc import Iterable
+from typing import Any, Optional
+
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+from epibus.epibus.utils.signal_handler import BIT_FUNCTION_CODES, plan_blocks, register_count
+
+logger = get_logger(__name__)
+
+INDEX_CACHE_KEY = "epibus:address_index"
+
+
+def build_index() -> dict[str, Any]:
+    """Build the address index from the database
+
+    Returns:
+        dict: signals (name -> entry), by_plc_address ((connection, plc address) -> name),
+            by_modbus ((connection, function code, address) -> name) and conflicts
+    """
+    from epibus.epibus.doctype.modbus_signal.modbus_signal import SIGNAL_TYPE_MAPPINGS, plc_address_for
+
+    rows = frappe.get_all(
+        "Modbus Signal",
+        filters={"parenttype": "Modbus Connection"},
+        fields=["name", "parent", "signal_name", "signal_type", "modbus_address", "data_type"],
+        order_by="parent asc, idx asc",
+    )
+
+    signals = {}
+    by_plc_address = {}
+    by_modbus = {}
+    for row in rows:
+        config = SIGNAL_TYPE_MAPPINGS.get(row.signal_type)
+        if not config:
+            continue
+
+        entry = {
+            "name": row.name,
+            "signal_name": row.signal_name,
+            "connection": row.parent,
+            "signal_type": row.signal_type,
+            "function_code": config["function_code"],
+            "modbus_address": cint(row.modbus_address),
+            "width": register_count(row.signal_type, row.data_type),
+            "plc_address": plc_address_for(row.signal_type, cint(row.modbus_address)),
+        }
+        signals[row.name] = entry
+        # First signal wins; the others are reported as conflicts
+        by_plc_address.setdefault((entry["connection"], entry["plc_address"]), row.name)
+        by_modbus.setdefault((entry["connection"], entry["function_code"], entry["modbus_address"]), row.name)
+
+    return {
+        "signals": signals,
+        "by_plc_address": by_plc_address,
+        "by_modbus": by_modbus,
+        "conflicts": find_conflicts(signals.values()),
+    }
+
+
+def find_conflicts(entries: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Find signals whose addresses overlap within a connection
+
+    Holding Registers and Analog Output Registers live in the same table (function
+    code 3), so those overlap too, as do 32-bit values spanning a neighbour's register.
+
+    Args:
+        entries: Dicts with name, connection, function_code, modbus_address and
+            optionally width (registers occupied, default 1)
+
+    Returns:
+        list: One dict per overlapping group: connection, function_code,
+            modbus_address (first address of the group) and signals
+    """
+    tables: dict[tuple, list[tuple]] = {}
+    for entry in entries:
+        tables.setdefault((entry["connection"], entry["function_code"]), []).append(
+            (cint(entry["modbus_address"]), cint(entry.get("width")) or 1, entry["name"]))
+
+    conflicts = []
+    for (connection, function_code), items in tables.items():
+        group, group_start, group_end = [], None, None
+        for address, width, name in [*sorted(items), (None, 0, None)]:
+            if address is not None and group_end is not None and address < group_end:
+                group.append(name)
+                group_end = max(group_end, address + width)
+                continue
+            if len(group) > 1:
+                conflicts.append({"connection": connection, "function_code": function_code,
+                                  "modbus_address": group_start, "signals": group})
+            if address is not None:
+                group, group_start, group_end = [name], address, address + width
+
+    return conflicts
+
+
+def get_index() -> dict[str, Any]:
+    """Get the address index, building it if it is not cached"""
+    return frappe.cache().get_value(INDEX_CACHE_KEY, generator=build_index)
+
+
+def invalidate(doc=None, method=None):
+    """Document event hook: drop the index after a Modbus Connection changes"""
+    frappe.cache().delete_value(INDEX_CACHE_KEY)
+
+
+def get_signal_entry(signal: str) -> dict[str, Any] | None:
+    """Get a signal's index entry (connection, function code, addresses)"""
+    return get_index()["signals"].get(signal)
+
+
+def find_by_plc_address(plc_address: str, connection: str | None = None) -> str | None:
+    """Look a signal up by PLC address
+
+    Args:
+        plc_address: IEC 61131-3 address, e.g. %QX1.3
+        connection: Modbus Connection to search. Required when several connections
+            use the same PLC address.
+
+    Returns:
+        str: Signal name, or None if no (unambiguous) signal matches
+    """
+    index = get_index()
+    plc_address = plc_address.strip().upper()
+
+    if connection:
+        return index["by_plc_address"].get((connection, plc_address))
+
+    matches = [name for (_, address), name in index["by_plc_address"].items() if address == plc_address]
+    return matches[0] if len(matches) == 1 else None
+
+
+def find_by_modbus_address(connection: str, function_code: int, modbus_address: int) -> str | None:
+    """Look a signal up by connection, Modbus read function code and address
+
+    Returns:
+        str: Signal name, or None if no signal matches
+    """
+    return get_index()["by_modbus"].get((connection, cint(function_code), cint(modbus_address)))
+
+
+def get_conflicts(connection: str | None = None) -> list[dict[str, Any]]:
+    """Get shared addresses, optionally for one connection only"""
+    conflicts = get_index()["conflicts"]
+    if connection:
+        conflicts = [c for c in conflicts if c["connection"] == connection]
+    return conflicts
+
+
+def get_read_plan(connections: Iterable[str] | None = None) -> list[dict[str, Any]]:
+    """Group signals into contiguous block reads
+
+    Signals are sorted by address per (connection, function code) and merged into
+    blocks, reading through small gaps, up to the largest request Modbus allows
+    (see signal_handler.plan_blocks).
+
+    Args:
+        connections: Connections to plan for. Defaults to all.
+
+    Returns:
+        list: Blocks of {connection, function_code, start, count, signals: [[offset, name], ...]}
+    """
+    wanted = set(connections) if connections is not None else None
+
+    tables: dict[tuple, list[tuple]] = {}
+    for entry in get_index()["signals"].values():
+        if wanted is None or entry["connection"] in wanted:
+            tables.setdefault((entry["connection"], entry["function_code"]), []).append(
+                (entry["modbus_address"], entry["width"], entry["name"]))
+
+    blocks = []
+    for (connection, function_code), items in sorted(tables.items()):
+        for start, count, members in plan_blocks(items, function_code in BIT_FUNCTION_CODES):
+            blocks.append({"connection": connection, "function_code": function_code, "start": start,
+                           "count": count, "signals": [[offset, name] for offset, name in members]})
+
+    return blocks
+
+
+@frappe.whitelist()
+def lookup_signal(plc_address: str | None = None, connection: str | None = None,
+                  function_code: int | None = None, modbus_address: int | None = None) -> dict[str, Any]:
+    """Look a signal up by PLC address, or by connection, function code and Modbus address
+
+    Returns:
+        dict: success flag and the signal's index entry
+    """
+    try:
+        if plc_address:
+            name = find_by_plc_address(plc_address, connection)
+        elif connection and function_code is not None and modbus_address is not None:
+            name = find_by_modbus_address(connection, function_code, modbus_address)
+        else:
+            return {"success": False, "message": "Pass plc_address, or connection, function_code and modbus_address"}
+
+        if not name:
+            return {"success": False, "message": "No matching signal"}
+
+        return {"success": True, "data": get_signal_entry(name)}
+
+    except Exception as e:
+        logger.error("Error looking up signal: %s", e)
+        return {"success": False, "message": str(e)}
@@ -0,0 +1,237 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Timed connection test of every enabled Modbus Connection at once.
+
+Each connection is tested in its own thread with its own client, so one slow or
+unreachable device doesn't hold up the others. A connection's signals are read
+``rounds`` times with block reads, and every Modbus request is timed. Each run is
+stored as a Modbus Connection Test so it can be compared with earlier runs, e.g.
+before and after a network change.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import frappe
+from frappe.utils import cint, now_datetime
+from pymodbus.client import ModbusTcpClient
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+from epibus.epibus.utils.signal_handler import READ_METHODS, SignalHandler, SignalRequest
+
+logger = get_logger(__name__)
+
+DEFAULT_ROUNDS = 3
+MAX_ROUNDS = 100
+
+# Seconds to wait for each Modbus response
+REQUEST_TIMEOUT = 2.0
+
+# Connections tested at the same time
+MAX_WORKERS = 16
+
+
+class _TimedClient:
+    """Client wrapper that records the latency of every read request"""
+
+    def __init__(self, client: ModbusTcpClient):
+        self._client = client
+        self.latencies: list[float] = []
+        for method in set(READ_METHODS.values()):
+            setattr(self, method, self._timed(getattr(client, method)))
+
+    def _timed(self, read_fn):
+        def timed_read(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return read_fn(*args, **kwargs)
+            finally:
+                self.latencies.append(time.perf_counter() - started)
+        return timed_read
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of values, or None if there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _test_device(host: str, port: int, unit: int, signals: list[tuple], rounds: int) -> dict[str, Any]:
+    """Read a device's signals ``rounds`` times and time each request
+
+    Runs in a worker thread, so it only uses plain values and never touches frappe.
+
+    Args:
+        signals: (label, SignalRequest) pairs
+
+    Returns:
+        dict: latencies (seconds), elapsed, reads, failed labels and error
+    """
+    result = {"latencies": [], "elapsed": 0.0, "reads": 0, "failed": [], "error": None}
+    client = ModbusTcpClient(host=host, port=port, timeout=REQUEST_TIMEOUT, retries=0)
+    timed = _TimedClient(client)
+    failed = {}
+    started = time.perf_counter()
+
+    try:
+        if not client.connect():
+            raise ConnectionError(f"Failed to connect to {host}:{port}")
+
+        handler = SignalHandler(timed, unit)
+        requests = [request for _, request in signals]
+        for _ in range(rounds):
+            for (label, _), value in zip(signals, handler.read_many(requests), strict=True):
+                if isinstance(value, Exception):
+                    failed.setdefault(label, str(value))
+                else:
+                    result["reads"] += 1
+
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["elapsed"] = time.perf_counter() - started
+        client.close()
+
+    result["latencies"] = timed.latencies
+    result["failed"] = list(failed)
+    return result
+
+
+def _result_row(connection: str, signal_count: int, outcome: dict[str, Any]) -> dict[str, Any]:
+    latencies_ms = [latency * 1000 for latency in outcome["latencies"]]
+    failed = outcome["failed"]
+
+    unreachable = outcome["error"] and not outcome["reads"]
+    failed_count = signal_count if unreachable else len(failed)
+    if unreachable or (signal_count and failed_count == signal_count):
+        status = "Failed"
+    elif failed_count or outcome["error"]:
+        status = "Partial"
+    else:
+        status = "Success"
+
+    return {
+        "connection": connection,
+        "status": status,
+        "signals": signal_count,
+        "failed_signals": failed_count,
+        "requests": len(latencies_ms),
+        "latency_min_ms": min(latencies_ms) if latencies_ms else None,
+        "latency_p50_ms": percentile(latencies_ms, 50),
+        "latency_p99_ms": percentile(latencies_ms, 99),
+        "throughput": outcome["reads"] / outcome["elapsed"] if outcome["elapsed"] else 0,
+        "failed_addresses": "\n".join(failed) or None,
+        "error": outcome["error"],
+    }
+
+
+def compare_runs(current, previous) -> dict[str, dict[str, Any]]:
+    """Per-connection change in p50, p99 and throughput between two test runs"""
+    if previous is None:
+        return {}
+
+    before = {row.connection: row for row in previous.results}
+    comparison = {}
+    for row in current.results:
+        old = before.get(row.connection)
+        if old is None:
+            continue
+        comparison[row.connection] = {
+            "status": [old.status, row.status],
+            "latency_p50_ms": row.latency_p50_ms - old.latency_p50_ms
+                if row.latency_p50_ms and old.latency_p50_ms else None,
+            "latency_p99_ms": row.latency_p99_ms - old.latency_p99_ms
+                if row.latency_p99_ms and old.latency_p99_ms else None,
+            "throughput": (row.throughput or 0) - (old.throughput or 0),
+        }
+    return comparison
+
+
+def run_connection_test(rounds: int = DEFAULT_ROUNDS) -> dict[str, Any]:
+    """Test all enabled Modbus Connections concurrently and store the results
+
+    Args:
+        rounds: Times each connection's signals are read
+
+    Returns:
+        dict: success flag, the stored test's name, per-connection results and the
+            comparison with the previous run
+    """
+    rounds = min(max(cint(rounds), 1), MAX_ROUNDS)
+    connections = frappe.get_all("Modbus Connection", filters={"enabled": 1}, pluck="name")
+
+    # Gather plain values up front - worker threads don't use frappe
+    devices = []
+    for name in connections:
+        doc = frappe.get_doc("Modbus Connection", name)
+        signals = [
+            (f"{s.signal_name} ({s.signal_type} {s.modbus_address})", SignalRequest.from_signal(s))
+            for s in doc.signals
+        ]
+        devices.append((name, doc.host, cint(doc.port) or 502, cint(doc.unit_id) or 1, signals))
+
+    previous_name = frappe.db.get_value("Modbus Connection Test", {}, "name", order_by="started_at desc")
+    started_at = now_datetime()
+    started = time.perf_counter()
+
+    outcomes = {}
+    if devices:
+        with ThreadPoolExecutor(max_workers=min(len(devices), MAX_WORKERS)) as executor:
+            futures = {
+                name: executor.submit(_test_device, host, port, unit, signals, rounds)
+                for name, host, port, unit, signals in devices
+            }
+            outcomes = {name: future.result() for name, future in futures.items()}
+
+    test = frappe.get_doc({
+        "doctype": "Modbus Connection Test",
+        "started_at": started_at,
+        "duration": time.perf_counter() - started,
+        "rounds": rounds,
+    })
+    for name, _, _, _, signals in devices:
+        test.append("results", _result_row(name, len(signals), outcomes[name]))
+
+    test.connections_tested = len(test.results)
+    test.connections_failed = sum(1 for row in test.results if row.status == "Failed")
+    test.total_requests = sum(row.requests for row in test.results)
+    test.insert(ignore_permissions=True)
+
+    previous = frappe.get_doc("Modbus Connection Test", previous_name) if previous_name else None
+
+    logger.info(
+        f"Connection test {test.name}: {test.connections_tested} connection(s), "
+        f"{test.connections_failed} failed, {test.total_requests} requests in {test.duration:.2f}s"
+    )
+    return {
+        "success": True,
+        "name": test.name,
+        "duration": test.duration,
+        "connections_tested": test.connections_tested,
+        "connections_failed": test.connections_failed,
+        "results": [row.as_dict(no_default_fields=True) for row in test.results],
+        "previous": previous_name,
+        "comparison": compare_runs(test, previous),
+    }
+
+
+@frappe.whitelist(methods=["POST"])
+def test_all_connections(rounds: int = DEFAULT_ROUNDS) -> dict[str, Any]:
+    """Test every enabled Modbus Connection concurrently - see run_connection_test"""
+    try:
+        if not frappe.has_permission("Modbus Connection", "read"):
+            return {"success": False, "message": "Not permitted to test Modbus Connections"}
+
+        return run_connection_test(rounds)
+
+    except Exception as e:
+        logger.error("Error testing connections: %s", e)
+        return {"success": False, "message": str(e)}
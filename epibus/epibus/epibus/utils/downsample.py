@@ -0,0 +1,59 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Downsampling of (time, value) series for charting."""
+
+from collections.abc import Sequence
+
+Point = tuple[float, float]
+
+
+def lttb(points: Sequence[Point], threshold: int) -> list[Point]:
+    """Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last point and, for every bucket in between, the point that
+    forms the largest triangle with the previously kept point and the average of
+    the next bucket. Preserves the visual shape (peaks and dips) of the series.
+
+    Args:
+        points: Points sorted by time
+        threshold: Number of points to return
+
+    Returns:
+        list: Downsampled points, in time order
+    """
+    length = len(points)
+    if threshold >= length or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (length - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, length)
+        next_count = next_end - next_start
+        avg_x = sum(p[0] for p in points[next_start:next_end]) / next_count
+        avg_y = sum(p[1] for p in points[next_start:next_end]) / next_count
+
+        # Point in the current bucket with the largest triangle area
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
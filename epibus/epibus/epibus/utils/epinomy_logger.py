@@ -1,10 +1,125 @@
 # Copyright (c) 2024, Applied Relevance, LLC and contributors
 # For license information, please see license.txt
 
+"""
+Logging for the EpiBus app.
+
+Loggers never write from the calling thread: records go onto an in-memory queue,
+and a listener thread formats and writes them. Messages use %-style arguments
+(``logger.debug("Read %s = %s", signal, value)``), so a disabled level costs one
+level check and an enabled one is formatted on the listener thread.
+
+``exception`` (and ``log_error``) create an Error Log, but repeats of the same
+error within ``ERROR_LOG_WINDOW`` seconds are only counted; the count is shown in
+the Error Log's title ("... x500 in the last minute"). A PLC outage therefore
+produces one Error Log per failing call site a minute, not one per failure.
+"""
+
+import atexit
+import hashlib
 import logging
+import os
+import queue
+import sys
+import threading
+import time
 import frappe
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Records waiting to be written; beyond this, records are dropped and counted
+QUEUE_SIZE = 10000
+
+# Seconds flush() waits for the queue to drain
+FLUSH_TIMEOUT = 2.0
+
+# Redis hash per error fingerprint: count and Error Log name
+ERROR_LOG_KEY = "epibus:error_log"
+
+# Seconds over which repeats of an error are folded into one Error Log
+ERROR_LOG_WINDOW = 60
+
+# Repeat counts at which the Error Log title is updated
+ERROR_LOG_MILESTONES = (10, 100, 1000, 10000, 100000)
+
+# Length of Error Log titles
+ERROR_LOG_TITLE_LENGTH = 140
+
+
+class _AsyncQueueHandler(QueueHandler):
+    """Queue records as they are, and drop (and count) them if the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue is in-process, so the listener can format the record itself
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                self.queue.put_nowait(logging.LogRecord(
+                    record.name, logging.WARNING, __file__, 0,
+                    "Log queue full: dropped %s record(s)", (dropped,), None))
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[_AsyncQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_handler_lock = threading.Lock()
+
+
+def _start_listener() -> None:
+    """Give the shared handler a fresh queue and a listener thread writing it to stderr"""
+    global _listener
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    _handler.queue = queue.Queue(QUEUE_SIZE)
+    _listener = QueueListener(_handler.queue, stream)
+    _listener.start()
+
+
+def _get_handler() -> _AsyncQueueHandler:
+    """The queue handler shared by all EpinomyLoggers in this process"""
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                _handler = _AsyncQueueHandler(queue.Queue(QUEUE_SIZE))
+                _start_listener()
+                atexit.register(_stop_listener)
+                # A forked worker doesn't inherit the listener thread
+                if hasattr(os, "register_at_fork"):
+                    os.register_at_fork(after_in_child=_start_listener)
+    return _handler
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+
+
+def flush(**kwargs) -> None:
+    """Wait briefly for queued records to be written
+
+    Used as an ``after_job`` hook: job processes may exit without running atexit.
+    """
+    if _handler is None:
+        return
+    deadline = time.monotonic() + FLUSH_TIMEOUT
+    while _handler.queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.005)
+
 
 class EpinomyLogger(logging.Logger):
     """
@@ -25,26 +140,21 @@ class EpinomyLogger(logging.Logger):
         for handler in self.handlers[:]:
             self.removeHandler(handler)
 
-        # Add a StreamHandler with a custom formatter
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        self.addHandler(handler)
+        # Write through the shared queue handler
+        self.addHandler(_get_handler())
 
     def exception(self, msg: str, *args, exc_info: bool = True, **kwargs) -> None:
         """
-        Log an exception with a custom message and additional Frappe logging.
+        Log an exception, and record it in an Error Log (see log_error).
         """
         super().exception(msg, *args, exc_info=exc_info, **kwargs)
 
-        error_message = f"{self.name} {msg}"
-        print(error_message)  # Consider removing this in production
-
-        # Truncate the error message for Frappe's log_error function
-        truncated_message = error_message[:140]
-        frappe.log_error(truncated_message)
+        exc = sys.exc_info()[1]
+        try:
+            title = f"{self.name} {msg % args if args else msg}"
+        except (TypeError, ValueError):
+            title = f"{self.name} {msg}"
+        log_error(title, fingerprint=_fingerprint(self.name, msg, exc))
 
     @classmethod
     def get_logger(cls, module_name: str) -> 'EpinomyLogger':
@@ -74,6 +184,88 @@ def get_logger(module_name: str) -> EpinomyLogger:
     return EpinomyLogger.get_logger(module_name)
 
 
+def _fingerprint(source: str, template: str, exc: Optional[BaseException] = None) -> str:
+    """Identity of an error: where it was logged, the unformatted message, and the
+    exception's type and the line that raised it"""
+    parts = [source, template]
+    if exc is not None:
+        parts.append(type(exc).__name__)
+        tb = exc.__traceback__
+        while tb is not None and tb.tb_next is not None:
+            tb = tb.tb_next
+        if tb is not None:
+            parts.append(f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def log_error(title: str, message: Optional[str] = None, fingerprint: Optional[str] = None,
+              reference_doctype: Optional[str] = None, reference_name: Optional[str] = None) -> Optional[str]:
+    """
+    Create an Error Log, folding repeats of the same error into it.
+
+    The first occurrence of an error in ERROR_LOG_WINDOW seconds creates the Error
+    Log; repeats in the window only increment a counter in Redis, and the title is
+    updated with the count at ERROR_LOG_MILESTONES repeats. Never raises.
+
+    Args:
+        title: Error Log title
+        message: Details; defaults to the current traceback
+        fingerprint: Identity of the error; defaults to the title
+        reference_doctype: Document the error is about
+        reference_name: Document the error is about
+
+    Returns:
+        Optional[str]: Name of the Error Log this occurrence was counted in
+    """
+    if not getattr(frappe.local, "site", None):
+        return None
+
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(f"{ERROR_LOG_KEY}:{fingerprint or _fingerprint('', title)}")
+        pipe = cache.pipeline(transaction=False)
+        pipe.hincrby(key, "count", 1)
+        pipe.hget(key, "name")
+        pipe.ttl(key)
+        count, name, ttl = pipe.execute()
+
+        if ttl < 0:
+            # Start the window before anything can fail, so a counter never outlives it
+            # (EXPIRE NX would need Redis 7)
+            cache.expire(key, ERROR_LOG_WINDOW)
+
+        if count == 1:
+            try:
+                error_log = frappe.log_error(
+                    title=title[:ERROR_LOG_TITLE_LENGTH],
+                    message=message,
+                    reference_doctype=reference_doctype,
+                    reference_name=reference_name,
+                )
+            except Exception:
+                # Let the next occurrence try again
+                cache.delete(key)
+                return None
+            name = error_log.name if error_log else None
+            if name:
+                # Raw HSET: RedisWrapper's pickles the value and re-prefixes the key
+                cache.pipeline(transaction=False).hset(key, "name", name).execute()
+            return name
+
+        name = name.decode() if isinstance(name, bytes) else name
+        if name and count in ERROR_LOG_MILESTONES:
+            suffix = f" ×{count} in the last minute"
+            frappe.db.set_value(
+                "Error Log", name, "method",
+                title[:ERROR_LOG_TITLE_LENGTH - len(suffix)] + suffix,
+                update_modified=False,
+            )
+        return name
+
+    except Exception:
+        return None
+
+
 def add_timeline_entry(document, message: str) -> Optional[str]:
     """
     Adds a simplified comment to the specified document's timeline.
@@ -99,11 +291,11 @@ def add_timeline_entry(document, message: str) -> Optional[str]:
     except frappe.DoesNotExistError:
         logger = get_logger(__name__)
         logger.error(
-            f"Document {document.doctype} with name {document.name} does not exist.")
+            "Document %s with name %s does not exist.", document.doctype, document.name)
         return None
     except Exception as e:
         logger = get_logger(__name__)
-        logger.error(f"An error occurred while adding a timeline entry: {e}")
+        logger.error("An error occurred while adding a timeline entry: %s", e)
         return None
 
 
@@ -140,5 +332,5 @@ def add_timeline_entry_detailed(
         return comment.name
     except Exception as e:
         logger = get_logger(__name__)
-        logger.error(f"Error adding detailed timeline entry: {str(e)}")
+        logger.error("Error adding detailed timeline entry: %s", e)
         return None
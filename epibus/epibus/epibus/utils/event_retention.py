@@ -0,0 +1,365 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Retention for Modbus Events and Signal History: rollups, bounded purges and archiving.
+
+Events are rolled up into Modbus Event Rollup before they become eligible for
+purging, so counts per signal and event type survive after the rows are gone.
+
+Rollups are per hour of ``creation`` - when the event happened - but events can be
+written long after that (the PLC Bridge holds them while Frappe is unreachable or
+shedding load). Each run therefore also counts rows by insert time (``modified``):
+rows inserted since the previous run that belong to hours already rolled up are
+added to those rollups, and rows inserted after the last run are never purged.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import frappe
+from frappe.utils import add_days, get_datetime, getdate, now_datetime
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+ROLLUP_DOCTYPE = "Modbus Event Rollup"
+HOURLY_WATERMARK_KEY = "epibus_event_rollup_hourly_watermark"
+DAILY_WATERMARK_KEY = "epibus_event_rollup_daily_watermark"
+# Insert time (``modified``) up to which every event is counted in a rollup
+INSERTED_WATERMARK_KEY = "epibus_event_rollup_inserted_watermark"
+
+# Events may be written a little after they happen (buffered writers, slow requests),
+# so an hour is only rolled up once it ended at least this long ago.
+ROLLUP_LAG = timedelta(minutes=5)
+
+# Bound the work done by a single scheduler run
+MAX_HOURS_PER_RUN = 168
+MAX_PURGE_BATCHES_PER_TYPE = 200
+
+# Hourly rollups are kept this long; daily rollups are kept forever
+HOURLY_ROLLUP_RETENTION_DAYS = 90
+
+ARCHIVE_FOLDER = "modbus_event_archive"
+
+ROLLUP_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by",
+    "period", "period_start", "connection", "signal", "event_type",
+    "event_count", "failure_count",
+]
+
+
+def rollup_events():
+    """Scheduler entry point: roll up completed hours, then completed days"""
+    try:
+        rollup_hours()
+        rollup_days()
+    except Exception as e:
+        logger.error("Error rolling up Modbus Events: %s", e)
+        frappe.log_error(frappe.get_traceback(), "Modbus Event Rollup Error")
+
+
+def rollup_hours() -> int:
+    """Aggregate Modbus Events into Hourly rollups, one committed hour at a time
+
+    Returns:
+        int: Number of hours rolled up
+    """
+    # Rows inserted before this are counted by this run; later ones by the next
+    inserted_until = now_datetime() - ROLLUP_LAG
+    end_of_work = inserted_until.replace(minute=0, second=0, microsecond=0)
+    start = _get_watermark(HOURLY_WATERMARK_KEY)
+    hours = 0
+
+    inserted_from = _get_watermark(INSERTED_WATERMARK_KEY)
+    if start and inserted_from:
+        _rollup_late_events(start, inserted_from, inserted_until)
+    _set_watermark(INSERTED_WATERMARK_KEY, inserted_until)
+    frappe.db.commit()
+
+    while hours < MAX_HOURS_PER_RUN:
+        if start is None or not _has_events_between(start, start + timedelta(hours=1)):
+            # Skip straight to the next hour that has events
+            next_event = frappe.db.sql(
+                "select min(creation) from `tabModbus Event` where creation >= %s",
+                (start or datetime.min,)
+            )[0][0]
+            if not next_event:
+                start = end_of_work
+                break
+            start = get_datetime(next_event).replace(minute=0, second=0, microsecond=0)
+
+        if start >= end_of_work:
+            break
+
+        end = start + timedelta(hours=1)
+        rows = frappe.db.sql("""
+            select connection, `signal`, event_type,
+                count(*) as event_count,
+                sum(case when status = 'Failed' then 1 else 0 end) as failure_count
+            from `tabModbus Event`
+            where creation >= %s and creation < %s and modified < %s
+            group by connection, `signal`, event_type
+        """, (start, end, inserted_until), as_dict=True)
+
+        _replace_rollups("Hourly", start, rows)
+        _set_watermark(HOURLY_WATERMARK_KEY, end)
+        frappe.db.commit()
+
+        start = end
+        hours += 1
+
+    if start and start <= end_of_work:
+        _set_watermark(HOURLY_WATERMARK_KEY, start)
+        frappe.db.commit()
+
+    if hours:
+        logger.info("Rolled up %s hour(s) of Modbus Events", hours)
+    return hours
+
+
+def rollup_days() -> int:
+    """Aggregate Hourly rollups into Daily rollups for every fully rolled-up day
+
+    Returns:
+        int: Number of days rolled up
+    """
+    hourly_watermark = _get_watermark(HOURLY_WATERMARK_KEY)
+    if not hourly_watermark:
+        return 0
+
+    day = _get_watermark(DAILY_WATERMARK_KEY)
+    if day is None:
+        first = frappe.db.sql(
+            "select min(period_start) from `tabModbus Event Rollup` where period = 'Hourly'"
+        )[0][0]
+        if not first:
+            return 0
+        day = get_datetime(getdate(first))
+
+    days = 0
+    while day + timedelta(days=1) <= hourly_watermark:
+        end = day + timedelta(days=1)
+        rows = frappe.db.sql("""
+            select connection, `signal`, event_type,
+                sum(event_count) as event_count,
+                sum(failure_count) as failure_count
+            from `tabModbus Event Rollup`
+            where period = 'Hourly' and period_start >= %s and period_start < %s
+            group by connection, `signal`, event_type
+        """, (day, end), as_dict=True)
+
+        _replace_rollups("Daily", day, rows)
+        _set_watermark(DAILY_WATERMARK_KEY, end)
+        frappe.db.commit()
+
+        day = end
+        days += 1
+
+    return days
+
+
+def purge_expired_events():
+    """Scheduler entry point: purge events past their retention, in bounded batches
+
+    Retention is configured per event type in Modbus Settings. Events that have not
+    been rolled up yet are never purged. Purged rows are archived first when
+    Archive Purged Events is enabled.
+    """
+    try:
+        settings = frappe.get_single("Modbus Settings")
+        rules = {rule.event_type: rule.retention_days for rule in settings.event_retention_rules}
+        batch_size = settings.event_purge_batch_size or 5000
+        rolled_up_until = _get_watermark(HOURLY_WATERMARK_KEY)
+        counted_until = _get_watermark(INSERTED_WATERMARK_KEY)
+
+        if not rolled_up_until or not counted_until:
+            logger.info("Skipping Modbus Event purge - nothing has been rolled up yet")
+            return
+
+        event_types = frappe.get_meta("Modbus Event").get_field("event_type").options.split("\n")
+        for event_type in event_types:
+            days = rules.get(event_type, settings.default_event_retention_days)
+            if not days:
+                continue
+
+            cutoff = min(add_days(now_datetime(), -days), rolled_up_until)
+            purged = _purge_event_type(event_type, cutoff, counted_until, batch_size,
+                                       settings.archive_purged_events)
+            if purged:
+                logger.info("Purged %s '%s' Modbus Event(s) older than %s", purged, event_type, cutoff)
+
+        if settings.signal_history_retention_days:
+            purge_signal_history(add_days(now_datetime(), -settings.signal_history_retention_days), batch_size)
+
+        frappe.db.delete(ROLLUP_DOCTYPE, {
+            "period": "Hourly",
+            "period_start": ("<", add_days(now_datetime(), -HOURLY_ROLLUP_RETENTION_DAYS)),
+        })
+        frappe.db.commit()
+
+    except Exception as e:
+        frappe.db.rollback()
+        logger.error("Error purging Modbus Events: %s", e)
+        frappe.log_error(frappe.get_traceback(), "Modbus Event Purge Error")
+
+
+def _purge_event_type(event_type: str, cutoff: datetime, counted_until: datetime,
+                      batch_size: int, archive: bool) -> int:
+    purged = 0
+
+    for _ in range(MAX_PURGE_BATCHES_PER_TYPE):
+        # Late rows not yet added to their rollups are kept until the next rollup
+        rows = frappe.db.sql(f"""
+            select {'*' if archive else 'name'}
+            from `tabModbus Event`
+            where event_type = %s and creation < %s and modified < %s
+            order by creation
+            limit %s
+        """, (event_type, cutoff, counted_until, batch_size), as_dict=True)
+
+        if not rows:
+            break
+
+        if archive:
+            archive_events(rows)
+
+        frappe.db.delete("Modbus Event", {"name": ("in", [row.name for row in rows])})
+        frappe.db.commit()
+        purged += len(rows)
+
+        if len(rows) < batch_size:
+            break
+
+    return purged
+
+
+def purge_signal_history(cutoff: datetime, batch_size: int) -> int:
+    """Delete Modbus Signal History older than ``cutoff``, oldest first, in committed batches
+
+    Returns:
+        int: Number of history rows deleted
+    """
+    purged = 0
+    for _ in range(MAX_PURGE_BATCHES_PER_TYPE):
+        names = frappe.db.sql_list(
+            "select name from `tabModbus Signal History` where ts < %s order by ts limit %s",
+            (cutoff, batch_size)
+        )
+        if names:
+            frappe.db.delete("Modbus Signal History", {"name": ("in", names)})
+            frappe.db.commit()
+        purged += len(names)
+        if len(names) < batch_size:
+            break
+
+    if purged:
+        logger.info("Purged %s Modbus Signal History row(s) older than %s", purged, cutoff)
+    return purged
+
+
+def archive_events(rows: list[dict]) -> str:
+    """Append events to today's gzipped JSON Lines archive in the site's private files
+
+    Returns:
+        str: Path of the archive file
+    """
+    folder = frappe.get_site_path("private", "files", ARCHIVE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"modbus_events_{getdate()}.jsonl.gz")
+
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str))
+            f.write("\n")
+
+    return path
+
+
+def _rollup_late_events(rolled_up_until: datetime, inserted_from: datetime, inserted_until: datetime) -> None:
+    """Add events inserted in [inserted_from, inserted_until) to the rollups of hours already rolled up
+
+    Added to rather than recounted: older events of those hours may have been purged.
+    """
+    rows = frappe.db.sql("""
+        select date_format(creation, '%%Y-%%m-%%d %%H:00:00') as period_start,
+            connection, `signal`, event_type,
+            count(*) as event_count,
+            sum(case when status = 'Failed' then 1 else 0 end) as failure_count
+        from `tabModbus Event`
+        where creation < %s and modified >= %s and modified < %s
+        group by period_start, connection, `signal`, event_type
+    """, (rolled_up_until, inserted_from, inserted_until), as_dict=True)
+    if not rows:
+        return
+
+    daily_until = _get_watermark(DAILY_WATERMARK_KEY)
+    for row in rows:
+        hour = get_datetime(row.period_start)
+        _add_to_rollup("Hourly", hour, row)
+        if daily_until and hour < daily_until:
+            _add_to_rollup("Daily", get_datetime(getdate(hour)), row)
+
+    logger.info("Added %s late Modbus Event(s) to their rollups", sum(int(row.event_count) for row in rows))
+
+
+def _add_to_rollup(period: str, period_start: datetime, row: dict) -> None:
+    timestamp = now_datetime()
+    existing = frappe.db.sql_list("""
+        select name from `tabModbus Event Rollup`
+        where period = %s and period_start = %s
+            and connection <=> %s and `signal` <=> %s and event_type <=> %s
+        for update
+    """, (period, period_start, row.connection, row.signal, row.event_type))
+    if existing:
+        frappe.db.sql("""
+            update `tabModbus Event Rollup`
+            set event_count = event_count + %s, failure_count = failure_count + %s, modified = %s
+            where name = %s
+        """, (int(row.event_count or 0), int(row.failure_count or 0), timestamp, existing[0]))
+        return
+
+    user = frappe.session.user
+    frappe.db.bulk_insert(ROLLUP_DOCTYPE, ROLLUP_FIELDS, [(
+        frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+        period, period_start, row.connection, row.signal, row.event_type,
+        int(row.event_count or 0), int(row.failure_count or 0),
+    )])
+
+
+def _has_events_between(start: datetime, end: datetime) -> bool:
+    return bool(frappe.db.sql(
+        "select name from `tabModbus Event` where creation >= %s and creation < %s limit 1",
+        (start, end)
+    ))
+
+
+def _replace_rollups(period: str, period_start: datetime, rows: list[dict]) -> None:
+    """Replace the rollups of one period, so re-running a period is idempotent"""
+    frappe.db.delete(ROLLUP_DOCTYPE, {"period": period, "period_start": period_start})
+    if not rows:
+        return
+
+    timestamp = now_datetime()
+    user = frappe.session.user
+    values = [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+            period, period_start, row.connection, row.signal, row.event_type,
+            int(row.event_count or 0), int(row.failure_count or 0),
+        )
+        for row in rows
+    ]
+    frappe.db.bulk_insert(ROLLUP_DOCTYPE, ROLLUP_FIELDS, values)
+
+
+def _get_watermark(key: str) -> datetime | None:
+    value = frappe.db.get_global(key)
+    return get_datetime(value) if value else None
+
+
+def _set_watermark(key: str, value: datetime) -> None:
+    frappe.db.set_global(key, str(value))
@@ -0,0 +1,352 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Buffered writer for Modbus Events.
+
+Logging an event is a single Redis ``RPUSH``. Buffered events are written with one
+bulk ``INSERT`` per batch by a background flush, which is enqueued once the buffer
+reaches ``FLUSH_SIZE`` or its oldest event is ``FLUSH_INTERVAL`` seconds old, and
+also runs on every scheduler tick. The buffer lives in Redis, so events survive
+worker restarts; they are only trimmed after the insert has been committed.
+A batch that fails to insert is retried row by row; rows that still fail are
+moved to a dead-letter list (``DEAD_LETTER_KEY``), so one bad event can't block
+the buffer.
+
+Successful Signal Update/Read/Write events with numeric values are also written
+to Modbus Signal History in the same flush.
+"""
+
+import json
+from typing import Any, Optional
+
+import frappe
+from frappe.model.naming import NamingSeries
+from frappe.utils import cint, now
+
+from epibus.epibus.utils.action_profiler import span
+from epibus.epibus.utils.epinomy_logger import get_logger, log_error
+
+logger = get_logger(__name__)
+
+BUFFER_KEY = "epibus:event_buffer"
+FLUSH_SCHEDULED_KEY = "epibus:event_flush_scheduled"
+FLUSH_LOCK_KEY = "epibus:event_flush_lock"
+
+# Redis list of events that could not be inserted, with the error; the newest are kept
+DEAD_LETTER_KEY = "epibus:event_dead_letter"
+MAX_DEAD_LETTERS = 10000
+
+# Enqueue a flush once this many events are buffered...
+FLUSH_SIZE = 200
+# ...or once a flush has not been scheduled for this many seconds
+FLUSH_INTERVAL = 5
+
+# Rows per INSERT, and the most batches one flush writes before yielding
+INSERT_BATCH_SIZE = 1000
+MAX_BATCHES_PER_FLUSH = 50
+
+# Modbus Event is named "format:EPI-EVT-{#####}"; names are reserved in bulk from
+# the counter that autoname uses for the braced "#####"
+NAME_PREFIX = "EPI-EVT-"
+NAME_COUNTER = "#####"
+
+# Event types whose new_value is recorded in Modbus Signal History
+HISTORY_EVENT_TYPES = ("Signal Update", "Read", "Write")
+
+EVENT_FIELDS = [
+    "event_type", "status", "connection", "signal", "action", "timestamp",
+    "previous_value", "new_value", "message", "error_message", "stack_trace",
+]
+
+
+def log_event(event_type: str, connection: str | None = None, status: str = "Success",
+              signal: str | None = None, action: str | None = None,
+              previous_value: Any = None, new_value: Any = None, message: str | None = None,
+              error_message: str | None = None, stack_trace: str | None = None,
+              timestamp: str | None = None) -> None:
+    """Buffer a Modbus Event for the next bulk write
+
+    Never raises - event logging must not interrupt operations. If Redis is not
+    available the event is inserted directly.
+
+    Args:
+        event_type: One of the Modbus Event types (Read, Write, Signal Update, ...)
+        connection: Name of the Modbus Connection
+        status: Success/Failed
+        signal: Name of the Modbus Signal
+        action: Name of the Modbus Action
+        previous_value: Previous signal value
+        new_value: New signal value
+        message: Narrative description of the event
+        error_message: Error text for failed events
+        stack_trace: Traceback for failed events
+        timestamp: When the event happened. Defaults to now.
+    """
+    event = {
+        "event_type": event_type,
+        "status": status or "Success",
+        "connection": connection,
+        "signal": signal,
+        "action": action,
+        "timestamp": timestamp or now(),
+        "previous_value": str(previous_value) if previous_value is not None else None,
+        "new_value": str(new_value) if new_value is not None else None,
+        "message": message,
+        "error_message": error_message or "",
+        "stack_trace": stack_trace,
+    }
+    log_events([event])
+
+
+def log_events(events: list[dict[str, Any]]) -> None:
+    """Buffer several Modbus Events with a single Redis call
+
+    Args:
+        events: Dicts with the keyword arguments of ``log_event``
+    """
+    if not events:
+        return
+
+    owner = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+    for event in events:
+        event.setdefault("owner", owner)
+        event["timestamp"] = event.get("timestamp") or now()
+        event["status"] = event.get("status") or "Success"
+
+    with span("event_log"):
+        try:
+            # Raw list commands: RedisWrapper's push one value and re-prefix the key
+            cache = frappe.cache()
+            pipe = cache.pipeline(transaction=False)
+            pipe.rpush(cache.make_key(BUFFER_KEY), *[json.dumps(event, default=str) for event in events])
+            depth = pipe.execute()[0]
+            if depth // FLUSH_SIZE != (depth - len(events)) // FLUSH_SIZE or _claim_flush_slot():
+                _enqueue_flush()
+
+        except Exception as e:
+            logger.warning("Event buffer unavailable, inserting Modbus Events directly: %s", e)
+            try:
+                _insert_events(events)
+            except Exception as insert_error:
+                logger.error("Failed to create Modbus Events: %s", insert_error)
+
+
+def buffered_count() -> int:
+    """Number of events waiting to be written"""
+    cache = frappe.cache()
+    pipe = cache.pipeline(transaction=False)
+    pipe.llen(cache.make_key(BUFFER_KEY))
+    return cint(pipe.execute()[0])
+
+
+def flush_events() -> int:
+    """Write buffered events to the database in bulk
+
+    Runs as a background job and on every scheduler tick. Only one flush runs at a
+    time per site; events are removed from the buffer only after their batch has
+    been committed, so a crashed flush is retried rather than lost.
+
+    Returns:
+        int: Number of events written
+    """
+    cache = frappe.cache()
+    buffer_key = cache.make_key(BUFFER_KEY)
+    lock = cache.lock(cache.make_key(FLUSH_LOCK_KEY), timeout=120, blocking_timeout=0)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    written = 0
+    try:
+        cache.delete(cache.make_key(FLUSH_SCHEDULED_KEY))
+
+        for _ in range(MAX_BATCHES_PER_FLUSH):
+            raw_events = cache.pipeline(transaction=False).lrange(buffer_key, 0, INSERT_BATCH_SIZE - 1).execute()[0]
+            if not raw_events:
+                break
+
+            events = []
+            dead = []
+            for raw in raw_events:
+                try:
+                    events.append(json.loads(raw))
+                except (TypeError, ValueError) as e:
+                    logger.error("Unreadable buffered Modbus Event: %r", raw)
+                    dead.append({"raw": raw.decode() if isinstance(raw, bytes) else raw, "error": str(e)})
+
+            if events:
+                failed = _insert_batch(events)
+                frappe.db.commit()
+                dead.extend(failed)
+                written += len(events) - len(failed)
+
+            pipe = cache.pipeline(transaction=False)
+            if dead:
+                dead_key = cache.make_key(DEAD_LETTER_KEY)
+                pipe.rpush(dead_key, *[json.dumps(letter, default=str) for letter in dead])
+                pipe.ltrim(dead_key, -MAX_DEAD_LETTERS, -1)
+            pipe.ltrim(buffer_key, len(raw_events), -1)
+            pipe.execute()
+
+            if dead:
+                logger.error("Moved %s Modbus Event(s) that could not be written to %s", len(dead), DEAD_LETTER_KEY)
+                log_error(
+                    "Modbus Event Flush Error",
+                    message=f"{len(dead)} event(s) moved to {DEAD_LETTER_KEY}. First error: {dead[0]['error']}",
+                    fingerprint="event_sink:dead_letter",
+                )
+
+        if written:
+            logger.debug("Flushed %s buffered Modbus Event(s)", written)
+
+    except Exception as e:
+        frappe.db.rollback()
+        logger.error("Error flushing buffered Modbus Events: %s", e)
+        log_error("Modbus Event Flush Error", message=frappe.get_traceback())
+
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+    return written
+
+
+def _claim_flush_slot() -> bool:
+    """Return True for the first caller after FLUSH_INTERVAL seconds without a scheduled flush"""
+    cache = frappe.cache()
+    return bool(cache.set(cache.make_key(FLUSH_SCHEDULED_KEY), 1, nx=True, ex=FLUSH_INTERVAL))
+
+
+def _enqueue_flush() -> None:
+    frappe.enqueue(
+        "epibus.epibus.utils.event_sink.flush_events",
+        queue="short",
+        job_id="epibus_modbus_event_flush",
+        deduplicate=True,
+        enqueue_after_commit=False,
+    )
+
+
+def _insert_batch(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Insert a batch, falling back to one row at a time if the batch fails
+
+    Returns:
+        list: {"event", "error"} per event that could not be inserted
+    """
+    frappe.db.savepoint("modbus_event_batch")
+    try:
+        _insert_events(events)
+        return []
+    except Exception as e:
+        frappe.db.rollback(save_point="modbus_event_batch")
+        logger.warning("Bulk insert of %s Modbus Events failed, inserting one by one: %s", len(events), e)
+
+    failed = []
+    for event in events:
+        frappe.db.savepoint("modbus_event_row")
+        try:
+            _insert_events([event])
+        except Exception as e:
+            frappe.db.rollback(save_point="modbus_event_row")
+            failed.append({"event": event, "error": str(e)})
+    return failed
+
+
+def dead_letter_count() -> int:
+    """Number of events that could not be written"""
+    cache = frappe.cache()
+    pipe = cache.pipeline(transaction=False)
+    pipe.llen(cache.make_key(DEAD_LETTER_KEY))
+    return cint(pipe.execute()[0])
+
+
+def _insert_events(events: list[dict[str, Any]]) -> None:
+    """Insert events with a single multi-row INSERT, bypassing document hooks"""
+    names = _reserve_names(len(events))
+    created = now()
+
+    fields = ["name", "creation", "modified", "owner", "modified_by", *EVENT_FIELDS]
+    values = []
+    for name, event in zip(names, events, strict=True):
+        owner = event.get("owner") or "Administrator"
+        values.append(
+            [name, event.get("timestamp") or created, created, owner, owner]
+            + [event.get(field) for field in EVENT_FIELDS]
+        )
+
+    frappe.db.bulk_insert("Modbus Event", fields, values, chunk_size=INSERT_BATCH_SIZE)
+    _insert_history(events, created)
+
+
+def _insert_history(events: list[dict[str, Any]], created: str) -> None:
+    """Record successful numeric value changes in Modbus Signal History"""
+    values = []
+    for event in events:
+        if (event.get("event_type") not in HISTORY_EVENT_TYPES or event.get("status") == "Failed"
+                or not event.get("signal")):
+            continue
+
+        value = history_value(event.get("new_value"))
+        if value is None:
+            continue
+
+        owner = event.get("owner") or "Administrator"
+        ts = event.get("timestamp") or created
+        values.append((ts, created, owner, owner, event["signal"], event.get("connection"), ts, value))
+
+    if values:
+        frappe.db.bulk_insert(
+            "Modbus Signal History",
+            ["creation", "modified", "owner", "modified_by", "signal", "connection", "ts", "value"],
+            values,
+            chunk_size=INSERT_BATCH_SIZE,
+        )
+
+
+def history_value(value: Any) -> float | None:
+    """Convert a logged signal value to a number, or None if it is not numeric"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "false"):
+            return 1.0 if lowered == "true" else 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def name_series_key() -> str:
+    """The tabSeries row Modbus Event's autoname numbers names from
+
+    Frappe numbers a braced ``{#####}`` in a format autoname from the series of the
+    text inside the braces - so not "EPI-EVT-", but the empty prefix.
+    """
+    return NamingSeries(NAME_COUNTER).get_prefix()
+
+
+def _reserve_names(count: int) -> list[str]:
+    """Reserve ``count`` consecutive names from the counter Modbus Event's autoname uses
+
+    Locks the series row like ``frappe.model.naming.getseries``, so names handed out
+    here and by the autoname (desk, ``frappe.get_doc``) never collide.
+    """
+    key = name_series_key()
+    current = frappe.db.sql(
+        "select `current` from `tabSeries` where `name` = %s for update", (key,)
+    )
+    if current and current[0][0] is not None:
+        start = cint(current[0][0])
+        frappe.db.sql(
+            "update `tabSeries` set `current` = %s where `name` = %s", (start + count, key)
+        )
+    else:
+        start = 0
+        frappe.db.sql(
+            "insert into `tabSeries` (`name`, `current`) values (%s, %s)", (key, count)
+        )
+
+    digits = len(NAME_COUNTER)
+    return [f"{NAME_PREFIX}{str(start + i + 1).zfill(digits)}" for i in range(count)]
@@ -0,0 +1,112 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Load reporting and shedding for the PLC Bridge ingestion endpoints.
+
+Ingestion requests are counted while in flight across all workers. When too many
+are in flight, or the Modbus Event buffer is backing up, new requests are refused
+with HTTP 429 and a ``Retry-After`` header so the bridge can widen its batches and
+slow down delivery. Every ingestion response carries an ``X-Epibus-Queue-Depth``
+header with the current event buffer depth.
+"""
+
+from contextlib import contextmanager
+from typing import Optional
+
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils import event_sink
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+IN_FLIGHT_KEY = "epibus:ingest_in_flight"
+
+# Shed load beyond this many concurrent ingestion requests...
+MAX_IN_FLIGHT = 8
+# ...or while this many Modbus Events are waiting to be written
+MAX_BUFFERED_EVENTS = 20000
+
+# Seconds the bridge is asked to wait before retrying
+RETRY_AFTER = 1
+RETRY_AFTER_BACKLOG = 5
+
+# Safety net for counts left behind by a killed worker: the counter expires this
+# many seconds after it was created, however busy ingestion stays meanwhile
+IN_FLIGHT_TTL = 60
+
+
+@contextmanager
+def ingest_request():
+    """Count an ingestion request as in flight, shedding it if the backend is overloaded
+
+    Yields:
+        Optional[int]: None if the request may proceed, otherwise the number of
+            seconds the client should wait. The HTTP status is already set to 429.
+    """
+    cache = frappe.cache()
+    key = cache.make_key(IN_FLIGHT_KEY)
+    counted = False
+
+    try:
+        # The TTL is set only when the counter is created - refreshing it on every
+        # INCR would keep a leaked count alive for as long as requests keep coming
+        pipe = cache.pipeline()
+        pipe.set(key, 0, nx=True, ex=IN_FLIGHT_TTL)
+        pipe.incr(key)
+        in_flight = pipe.execute()[1]
+        counted = True
+    except Exception as e:
+        logger.warning("Could not track ingestion load: %s", e)
+        in_flight = 0
+
+    try:
+        retry_after = _check_load(in_flight)
+        if retry_after:
+            frappe.local.response.http_status_code = 429
+            frappe.local.flags.epibus_retry_after = retry_after
+        yield retry_after
+
+    finally:
+        if counted:
+            try:
+                if cache.decr(key) < 0:
+                    # The counter expired during the request; don't leave it behind without a TTL
+                    cache.delete(key)
+            except Exception:
+                pass
+
+
+def _check_load(in_flight: int) -> int | None:
+    depth = 0
+    try:
+        depth = event_sink.buffered_count()
+    except Exception:
+        pass
+
+    frappe.local.flags.epibus_queue_depth = depth
+
+    if depth > MAX_BUFFERED_EVENTS:
+        logger.warning("Shedding ingestion request: %s Modbus Events buffered", depth)
+        return RETRY_AFTER_BACKLOG
+
+    if in_flight > MAX_IN_FLIGHT:
+        logger.warning("Shedding ingestion request: %s ingestion requests in flight", in_flight)
+        return RETRY_AFTER
+
+    return None
+
+
+def add_load_headers(response=None, request=None):
+    """``after_request`` hook: add load headers to ingestion responses"""
+    if response is None:
+        return
+
+    depth = frappe.local.flags.get("epibus_queue_depth")
+    if depth is not None:
+        response.headers["X-Epibus-Queue-Depth"] = str(cint(depth))
+
+    retry_after = frappe.local.flags.get("epibus_retry_after")
+    if retry_after:
+        response.headers["Retry-After"] = str(cint(retry_after))
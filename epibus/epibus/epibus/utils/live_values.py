@@ -0,0 +1,135 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Live value cache: the last known value of every signal, shared by all workers.
+
+Values are kept in one Redis hash, as JSON ``{value, ts, quality, source}``:
+
+- ``ts``: epoch seconds at which the value was observed
+- ``quality``: "Good" for values read from the device, "Unverified" for values
+  written without read-back (until the next scan confirms them). ``with_age``
+  reports values older than ``STALE_AFTER`` as "Stale".
+- ``source``: where the value came from (plc_bridge, read, write, monitor, ...)
+"""
+
+import json
+import time
+from collections.abc import Iterable
+from typing import Any, Optional
+
+import frappe
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+LIVE_VALUES_KEY = "epibus:live_values"
+
+QUALITY_GOOD = "Good"
+QUALITY_UNVERIFIED = "Unverified"
+QUALITY_STALE = "Stale"
+
+# Seconds after which a value is reported as stale
+STALE_AFTER = 60
+
+
+def _entry(value: Any, source: str, quality: str, ts: float | None) -> str:
+    return json.dumps({
+        "value": value,
+        "ts": ts if ts is not None else time.time(),
+        "quality": quality,
+        "source": source,
+    }, default=str)
+
+
+def set_value(signal: str, value: Any, source: str, quality: str = QUALITY_GOOD,
+              ts: float | None = None) -> None:
+    """Record the latest value of a signal"""
+    set_values([{"signal": signal, "value": value, "source": source, "quality": quality, "ts": ts}])
+
+
+def set_values(values: Iterable[dict[str, Any]]) -> None:
+    """Record the latest values of several signals with one Redis call
+
+    Args:
+        values: Dicts with signal, value, source and optionally quality and ts
+    """
+    mapping = {
+        v["signal"]: _entry(v["value"], v["source"], v.get("quality") or QUALITY_GOOD, v.get("ts"))
+        for v in values
+    }
+    if not mapping:
+        return
+
+    try:
+        cache = frappe.cache()
+        # A raw pipeline keeps the JSON readable by non-Frappe clients (RedisWrapper pickles)
+        pipe = cache.pipeline(transaction=False)
+        pipe.hset(cache.make_key(LIVE_VALUES_KEY), mapping=mapping)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Could not update live values: %s", e)
+
+
+def get_value(signal: str) -> dict[str, Any] | None:
+    """Get the latest value of a signal
+
+    Returns:
+        dict: {value, ts, quality, source}, or None if the signal has no live value
+    """
+    return get_values([signal]).get(signal)
+
+
+def get_values(signals: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Get the latest values of several signals with one Redis call
+
+    Returns:
+        dict: Signal name -> {value, ts, quality, source}, for signals with a live value
+    """
+    signals: list[str] = list(signals)
+    if not signals:
+        return {}
+
+    try:
+        cache = frappe.cache()
+        pipe = cache.pipeline(transaction=False)
+        pipe.hmget(cache.make_key(LIVE_VALUES_KEY), signals)
+        raw_values = pipe.execute()[0]
+    except Exception as e:
+        logger.warning("Could not read live values: %s", e)
+        return {}
+
+    result = {}
+    for signal, raw in zip(signals, raw_values, strict=True):
+        if raw is None:
+            continue
+        try:
+            result[signal] = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+    return result
+
+
+def with_age(entry: dict[str, Any], now: float | None = None) -> dict[str, Any]:
+    """Add the age in seconds to a live value entry, marking old values as stale
+
+    Returns:
+        dict: A copy of the entry with ``age`` set
+    """
+    entry = dict(entry)
+    age = max((now if now is not None else time.time()) - (entry.get("ts") or 0), 0)
+    entry["age"] = age
+    if age > STALE_AFTER:
+        entry["quality"] = QUALITY_STALE
+    return entry
+
+
+def clear(signal: str | None = None) -> None:
+    """Forget the live value of one signal, or of all signals"""
+    cache = frappe.cache()
+    pipe = cache.pipeline(transaction=False)
+    if signal:
+        pipe.hdel(cache.make_key(LIVE_VALUES_KEY), signal)
+    else:
+        pipe.delete(cache.make_key(LIVE_VALUES_KEY))
+    pipe.execute()
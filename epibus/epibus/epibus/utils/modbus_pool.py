@@ -0,0 +1,285 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Process-wide pool of Modbus TCP clients.
+
+Clients are keyed by ``(host, port, unit)`` and handed out as exclusive, thread-safe
+leases, so one TCP connection per device is reused across requests and jobs in a
+gunicorn or RQ worker instead of being opened and closed for every read or write.
+Clients idle for more than ``HEALTH_CHECK_AFTER`` are probed with a one-coil read
+before reuse, so a half-open connection is replaced rather than handed out, and
+idle clients are reaped after ``IDLE_TIMEOUT``.
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from pymodbus.client import ModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+from pymodbus.framer import FramerType
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+PoolKey = tuple[str, int, int]
+
+# Concurrent connections per device; most PLCs only accept a handful of clients
+MAX_CLIENTS_PER_KEY = 2
+
+# Seconds a client may sit idle before it is closed
+IDLE_TIMEOUT = 60
+
+# Idle clients older than this are probed before being handed out again
+HEALTH_CHECK_AFTER = 10
+
+# Seconds to wait for a free client before giving up
+LEASE_TIMEOUT = 10
+
+CONNECT_TIMEOUT = 3
+CONNECT_RETRIES = 1
+
+
+class _PooledClient:
+    __slots__ = ("broken", "client", "key", "last_used")
+
+    def __init__(self, key: PoolKey, client: ModbusTcpClient):
+        self.key = key
+        self.client = client
+        self.last_used = time.monotonic()
+        self.broken = False
+
+
+class ModbusClientPool:
+    """Thread-safe pool of connected Modbus TCP clients"""
+
+    def __init__(self, max_per_key: int = MAX_CLIENTS_PER_KEY, idle_timeout: float = IDLE_TIMEOUT):
+        self.max_per_key = max_per_key
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._idle: dict[PoolKey, list[_PooledClient]] = {}
+        self._counts: dict[PoolKey, int] = {}
+        self._reaper = None
+        self._pid = os.getpid()
+
+    @contextmanager
+    def lease(self, host: str, port: int, unit: int = 1, timeout: float = LEASE_TIMEOUT):
+        """Lease a connected client for exclusive use
+
+        A client that raised a connection error during the lease is discarded
+        instead of being returned to the pool.
+
+        Yields:
+            ModbusTcpClient: A connected client
+
+        Raises:
+            ConnectionError: If no connection could be established
+            TimeoutError: If no client became free within ``timeout`` seconds
+        """
+        entry = self._acquire((host, int(port), int(unit or 1)), timeout)
+        try:
+            yield entry.client
+        except (ConnectionError, OSError, ConnectionException, ModbusIOException):
+            # The connection may be dead or hold a stale response - don't reuse it
+            entry.broken = True
+            raise
+        finally:
+            self._release(entry)
+
+    def _acquire(self, key: PoolKey, timeout: float) -> _PooledClient:
+        self._check_fork()
+        self._ensure_reaper()
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                entry = None
+                while entry is None:
+                    idle = self._idle.get(key)
+                    if idle:
+                        entry = idle.pop()
+                    elif self._counts.get(key, 0) < self.max_per_key:
+                        self._counts[key] = self._counts.get(key, 0) + 1
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(f"No Modbus client free for {key[0]}:{key[1]} (unit {key[2]})")
+                        self._cond.wait(remaining)
+
+            if entry is None:
+                # A slot was reserved - connect outside the lock
+                try:
+                    return _PooledClient(key, self._connect(key))
+                except Exception:
+                    self._discard_slot(key)
+                    raise
+
+            if self._is_healthy(entry):
+                return entry
+
+            self._close(entry)
+            self._discard_slot(key)
+
+    def _release(self, entry: _PooledClient) -> None:
+        if entry.broken or not entry.client.connected:
+            self._close(entry)
+            self._discard_slot(entry.key)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.setdefault(entry.key, []).append(entry)
+            self._cond.notify()
+
+    def _discard_slot(self, key: PoolKey) -> None:
+        with self._cond:
+            self._counts[key] = max(self._counts.get(key, 1) - 1, 0)
+            self._cond.notify()
+
+    def _connect(self, key: PoolKey) -> ModbusTcpClient:
+        host, port, _ = key
+        try:
+            asyncio.get_event_loop()
+        except RuntimeError:
+            asyncio.set_event_loop(asyncio.new_event_loop())
+
+        client = ModbusTcpClient(
+            host=host,
+            port=port,
+            framer=FramerType.SOCKET,
+            timeout=CONNECT_TIMEOUT,
+            retries=CONNECT_RETRIES,
+        )
+        if not client.connect():
+            client.close()
+            raise ConnectionError(f"Failed to connect to {host}:{port}")
+
+        logger.debug("Opened pooled Modbus connection to %s:%s (unit %s)", host, port, key[2])
+        return client
+
+    def _is_healthy(self, entry: _PooledClient) -> bool:
+        if not entry.client.connected:
+            return False
+        if time.monotonic() - entry.last_used < HEALTH_CHECK_AFTER:
+            return True
+        try:
+            return bool(entry.client.is_socket_open()) and self._probe(entry)
+        except Exception:
+            return False
+
+    def _probe(self, entry: _PooledClient) -> bool:
+        """Send a cheap request: an open socket alone doesn't rule out a half-open connection
+
+        Any response counts, an exception response (no coil 0 on this device) included.
+        """
+        from epibus.epibus.utils.signal_handler import UNIT_KEYWORD
+
+        unit = entry.key[2]
+        try:
+            entry.client.read_coils(address=0, count=1, **({UNIT_KEYWORD: unit} if unit != 1 else {}))
+            return True
+        except Exception as e:
+            logger.debug("Pooled Modbus connection to %s:%s failed its probe: %s", entry.key[0], entry.key[1], e)
+            return False
+
+    def _close(self, entry: _PooledClient) -> None:
+        try:
+            entry.client.close()
+        except Exception:
+            pass
+
+    def reap_idle(self) -> int:
+        """Close clients that have been idle longer than ``idle_timeout``
+
+        Returns:
+            int: Number of clients closed
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._cond:
+            for key, idle in self._idle.items():
+                keep = [e for e in idle if e.last_used >= cutoff]
+                expired.extend(e for e in idle if e.last_used < cutoff)
+                self._idle[key] = keep
+            for entry in expired:
+                self._counts[entry.key] = max(self._counts.get(entry.key, 1) - 1, 0)
+            self._cond.notify_all()
+
+        for entry in expired:
+            self._close(entry)
+        if expired:
+            logger.debug("Closed %s idle pooled Modbus connection(s)", len(expired))
+        return len(expired)
+
+    def close_all(self) -> None:
+        """Close every idle client"""
+        with self._cond:
+            entries = [e for idle in self._idle.values() for e in idle]
+            for entry in entries:
+                self._counts[entry.key] = max(self._counts.get(entry.key, 1) - 1, 0)
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Open and idle client counts per device"""
+        with self._cond:
+            return {
+                f"{host}:{port}/{unit}": {
+                    "open": count,
+                    "idle": len(self._idle.get((host, port, unit), [])),
+                }
+                for (host, port, unit), count in self._counts.items()
+            }
+
+    def _check_fork(self) -> None:
+        """Drop clients inherited from a parent process - their sockets belong to it"""
+        if os.getpid() != self._pid:
+            self._reset_after_fork()
+
+    def _reset_after_fork(self) -> None:
+        # Only the forking thread survives in the child. The inherited Condition may
+        # be held by a thread that didn't, so it is replaced rather than acquired.
+        self._cond = threading.Condition()
+        self._idle = {}
+        self._counts = {}
+        self._reaper = None
+        self._pid = os.getpid()
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None:
+            return
+        with self._cond:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_loop, name="modbus-pool-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while True:
+            time.sleep(self.idle_timeout / 2)
+            try:
+                self.reap_idle()
+            except Exception as e:
+                logger.warning("Error reaping idle Modbus connections: %s", e)
+
+
+_pool = ModbusClientPool()
+atexit.register(_pool.close_all)
+os.register_at_fork(after_in_child=_pool._reset_after_fork)
+
+
+def lease_client(host: str, port: int, unit: int = 1, timeout: float = LEASE_TIMEOUT):
+    """Lease a pooled client for a device - see ``ModbusClientPool.lease``"""
+    return _pool.lease(host, port, unit, timeout)
+
+
+def get_pool() -> ModbusClientPool:
+    """Get the process-wide pool"""
+    return _pool
@@ -1,66 +1,219 @@
-# -*- coding: utf-8 -*-
 # Copyright (c) 2025, Applied Relevance and contributors
 # For license information, please see license.txt
 
+import json
+import time
+from typing import Any
+
 import frappe
-from typing import Dict, List, Any, Optional, Union, cast
 import requests
-import json
+
 from epibus.epibus.utils.epinomy_logger import get_logger
 
 logger = get_logger(__name__)
 
-def get_signals_from_plc_bridge() -> List[Dict[str, Any]]:
+DEFAULT_BRIDGE_URL = "http://plc-bridge:7654"
+
+# One pooled HTTP session per worker process for talking to the PLC Bridge
+_bridge_session: requests.Session | None = None
+
+# Seconds a fetched signal snapshot is reused before asking the bridge again
+SNAPSHOT_REUSE = 0.25
+
+# {bridge url: (monotonic fetch time, {signal name: entry})}
+_snapshots: dict[str, tuple[float, dict[str, dict[str, Any]]]] = {}
+
+
+def get_bridge_url() -> str:
+    """Get the PLC Bridge base URL from Modbus Settings"""
+    url = frappe.db.get_single_value("Modbus Settings", "plc_bridge_url", cache=True)
+    return (url or DEFAULT_BRIDGE_URL).rstrip("/")
+
+
+def get_bridge_session() -> requests.Session:
+    """Get the worker's pooled HTTP session for PLC Bridge requests"""
+    global _bridge_session
+    if _bridge_session is None:
+        _bridge_session = requests.Session()
+    return _bridge_session
+
+
+def get_bridge_connections(timeout: float = 1.0) -> dict[str, dict[str, Any]] | None:
+    """
+    Get the PLC Bridge's own connection health.
+
+    The bridge polls every device continuously, so its view of each connection is
+    fresher and far cheaper to obtain than a live Modbus probe.
+
+    Args:
+        timeout (float): HTTP timeout in seconds.
+
+    Returns:
+        dict[str, dict[str, Any]] | None: Connection status keyed by connection name,
+        or None if the bridge could not be reached.
+    """
+    try:
+        response = get_bridge_session().get(f"{get_bridge_url()}/connections", timeout=timeout)
+        response.raise_for_status()
+        return {conn["name"]: conn for conn in response.json().get("connections", [])}
+
+    except Exception as e:
+        logger.debug("PLC Bridge connection health unavailable: %s", e)
+        return None
+
+
+class PLCBridgeError(Exception):
+    """Raised when the PLC Bridge cannot serve a read or write"""
+
+
+def use_bridge_io() -> bool:
+    """Check whether signal reads and writes should go through the PLC Bridge"""
+    return frappe.db.get_single_value("Modbus Settings", "io_mode", cache=True) == "PLC Bridge"
+
+
+def get_bridge_snapshot(timeout: float = 1.0) -> dict[str, dict[str, Any]]:
+    """
+    Get the PLC Bridge's current value of every signal.
+
+    The snapshot is reused for SNAPSHOT_REUSE seconds, so a request reading many
+    signals costs one HTTP call.
+
+    Returns:
+        dict[str, dict[str, Any]]: Signal entries (value, timestamp, ...) keyed by signal name.
+
+    Raises:
+        PLCBridgeError: If the bridge could not be reached.
+    """
+    url = get_bridge_url()
+    fetched, signals = _snapshots.get(url, (0.0, {}))
+    if time.monotonic() - fetched < SNAPSHOT_REUSE:
+        return signals
+
+    try:
+        response = get_bridge_session().get(f"{url}/signals", timeout=timeout)
+        response.raise_for_status()
+        signals = {signal["name"]: signal for signal in response.json().get("signals", [])}
+    except Exception as e:
+        raise PLCBridgeError(f"PLC Bridge unavailable: {e!s}")
+
+    _snapshots[url] = (time.monotonic(), signals)
+    return signals
+
+
+def read_signal_via_bridge(signal_name: str, max_age: float | None = None) -> Any:
+    """
+    Read a signal from the PLC Bridge's snapshot.
+
+    Args:
+        signal_name (str): Name of the Modbus Signal.
+        max_age (float, optional): Maximum age of the value in seconds.
+            Defaults to the Bridge Max Staleness setting.
+
+    Returns:
+        Any: The signal value as reported by the bridge.
+
+    Raises:
+        PLCBridgeError: If the bridge is unreachable or has no value fresher than max_age.
+    """
+    if max_age is None:
+        max_age = frappe.db.get_single_value("Modbus Settings", "bridge_max_staleness", cache=True) or 5
+
+    entry = get_bridge_snapshot().get(signal_name)
+    if not entry or entry.get("value") is None or entry.get("timestamp") is None:
+        raise PLCBridgeError(f"PLC Bridge has no current value for signal {signal_name}")
+
+    age = time.time() - entry["timestamp"]
+    if age > max_age:
+        raise PLCBridgeError(f"PLC Bridge value for signal {signal_name} is {age:.1f}s old")
+
+    return entry["value"]
+
+
+def write_signal_via_bridge(signal_name: str, value: Any, verify: bool = False, timeout: float = 5.0) -> Any:
+    """
+    Write a signal through the PLC Bridge's write queue.
+
+    Args:
+        signal_name (str): Name of the Modbus Signal.
+        value (Any): Value to write.
+        verify (bool): Ask the bridge to read the value back after writing.
+        timeout (float): HTTP timeout in seconds.
+
+    Returns:
+        Any: The value read back by the bridge, or the written value when not verifying.
+
+    Raises:
+        PLCBridgeError: If the bridge is unreachable or the write failed.
+    """
+    try:
+        response = get_bridge_session().post(
+            f"{get_bridge_url()}/write_signal",
+            json={"signal_id": signal_name, "value": value, "verify": verify},
+            timeout=timeout
+        )
+        data = response.json()
+    except Exception as e:
+        raise PLCBridgeError(f"PLC Bridge unavailable: {e!s}")
+
+    if not data.get("success"):
+        raise PLCBridgeError(data.get("message") or f"PLC Bridge write failed: HTTP {response.status_code}")
+
+    # Our own write is the freshest value; don't serve the old one from the snapshot
+    _snapshots.pop(get_bridge_url(), None)
+    return data.get("value", value)
+
+
+def get_signals_from_plc_bridge() -> list[dict[str, Any]]:
     """
     Get signals from the PLC Bridge.
-    
+
     This adapter function provides compatibility with the new PLC Bridge architecture.
     It fetches signals using the API endpoint provided by the new PLC Bridge.
-    
+
     Returns:
-        List[Dict[str, Any]]: A list of signals with their current values.
+        list[dict[str, Any]]: A list of signals with their current values.
     """
     try:
         logger.info("Fetching signals from PLC Bridge via adapter...")
-        
+
         # Use the API endpoint to get all signals
         response = frappe.call("epibus.epibus.api.plc.get_signals")
-        
+
         if not response or not response.get("success", False):
             error_msg = response.get("message", "Unknown error") if response else "No response from PLC Bridge"
-            logger.error(f"Failed to get signals from PLC Bridge: {error_msg}")
+            logger.error("Failed to get signals from PLC Bridge: %s", error_msg)
             return []
-        
+
         # Extract signals from all connections
         all_signals = []
         for connection in response.get("data", []):
             signals = connection.get("signals", [])
             all_signals.extend(signals)
-        
-        logger.info(f"Successfully retrieved {len(all_signals)} signals from PLC Bridge")
+
+        logger.info("Successfully retrieved %s signals from PLC Bridge", len(all_signals))
         return all_signals
-        
+
     except Exception as e:
-        logger.error(f"Error in get_signals_from_plc_bridge: {str(e)}")
+        logger.error("Error in get_signals_from_plc_bridge: %s", e)
         return []
 
 def write_signal_via_plc_bridge(signal_id: str, value: Any) -> bool:
     """
     Write a signal value via the PLC Bridge.
-    
+
     This adapter function provides compatibility with the new PLC Bridge architecture.
     It writes signal values using the API endpoint provided by the new PLC Bridge.
-    
+
     Args:
         signal_id (str): The ID of the signal to update.
         value (Any): The new value for the signal.
-        
+
     Returns:
         bool: True if the write was successful, False otherwise.
     """
     try:
-        logger.info(f"Writing signal {signal_id} = {value} via PLC Bridge adapter...")
-        
+        logger.info("Writing signal %s = %s via PLC Bridge adapter...", signal_id, value)
+
         # Use the API endpoint to update the signal
         # We'll use the existing update_signal method from the API
         response = frappe.call(
@@ -68,15 +221,15 @@ def write_signal_via_plc_bridge(signal_id: str, value: Any) -> bool:
             signal_id=signal_id,
             value=value
         )
-        
+
         if not response or not response.get("success", False):
             error_msg = response.get("message", "Unknown error") if response else "No response from PLC Bridge"
-            logger.error(f"Failed to write signal via PLC Bridge: {error_msg}")
+            logger.error("Failed to write signal via PLC Bridge: %s", error_msg)
             return False
-        
-        logger.info(f"Successfully wrote signal {signal_id} = {value} via PLC Bridge")
+
+        logger.info("Successfully wrote signal %s = %s via PLC Bridge", signal_id, value)
         return True
-        
+
     except Exception as e:
-        logger.error(f"Error in write_signal_via_plc_bridge: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error("Error in write_signal_via_plc_bridge: %s", e)
+        return False
@@ -0,0 +1,91 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Coalesced realtime publishing of Modbus signal updates.
+
+Updates are collected per request (or background job) in ``frappe.local``, merged
+latest-wins per signal, and emitted as a single ``modbus_signal_batch`` event once
+the batch window has elapsed or the request ends.
+"""
+
+import time
+from typing import Any, Optional
+
+import frappe
+from frappe.realtime import publish_realtime
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+BATCH_EVENT = "modbus_signal_batch"
+LEGACY_EVENT = "modbus_signal_update"
+
+# Seconds an open batch may collect updates before it is flushed inline
+BATCH_WINDOW = 0.05
+
+
+def _get_batch() -> dict[str, Any]:
+    batch = getattr(frappe.local, "epibus_signal_batch", None)
+    if batch is None:
+        batch = frappe.local.epibus_signal_batch = {"opened": time.monotonic(), "updates": {}}
+    return batch
+
+
+def queue_signal_update(signal: str, value: Any, timestamp: Any | None = None,
+                        source: str | None = None, **extra) -> None:
+    """Queue a signal update for the next realtime batch
+
+    Args:
+        signal: Name of the Modbus Signal document
+        value: New signal value
+        timestamp: When the value was observed. Defaults to now.
+        source: Where the update came from (plc_bridge, write_request, monitor, ...)
+        extra: Additional fields to include in the update, e.g. signal_name
+    """
+    update = {
+        "signal": signal,
+        "value": value,
+        "timestamp": timestamp if timestamp is not None else time.time(),
+    }
+    if source:
+        update["source"] = source
+    update.update(extra)
+
+    batch = _get_batch()
+    batch["updates"][signal] = update
+
+    if time.monotonic() - batch["opened"] >= BATCH_WINDOW:
+        flush()
+
+
+def flush(**kwargs) -> int:
+    """Publish all queued signal updates
+
+    Also used as the ``after_request`` and ``after_job`` hook, so nothing queued
+    during a request is left behind.
+
+    Returns:
+        int: Number of signal updates published
+    """
+    batch = getattr(frappe.local, "epibus_signal_batch", None)
+    if not batch or not batch["updates"]:
+        return 0
+
+    frappe.local.epibus_signal_batch = None
+    updates = list(batch["updates"].values())
+
+    try:
+        publish_realtime(BATCH_EVENT, {"updates": updates, "timestamp": time.time()})
+
+        # Opt-in (Modbus Settings) for external clients that only listen to per-signal events
+        if frappe.db.get_single_value("Modbus Settings", "publish_per_signal_events", cache=True):
+            for update in updates:
+                publish_realtime(LEGACY_EVENT, update)
+
+        logger.debug("Published realtime batch of %s signal update(s)", len(updates))
+
+    except Exception as e:
+        logger.error("Error publishing realtime signal batch: %s", e)
+
+    return len(updates)
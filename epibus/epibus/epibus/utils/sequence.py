@@ -0,0 +1,153 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Deduplication of sequence-numbered signal updates from the PLC Bridge.
+
+The bridge numbers each signal's updates ``(epoch, seq)``: ``epoch`` identifies a
+bridge run (it changes on restart) and ``seq`` increases with every update of the
+signal within that run. Frappe keeps the highest pair accepted per signal in a
+Redis hash and drops anything at or below it, so retried or re-batched updates
+are processed - and their actions run - at most once.
+
+The bridge and the signal monitor can both report the same change of a signal,
+independently of each other. ``claim_change`` decides which report runs its
+Signal Change actions: the first one to record the new value claims it, and a
+later report of the same value is ignored.
+"""
+
+import json
+from collections.abc import Iterable
+from typing import Any, Optional
+
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+# Redis hash of signal name -> "epoch:seq"
+HWM_KEY = "epibus:signal_hwm"
+
+# Redis hash of signal name -> JSON of the last value whose actions ran
+CLAIMED_KEY = "epibus:signal_claimed"
+
+# Atomically compare (epoch, seq) with the stored high-water mark and advance it
+ACCEPT_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local epoch = tonumber(ARGV[2])
+local seq = tonumber(ARGV[3])
+if current then
+    local sep = string.find(current, ':', 1, true)
+    local current_epoch = tonumber(string.sub(current, 1, sep - 1))
+    local current_seq = tonumber(string.sub(current, sep + 1))
+    if epoch < current_epoch or (epoch == current_epoch and seq <= current_seq) then
+        return 0
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2] .. ':' .. ARGV[3])
+return 1
+"""
+
+# Atomically record a signal's value unless it is the one already recorded
+CLAIM_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+_accept_script = None
+_claim_script = None
+
+
+def _get_script():
+    global _accept_script
+    if _accept_script is None:
+        _accept_script = frappe.cache().register_script(ACCEPT_SCRIPT)
+    return _accept_script
+
+
+def _get_claim_script():
+    global _claim_script
+    if _claim_script is None:
+        _claim_script = frappe.cache().register_script(CLAIM_SCRIPT)
+    return _claim_script
+
+
+def accept_update(signal: str, epoch: Any | None, seq: Any | None) -> bool:
+    """Check whether an update is new, recording it as the signal's high-water mark
+
+    Updates without a sequence number are always accepted.
+
+    Returns:
+        bool: False if the update was already seen
+    """
+    return accept_updates([(signal, epoch, seq)])[0]
+
+
+def accept_updates(updates: Iterable[tuple[str, Any | None, Any | None]]) -> list[bool]:
+    """Check a batch of ``(signal, epoch, seq)`` updates with a single Redis round trip
+
+    Updates to the same signal are checked in order, so a batch may contain several
+    updates of one signal. If Redis is unavailable every update is accepted.
+
+    Returns:
+        list: One bool per update, False for duplicates
+    """
+    updates = list(updates)
+    results = [True] * len(updates)
+    numbered = [i for i, (_, _, seq) in enumerate(updates) if seq is not None]
+    if not numbered:
+        return results
+
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(HWM_KEY)
+        script = _get_script()
+        pipe = cache.pipeline()
+        for i in numbered:
+            signal, epoch, seq = updates[i]
+            script(keys=[key], args=[signal, cint(epoch), cint(seq)], client=pipe)
+
+        for i, accepted in zip(numbered, pipe.execute(), strict=True):
+            results[i] = bool(accepted)
+
+    except Exception as e:
+        logger.error("Error checking signal update sequence numbers: %s", e)
+
+    return results
+
+
+def claim_change(signal: str, value: Any) -> bool:
+    """Claim a change of a signal to a value, so its actions run only once
+
+    Atomically records the value as the signal's last claimed value. If Redis is
+    unavailable the change is claimed.
+
+    Args:
+        value: The typed value - bool for digital signals, float otherwise
+
+    Returns:
+        bool: False if the signal's last claimed value already is this value
+    """
+    try:
+        cache = frappe.cache()
+        script = _get_claim_script()
+        return bool(script(keys=[cache.make_key(CLAIMED_KEY)], args=[signal, json.dumps(value)]))
+
+    except Exception as e:
+        logger.error("Error claiming change of %s: %s", signal, e)
+        return True
+
+
+def reset(signal: str | None = None) -> None:
+    """Forget the high-water mark and claimed value of one signal, or of all signals"""
+    cache = frappe.cache()
+    if signal:
+        cache.hdel(HWM_KEY, signal)
+        cache.hdel(CLAIMED_KEY, signal)
+    else:
+        cache.delete_key(HWM_KEY)
+        cache.delete_key(CLAIMED_KEY)
@@ -1,165 +1,357 @@
 # Copyright (c) 2024, Applied Relevance and contributors
 # For license information, please see license.txt
 
+import inspect
+from collections.abc import Iterable, Sequence
+from enum import Enum
+from typing import Any, NamedTuple
+
 import frappe
 from frappe import _
-from typing import Any, Callable, Optional, Union
-from enum import Enum
-from epibus.epibus.utils.epinomy_logger import get_logger
+from frappe.utils import flt
+from pymodbus.client import ModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusException, ModbusIOException
+
+from epibus.epibus.utils.epinomy_logger import get_logger, log_error
+
+# decode_registers, encode_value and the data type constants are still imported from here
+from epibus.epibus.utils.value_codec import (
+    BIG_ENDIAN,
+    DATA_TYPES,
+    DEFAULT_DATA_TYPE,
+    LITTLE_ENDIAN,
+    decode_block,
+    decode_registers,
+    encode,
+    encode_value,
+    register_count,
+)
 
 logger = get_logger(__name__)
 
 class SignalType(Enum):
     """Enum of supported Modbus signal types"""
     DIGITAL_OUTPUT = "Digital Output Coil"
-    DIGITAL_INPUT = "Digital Input Contact" 
+    DIGITAL_INPUT = "Digital Input Contact"
     ANALOG_INPUT = "Analog Input Register"
     ANALOG_OUTPUT = "Analog Output Register"
     HOLDING_REGISTER = "Holding Register"
 
+# Modbus table of each signal type: (read function code, writable)
+SIGNAL_TABLES = {
+    SignalType.DIGITAL_OUTPUT.value: (1, True),
+    SignalType.DIGITAL_INPUT.value: (2, False),
+    SignalType.ANALOG_INPUT.value: (4, False),
+    SignalType.ANALOG_OUTPUT.value: (3, True),
+    SignalType.HOLDING_REGISTER.value: (3, True),
+}
+
+READ_METHODS = {
+    1: "read_coils",
+    2: "read_discrete_inputs",
+    3: "read_holding_registers",
+    4: "read_input_registers",
+}
+
+BIT_FUNCTION_CODES = (1, 2)
+
+# Largest block a single Modbus request may read or write
+MAX_BLOCK_BITS = 2000
+MAX_BLOCK_REGISTERS = 125
+MAX_WRITE_BITS = 1968
+MAX_WRITE_REGISTERS = 123
+
+# Unused addresses a block read may read through rather than starting a new request
+MAX_GAP_BITS = 16
+MAX_GAP_REGISTERS = 4
+
+# Errors that mean the connection itself is unusable; never swallowed per signal
+CONNECTION_ERRORS = (ConnectionException, ModbusIOException, ConnectionError, OSError)
+
+# Keyword the client's request methods take the unit id by: pymodbus 3.10 renamed slave to device_id
+UNIT_KEYWORD = "device_id" if "device_id" in inspect.signature(ModbusTcpClient.read_coils).parameters else "slave"
+
+
+class SignalRequest(NamedTuple):
+    """A signal to read or write, and how its registers encode the value"""
+    signal_type: str
+    address: int
+    data_type: str = DEFAULT_DATA_TYPE
+    word_order: str = BIG_ENDIAN
+    byte_order: str = BIG_ENDIAN
+    scale: float = 1.0
+
+    @classmethod
+    def from_signal(cls, signal) -> "SignalRequest":
+        """Build a request from a Modbus Signal document or row"""
+        return cls(
+            signal.signal_type,
+            int(signal.modbus_address),
+            signal.get("data_type") or DEFAULT_DATA_TYPE,
+            signal.get("word_order") or BIG_ENDIAN,
+            signal.get("byte_order") or BIG_ENDIAN,
+            flt(signal.get("scale")) or 1.0,
+        )
+
+    @property
+    def width(self) -> int:
+        """Number of bits or registers the signal occupies"""
+        return register_count(self.signal_type, self.data_type)
+
+
+def plan_blocks(items: Iterable[tuple[int, int, Any]], bits: bool,
+                max_gap: int | None = None) -> list[tuple[int, int, list[tuple[int, Any]]]]:
+    """Merge addresses of one Modbus table into block reads
+
+    Args:
+        items: (address, width, key) per signal
+        bits: Whether the table is bit addressed
+        max_gap: Unused addresses a block may span. Defaults to MAX_GAP_BITS / MAX_GAP_REGISTERS.
+
+    Returns:
+        list: (start, count, [(offset, key), ...]) per block
+    """
+    max_count = MAX_BLOCK_BITS if bits else MAX_BLOCK_REGISTERS
+    if max_gap is None:
+        max_gap = MAX_GAP_BITS if bits else MAX_GAP_REGISTERS
+
+    blocks = []
+    block = None
+    for address, width, key in sorted(items, key=lambda item: item[0]):
+        end = address + width
+        if block and address - (block[0] + block[1]) <= max_gap and end - block[0] <= max_count:
+            block[1] = max(block[1], end - block[0])
+        else:
+            block = [address, width, []]
+            blocks.append(block)
+        block[2].append((address - block[0], key))
+
+    return [tuple(block) for block in blocks]
+
+
 class SignalHandler:
     """Handles read/write operations for different Modbus signal types"""
-    
-    def __init__(self, client):
+
+    def __init__(self, client, unit: int | None = None):
         """Initialize with a Modbus client
-        
+
         Args:
             client: A connected ModbusTcpClient instance
+            unit: Modbus unit (device) ID. Defaults to the client's default unit (1).
         """
         self.client = client
-        self.handlers = {
-            SignalType.DIGITAL_OUTPUT: (
-                lambda addr: self.client.read_coils(address=addr, count=1), 
-                lambda addr, val: self.client.write_coil(address=addr, value=val),
-                bool
-            ),
-            SignalType.DIGITAL_INPUT: (
-                lambda addr: self.client.read_discrete_inputs(address=addr, count=1),
-                None,
-                bool
-            ),
-            SignalType.ANALOG_INPUT: (
-                lambda addr: self.client.read_input_registers(address=addr, count=1),
-                None,
-                float
-            ),
-            SignalType.ANALOG_OUTPUT: (
-                lambda addr: self.client.read_holding_registers(address=addr, count=1),
-                lambda addr, val: self.client.write_register(address=addr, value=val),
-                float
-            ),
-            SignalType.HOLDING_REGISTER: (
-                lambda addr: self.client.read_holding_registers(address=addr, count=1),
-                lambda addr, val: self.client.write_register(address=addr, value=val),
-                float
-            )
-        }
+        # Only pass the unit when it differs from pymodbus' default
+        self.unit_kwargs = {UNIT_KEYWORD: unit} if unit and unit != 1 else {}
+
+    def get_handler(self, signal_type: str) -> tuple[int, bool]:
+        """Get the Modbus table of a signal type
 
-    def get_handler(self, signal_type: str) -> tuple[Callable, Optional[Callable], type]:
-        """Get the appropriate handler functions for a signal type
-        
         Args:
             signal_type: The signal type string from the ModbusSignal doc
-            
+
         Returns:
-            Tuple of (read_fn, write_fn, type_converter)
-            
+            Tuple of (read function code, writable)
+
         Raises:
             ValueError: If signal type is not supported
         """
-        for sig_type in SignalType:
-            if sig_type.value == signal_type:
-                return self.handlers[sig_type]
-        raise ValueError(f"Unsupported signal type: {signal_type}")
+        table = SIGNAL_TABLES.get(signal_type)
+        if table is None:
+            raise ValueError(f"Unsupported signal type: {signal_type}")
+        return table
 
-    def read(self, signal_type: str, address: int) -> Union[bool, float]:
+    def read(self, signal_type: str, address: int, data_type: str = DEFAULT_DATA_TYPE,
+             word_order: str = BIG_ENDIAN, byte_order: str = BIG_ENDIAN,
+             scale: float = 1.0) -> bool | float:
         """Read a value from a signal
-        
+
         Args:
             signal_type: The signal type string
             address: Modbus address to read from
-            
+            data_type, word_order, byte_order, scale: Register encoding (see decode_registers)
+
         Returns:
             bool for digital signals, float for analog signals
-            
+
         Raises:
             ValueError: If signal type is not supported
             ModbusException: If read operation fails
         """
-        read_fn, _, conv_fn = self.get_handler(signal_type)
-        response = read_fn(address)
-        return conv_fn(response.bits[0] if hasattr(response, 'bits') else response.registers[0])
+        request = SignalRequest(signal_type, address, data_type, word_order, byte_order, scale)
+        value = self.read_many([request])[0]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def read_many(self, requests: Sequence[SignalRequest]) -> list[Any]:
+        """Read many signals with as few Modbus requests as possible
+
+        Requests are grouped per Modbus table and merged into block reads, and each
+        block is decoded in one pass (value_codec.decode_block).
+
+        Args:
+            requests: Signals to read
+
+        Returns:
+            Values in request order: bool for digital signals, float for analog signals.
+            A signal that could not be read holds the exception instead of a value.
 
-    def write(self, signal_type: str, address: int, value: Union[bool, float]) -> None:
+        Raises:
+            ConnectionException: If the connection failed; the client should not be reused
+        """
+        results: list[Any] = [None] * len(requests)
+        tables: dict[int, list[tuple[int, int, int]]] = {}
+
+        for i, request in enumerate(requests):
+            try:
+                function_code, _ = self.get_handler(request.signal_type)
+                if function_code not in BIT_FUNCTION_CODES and request.data_type not in DATA_TYPES:
+                    raise ValueError(f"Unsupported data type: {request.data_type}")
+                tables.setdefault(function_code, []).append((request.address, request.width, i))
+            except ValueError as e:
+                results[i] = e
+
+        for function_code, items in tables.items():
+            bits = function_code in BIT_FUNCTION_CODES
+            read_fn = getattr(self.client, READ_METHODS[function_code])
+
+            for start, count, members in plan_blocks(items, bits):
+                try:
+                    response = read_fn(address=start, count=count, **self.unit_kwargs)
+                    if response.isError():
+                        raise ModbusException(f"Read of {count} at {start} failed: {response}")
+
+                    data = response.bits if bits else response.registers
+                    values = decode_block(data, [(offset, requests[i]) for offset, i in members])
+                    for (_, i), value in zip(members, values, strict=True):
+                        results[i] = value
+
+                except CONNECTION_ERRORS:
+                    raise
+                except Exception as e:
+                    for _, i in members:
+                        results[i] = e
+
+        return results
+
+    def write(self, signal_type: str, address: int, value: bool | float,
+              data_type: str = DEFAULT_DATA_TYPE, word_order: str = BIG_ENDIAN,
+              byte_order: str = BIG_ENDIAN, scale: float = 1.0) -> None:
         """Write a value to a signal
-        
+
         Args:
             signal_type: The signal type string
             address: Modbus address to write to
             value: Value to write (bool for digital, float for analog)
-            
+            data_type, word_order, byte_order, scale: Register encoding (see encode_value)
+
         Raises:
             ValueError: If signal type is not supported or is read-only
             ModbusException: If write operation fails
         """
-        _, write_fn, conv_fn = self.get_handler(signal_type)
-        if not write_fn:
-            raise ValueError(f"Cannot write to read-only signal type: {signal_type}")
-        write_fn(address, conv_fn(value))
+        self.write_many([(SignalRequest(signal_type, address, data_type, word_order, byte_order, scale), value)])
+
+    def write_many(self, writes: Sequence[tuple[SignalRequest, bool | float]]) -> None:
+        """Write many signals with as few Modbus requests as possible
+
+        Every value is validated and encoded before anything is written. Adjacent
+        addresses are written together; gaps are never written through.
+
+        Args:
+            writes: (signal, value) pairs. A later write to the same address wins.
+
+        Raises:
+            ValueError: If a signal type is not supported, is read-only or a value is not a number or does not fit
+            ModbusException: If a write operation fails
+        """
+        tables: dict[int, dict[int, Any]] = {}
+
+        for request, value in writes:
+            function_code, writable = self.get_handler(request.signal_type)
+            if not writable:
+                raise ValueError(f"Cannot write to read-only signal type: {request.signal_type}")
+            if request.data_type not in DATA_TYPES:
+                raise ValueError(f"Unsupported data type: {request.data_type}")
+
+            table = tables.setdefault(function_code, {})
+            for offset, word in enumerate(encode(request, value)):
+                table[request.address + offset] = word
+
+        for function_code, table in tables.items():
+            bits = function_code in BIT_FUNCTION_CODES
+            max_count = MAX_WRITE_BITS if bits else MAX_WRITE_REGISTERS
 
-# In modbus_handlers.py
+            for start, values in self._contiguous_runs(table, max_count):
+                if bits:
+                    response = (self.client.write_coil(address=start, value=values[0], **self.unit_kwargs)
+                                if len(values) == 1 else
+                                self.client.write_coils(address=start, values=values, **self.unit_kwargs))
+                else:
+                    response = (self.client.write_register(address=start, value=values[0], **self.unit_kwargs)
+                                if len(values) == 1 else
+                                self.client.write_registers(address=start, values=values, **self.unit_kwargs))
+
+                if response.isError():
+                    raise ModbusException(f"Write of {len(values)} at {start} failed: {response}")
+
+    @staticmethod
+    def _contiguous_runs(table: dict[int, Any], max_count: int) -> list[tuple[int, list[Any]]]:
+        runs: list[tuple[int, list[Any]]] = []
+        for address in sorted(table):
+            if runs and runs[-1][0] + len(runs[-1][1]) == address and len(runs[-1][1]) < max_count:
+                runs[-1][1].append(table[address])
+            else:
+                runs.append((address, [table[address]]))
+        return runs
 
 def handle_doc_event(doc, method):
-    """Handle document events and execute relevant Modbus Actions"""
+    """Execute the DocType Event Modbus Actions for a document event
+
+    Attached to every document event (``doc_events["*"]``). The matching actions
+    come from the per-worker dispatch table, so events without actions cost one
+    dict lookup and matching actions and their Server Scripts aren't re-fetched.
+    """
+    if frappe.flags.in_install or frappe.flags.in_migrate or frappe.flags.in_patch:
+        return
+
+    from epibus.epibus.utils.action_cache import get_cached_doc, get_doc_event_actions
+    from epibus.epibus.utils.action_throttle import RateLimit, gate
+
     try:
-        # Find all Modbus Actions configured for this doctype and event
-        actions = frappe.get_all(
-            "Modbus Action",
-            filters={
-                "trigger_doctype": doc.doctype,
-                "docstatus": 1  # Only consider submitted actions
-            },
-            fields=["name", "server_script"]
-        )
-        
-        if not actions:
-            return
-            
-        logger.debug(
-            f"Found {len(actions)} Modbus Action(s) for {doc.doctype} "
-            f"event {method}"
-        )
-        
-        # Execute each matching action
-        for action in actions:
-            try:
-                action_doc = frappe.get_doc("Modbus Action", action.name)
-                script = frappe.get_doc("Server Script", action.server_script)
-                
-                if script.script_type == "API":
-                    result = action_doc.execute_script(doc)
-                    if result.get("status") != "success":
-                        logger.error(
-                            f"Modbus Action {action.name} failed: "
-                            f"{result.get('error', 'Unknown error')}"
-                        )
-                else:
-                    action_doc.execute_script(doc)
-                    
-            except Exception as e:
+        action_names = get_doc_event_actions(doc.doctype, method)
+    except Exception as e:
+        logger.error("Error looking up Modbus Actions for %s %s: %s", doc.doctype, method, e)
+        return
+
+    if not action_names:
+        return
+
+    logger.debug(
+        f"Found {len(action_names)} Modbus Action(s) for {doc.doctype} "
+        f"event {method}"
+    )
+
+    # Execute each matching action
+    for action_name in action_names:
+        try:
+            action_doc = get_cached_doc("Modbus Action", action_name)
+            payload = {"kind": "doc", "doctype": doc.doctype, "name": doc.name}
+            with gate(action_name, RateLimit.from_action(action_doc), payload) as admitted:
+                if not admitted:
+                    continue
+                result = action_doc.execute_script(doc)
+            if isinstance(result, dict) and result.get("status") == "error":
                 logger.error(
-                    f"Error executing Modbus Action {action.name}: {str(e)}"
-                )
-                frappe.log_error(
-                    frappe.get_traceback(),
-                    f"Modbus Action Event Handler Error - {action.name}"
+                    f"Modbus Action {action_name} failed: "
+                    f"{result.get('error', 'Unknown error')}"
                 )
-                
-    except Exception as e:
-        logger.error(
-            f"Error handling {method} event for {doc.doctype}: {str(e)}"
-        )
-        frappe.log_error(
-            frappe.get_traceback(),
-            "Modbus Action Event Handler Error"
-        )
\ No newline at end of file
+
+        except Exception as e:
+            logger.error(
+                "Error executing Modbus Action %s: %s", action_name, e
+            )
+            log_error(
+                f"Modbus Action Event Handler Error - {action_name}",
+                message=frappe.get_traceback(),
+                fingerprint=f"handle_doc_event:{action_name}:{type(e).__name__}",
+            )
@@ -0,0 +1,325 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Bulk import of signal maps from PLC program CSV files (see plc_programs/Beachside.csv).
+
+The CSVs are sectioned: a header row names the address columns ("Modbus Address",
+"PLC Address", "Modbus Coils", "Modbus Register") and the rows below it are signals.
+A row with a name but no address is a section title ("PLC to ERP (digital coils)")
+and keeps the columns of the section above. Rows before the first header - title,
+IP address table - are skipped.
+
+A signal's type comes from its PLC address prefix (%QX, %IX, %IW, %QW, %MW). Without
+one, a "Modbus Register" column means a Holding Register and a "Modbus Coils" or
+digital section means a Digital Output Coil.
+
+Signals are matched to existing ones by name, ignoring case, spaces and underscores,
+so "PLC CYCLE RUNNING" updates "PLC_CYCLE_RUNNING". Nothing is written when any row
+fails validation, and a dry run only returns the diff.
+"""
+
+import csv
+import io
+import re
+from typing import Any, Optional
+
+import frappe
+from frappe.utils import cint, sbool
+
+from epibus.epibus.utils import address_index
+from epibus.epibus.utils.epinomy_logger import get_logger
+from epibus.epibus.utils.signal_handler import register_count
+
+logger = get_logger(__name__)
+
+PLC_ADDRESS_PATTERN = re.compile(r"^%([A-Z]{2})\d+(\.\d+)?$")
+INTEGER_PATTERN = re.compile(r"^\d+$")
+
+# Column roles recognised in section headers
+COLUMN_ADDRESS = "address"
+COLUMN_COIL = "coil"
+COLUMN_REGISTER = "register"
+COLUMN_PLC = "plc"
+
+
+def normalize_name(signal_name: str) -> str:
+    """Key used to match CSV rows to existing signals"""
+    return re.sub(r"[\s_]+", " ", signal_name or "").strip().upper()
+
+
+def _header_columns(row: list[str]) -> dict[int, str]:
+    """Map column index -> role if the row is a section header"""
+    columns = {}
+    for i, cell in enumerate(row[1:], start=1):
+        label = cell.strip().lower()
+        if "plc address" in label:
+            columns[i] = COLUMN_PLC
+        elif "modbus" in label and "coil" in label:
+            columns[i] = COLUMN_COIL
+        elif "modbus" in label and "register" in label:
+            columns[i] = COLUMN_REGISTER
+        elif "modbus" in label and "address" in label:
+            columns[i] = COLUMN_ADDRESS
+    has_address = any(role != COLUMN_PLC for role in columns.values())
+    return columns if has_address else {}
+
+
+def _section_default_type(title: str) -> str | None:
+    title = title.lower()
+    if "register" in title:
+        return "Holding Register"
+    if "digital" in title or "bit" in title or "coil" in title:
+        return "Digital Output Coil"
+    return None
+
+
+def parse_signal_map(content: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Parse a sectioned PLC program CSV
+
+    Args:
+        content: CSV text
+
+    Returns:
+        tuple: (signals, errors). Signals are dicts of signal_name, signal_type,
+            modbus_address, plc_address and line; errors are dicts of line and message.
+    """
+    from epibus.epibus.doctype.modbus_signal.modbus_signal import SIGNAL_TYPE_MAPPINGS, plc_address_for
+
+    types_by_prefix = {config["prefix"]: signal_type for signal_type, config in SIGNAL_TYPE_MAPPINGS.items()}
+
+    signals = []
+    errors = []
+    columns: dict[int, str] = {}
+    section_type = None
+
+    for line, row in enumerate(csv.reader(io.StringIO(content)), start=1):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+
+        header = _header_columns(cells)
+        if header:
+            columns = header
+            section_type = _section_default_type(cells[0])
+            continue
+
+        if not columns or not cells[0]:
+            continue
+
+        values = {role: cells[i] if i < len(cells) else "" for i, role in columns.items()}
+        addresses = {role: value for role, value in values.items() if role != COLUMN_PLC and INTEGER_PATTERN.match(value)}
+        if not addresses:
+            # A section title without its own header row, or a note
+            section_type = _section_default_type(cells[0])
+            continue
+
+        signal_name = cells[0]
+        plc_address = values.get(COLUMN_PLC, "").upper()
+        role, modbus_address = next(iter(addresses.items()))
+        modbus_address = cint(modbus_address)
+
+        if plc_address:
+            match = PLC_ADDRESS_PATTERN.match(plc_address)
+            signal_type = types_by_prefix.get(match.group(1)) if match else None
+            if not signal_type:
+                errors.append({"line": line, "message": f"{signal_name}: unknown PLC address {plc_address}"})
+                continue
+        elif role == COLUMN_REGISTER:
+            signal_type = "Holding Register"
+        elif role == COLUMN_COIL:
+            signal_type = "Digital Output Coil"
+        elif section_type:
+            signal_type = section_type
+        else:
+            errors.append({"line": line, "message": f"{signal_name}: cannot infer signal type"})
+            continue
+
+        modbus_start, modbus_end = SIGNAL_TYPE_MAPPINGS[signal_type]["modbus_range"]
+        if not modbus_start <= modbus_address <= modbus_end:
+            errors.append({"line": line, "message": (
+                f"{signal_name}: Modbus address {modbus_address} out of range "
+                f"({modbus_start}-{modbus_end}) for {signal_type}")})
+            continue
+
+        expected = plc_address_for(signal_type, modbus_address)
+        if plc_address and plc_address != expected:
+            errors.append({"line": line, "message": (
+                f"{signal_name}: PLC address {plc_address} does not match "
+                f"Modbus address {modbus_address} ({expected})")})
+            continue
+
+        signals.append({
+            "signal_name": signal_name,
+            "signal_type": signal_type,
+            "modbus_address": modbus_address,
+            "plc_address": expected,
+            "line": line,
+        })
+
+    return signals, errors
+
+
+def diff_signal_map(connection_doc, signals: list[dict[str, Any]], remove_missing: bool = False) -> dict[str, Any]:
+    """Compare parsed signals with a connection's signals
+
+    Returns:
+        dict: added, updated (with per-field [old, new] changes), unchanged count,
+            removed or unmatched existing signals, and errors (duplicates, shared addresses)
+    """
+    from epibus.epibus.doctype.modbus_signal.modbus_signal import SIGNAL_TYPE_MAPPINGS
+
+    existing = {normalize_name(s.signal_name): s for s in (connection_doc.signals if connection_doc else [])}
+    seen = {}
+    diff = {"added": [], "updated": [], "unchanged": 0, "removed": [], "unmatched": [], "errors": []}
+
+    for signal in signals:
+        key = normalize_name(signal["signal_name"])
+        if key in seen:
+            diff["errors"].append({"line": signal["line"], "message": (
+                f"{signal['signal_name']}: duplicate of line {seen[key]['line']}")})
+            continue
+        seen[key] = signal
+
+        current = existing.get(key)
+        if current is None:
+            diff["added"].append(signal)
+            continue
+
+        changes = {
+            field: [current.get(field), signal[field]]
+            for field in ("signal_type", "modbus_address")
+            if current.get(field) != signal[field]
+        }
+        if changes:
+            diff["updated"].append({"name": current.name, "signal_name": current.signal_name,
+                                    "line": signal["line"], "changes": changes})
+        else:
+            diff["unchanged"] += 1
+
+    missing = [
+        {"name": s.name, "signal_name": s.signal_name}
+        for key, s in existing.items() if key not in seen
+    ]
+    diff["removed" if remove_missing else "unmatched"] = missing
+
+    # Shared addresses in the resulting signal table
+    removed = {s["name"] for s in missing} if remove_missing else set()
+    entries = [
+        {"name": s.signal_name, "connection": None,
+         "function_code": SIGNAL_TYPE_MAPPINGS[s.signal_type]["function_code"], "modbus_address": s.modbus_address,
+         "width": register_count(s.signal_type, s.data_type)}
+        for key, s in existing.items()
+        if key not in seen and s.name not in removed and s.signal_type in SIGNAL_TYPE_MAPPINGS
+    ]
+    entries += [
+        {"name": s["signal_name"], "connection": None,
+         "function_code": SIGNAL_TYPE_MAPPINGS[s["signal_type"]]["function_code"], "modbus_address": s["modbus_address"]}
+        for s in seen.values()
+    ]
+    for conflict in address_index.find_conflicts(entries):
+        diff["errors"].append({"line": None, "message": (
+            f"Signals {', '.join(conflict['signals'])} share Modbus address {conflict['modbus_address']} "
+            f"(function code {conflict['function_code']})")})
+
+    return diff
+
+
+def import_signal_map(connection: str, content: str, dry_run: bool = True, remove_missing: bool = False,
+                      host: str | None = None, port: int | None = None) -> dict[str, Any]:
+    """Insert or update a connection's signals from a PLC program CSV
+
+    All changes are made with a single save of the Modbus Connection, so they land
+    in one transaction. Nothing is written on a dry run or if any row is invalid.
+
+    Args:
+        connection: Modbus Connection name; created if it doesn't exist and a host is given
+        content: CSV text
+        dry_run: Only return the diff
+        remove_missing: Delete signals that are not in the CSV
+        host: Host for a new connection
+        port: Port for a new connection (default 502)
+
+    Returns:
+        dict: success flag, applied flag and the diff
+    """
+    signals, errors = parse_signal_map(content)
+
+    connection_doc = frappe.get_doc("Modbus Connection", connection) \
+        if frappe.db.exists("Modbus Connection", connection) else None
+
+    diff = diff_signal_map(connection_doc, signals, remove_missing)
+    diff["errors"] = errors + diff["errors"]
+    diff["connection"] = connection
+    diff["create"] = connection_doc is None
+
+    if diff["errors"]:
+        return {"success": False, "applied": False, "message": f"{len(diff['errors'])} invalid row(s)", "diff": diff}
+
+    if connection_doc is None and not host:
+        return {"success": False, "applied": False,
+                "message": f"Modbus Connection {connection} does not exist - pass a host to create it", "diff": diff}
+
+    if dry_run:
+        return {"success": True, "applied": False, "diff": diff}
+
+    if connection_doc is None:
+        connection_doc = frappe.get_doc({
+            "doctype": "Modbus Connection",
+            "device_name": connection,
+            "device_type": "PLC",
+            "host": host,
+            "port": cint(port) or 502,
+            "enabled": 1,
+        })
+
+    rows = {s.name: s for s in connection_doc.signals}
+    for update in diff["updated"]:
+        row = rows[update["name"]]
+        for field, (_, new) in update["changes"].items():
+            row.set(field, new)
+
+    for signal in diff["added"]:
+        connection_doc.append("signals", {
+            "signal_name": signal["signal_name"],
+            "signal_type": signal["signal_type"],
+            "modbus_address": signal["modbus_address"],
+        })
+
+    if remove_missing:
+        removed = {s["name"] for s in diff["removed"]}
+        connection_doc.signals = [s for s in connection_doc.signals if s.name not in removed]
+
+    connection_doc.save()
+
+    logger.info(
+        f"Imported signal map into {connection}: {len(diff['added'])} added, "
+        f"{len(diff['updated'])} updated, {len(diff['removed'])} removed"
+    )
+    return {"success": True, "applied": True, "diff": diff}
+
+
+@frappe.whitelist(methods=["POST"])
+def import_signal_map_file(connection: str, file_url: str | None = None, content: str | None = None,
+                           dry_run: Any = True, remove_missing: Any = False,
+                           host: str | None = None, port: int | None = None) -> dict[str, Any]:
+    """Import a signal map from an uploaded File or from CSV text - see import_signal_map
+
+    Dry run by default; pass dry_run=0 to apply.
+    """
+    try:
+        if not frappe.has_permission("Modbus Connection", "write"):
+            return {"success": False, "message": "Not permitted to modify Modbus Connections"}
+
+        if file_url:
+            content = frappe.get_doc("File", {"file_url": file_url}).get_content()
+            if isinstance(content, bytes):
+                content = content.decode("utf-8-sig")
+        if not content:
+            return {"success": False, "message": "Pass a file_url or CSV content"}
+
+        return import_signal_map(connection, content, dry_run=sbool(dry_run), remove_missing=sbool(remove_missing),
+                                 host=host, port=port)
+
+    except Exception as e:
+        logger.error("Error importing signal map into %s: %s", connection, e)
+        return {"success": False, "message": str(e)}
@@ -1,32 +1,68 @@
 # epibus/epibus/utils/signal_monitor.py
-from epibus.epibus.doctype.modbus_connection.modbus_connection import ModbusConnection
-from epibus.epibus.doctype.modbus_action.modbus_action import ModbusAction
+"""Signal monitor: polls monitored signals and publishes their changes.
+
+The set of monitored signals lives in Redis (``MONITORED_KEY``: signal -> connection),
+so ``start_monitoring`` can be called from any web worker and the monitor process
+sees it on its next scan. Last values live in the shared live value cache, which
+is also what change detection compares against.
+
+The monitor runs as its own long-lived process (``bench run-signal-monitor``, kept up
+by supervisor) and scans every ``SCAN_INTERVAL`` seconds: one block read per device
+and Modbus table, one Redis round trip for the previous values and one for the new
+ones, and one realtime batch with only the signals that changed. Each scan also
+enqueues the trailing Modbus Action runs that have come due (``action_throttle.run_due``).
+"""
+
+import signal
+import time
 import frappe
-from frappe.realtime import publish_realtime
 from frappe.utils import now
-from epibus.epibus.doctype.modbus_event.modbus_event import ModbusEvent
+from epibus.epibus.utils import action_throttle, live_values
 from epibus.epibus.utils.epinomy_logger import get_logger
-from typing import Dict, Any, Optional, cast, TypeVar, Union
-from collections import defaultdict
+from epibus.epibus.utils.modbus_pool import lease_client
+from epibus.epibus.utils.signal_handler import SignalHandler, SignalRequest
+from epibus.epibus.utils.realtime_batcher import queue_signal_update, flush as flush_realtime
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 logger = get_logger(__name__)
 
 SignalValue = Union[bool, float, int]
 
+# Redis hash of monitored signals: signal name -> connection name
+MONITORED_KEY = "epibus:monitor:signals"
+
+# Redis key holding the running monitor's last scan time
+HEARTBEAT_KEY = "epibus:monitor:heartbeat"
+
+# Seconds between scans
+SCAN_INTERVAL = 0.25
+
+# Seconds without a scan after which the monitor is reported as not running
+HEARTBEAT_TIMEOUT = 10
+
+# Seconds device settings and signal definitions are reused before reloading them
+CONFIG_TTL = 30
+
+LIVE_SOURCE = "monitor"
+
 
 class SignalMonitor:
     """Monitors Modbus signals and publishes changes via Frappe's realtime"""
 
     _instance: Optional['SignalMonitor'] = None
-    active_signals: Dict[str, SignalValue] = {}  # {signal_name: last_value}
-    device_signals: Dict[str, list] = defaultdict(
-        list)  # {device_name: [signal_names]}
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._devices = {}
+            cls._instance._devices_loaded = 0.0
         return cls._instance
 
+    @property
+    def active_signals(self) -> Dict[str, str]:
+        """Monitored signals: {signal_name: connection_name}"""
+        return get_monitored_signals()
+
     def _start_monitoring_impl(self, signal_id: str) -> Dict[str, Any]:
         """Internal implementation of start monitoring
 
@@ -37,7 +73,7 @@ class SignalMonitor:
             dict: Status of monitoring request
         """
         try:
-            if signal_id in self.active_signals:
+            if frappe.cache().hget(MONITORED_KEY, signal_id):
                 return {
                     "success": True,
                     "message": f"Already monitoring {signal_id}"
@@ -50,8 +86,7 @@ class SignalMonitor:
 
             # Get parent device document
             parent_name = str(signal_doc.get("parent"))
-            device_doc = cast(ModbusConnection, frappe.get_doc(
-                "Modbus Connection", parent_name))
+            device_doc = frappe.get_doc("Modbus Connection", parent_name)
             if not device_doc:
                 raise ValueError(f"Device not found for signal {signal_id}")
 
@@ -61,14 +96,14 @@ class SignalMonitor:
                     "message": f"Device {device_doc.name} is disabled"
                 }
 
-            # Store initial value
-            value = device_doc.read_signal(signal_doc)
-            self.active_signals[signal_id] = value
+            # Store initial value; read_signal records it in the live value cache
+            value = signal_doc.read_signal()
+            frappe.cache().hset(MONITORED_KEY, signal_id, parent_name)
 
-            # Group signals by device for batch reading
-            self.device_signals[parent_name].append(signal_id)
+            if not is_monitor_running():
+                logger.warning("Monitoring %s, but no signal monitor is running", signal_id)
 
-            logger.info(f"Started monitoring signal {signal_id}")
+            logger.info("Started monitoring signal %s", signal_id)
             return {
                 "success": True,
                 "message": f"Started monitoring {signal_id}",
@@ -77,111 +112,200 @@ class SignalMonitor:
 
         except Exception as e:
             logger.error(
-                f"Error starting monitoring for {signal_id}: {str(e)}")
+                "Error starting monitoring for %s: %s", signal_id, e)
             return {
                 "success": False,
                 "message": str(e)
             }
 
-    def check_signals(self) -> None:
-        """Poll active signals and publish changes. Called by scheduler."""
-        logger.info(
-            f"Signal checker starting - monitoring {len(self.active_signals)} signals")
+    def _stop_monitoring_impl(self, signal_id: str) -> Dict[str, Any]:
+        frappe.cache().hdel(MONITORED_KEY, signal_id)
+        logger.info("Stopped monitoring signal %s", signal_id)
+        return {"success": True, "message": f"Stopped monitoring {signal_id}"}
+
+    def _forget(self, signal_names: List[str]) -> None:
+        for signal_name in signal_names:
+            frappe.cache().hdel(MONITORED_KEY, signal_name)
+
+    def _load_devices(self, monitored: Dict[str, str]) -> Dict[str, Tuple[Any, List[str], List[SignalRequest]]]:
+        """Device settings and read requests of the monitored signals, grouped by connection
+
+        Reloaded when the monitored set changes or after CONFIG_TTL seconds, so a scan
+        normally doesn't touch the database.
+        """
+        signature = frozenset(monitored.items())
+        if (self._devices.get("signature") == signature
+                and time.monotonic() - self._devices_loaded < CONFIG_TTL):
+            return self._devices["devices"]
+
+        by_device: Dict[str, List[str]] = {}
+        for signal_name, device_name in monitored.items():
+            by_device.setdefault(device_name, []).append(signal_name)
+
+        devices = {}
+        for device_name, signal_names in by_device.items():
+            if not frappe.db.exists("Modbus Connection", device_name):
+                logger.warning("Device %s no longer exists - stopping monitoring of its signals", device_name)
+                self._forget(signal_names)
+                continue
+
+            device_doc = frappe.get_doc("Modbus Connection", device_name)
+            if not device_doc.enabled:
+                logger.warning(
+                    "Device %s disabled - stopping monitoring of all its signals", device_name)
+                self._forget(signal_names)
+                continue
+
+            signal_docs = {s.name: s for s in device_doc.signals}
+            missing = [name for name in signal_names if name not in signal_docs]
+            if missing:
+                logger.warning(
+                    "Signal(s) %s no longer exist - removing from monitoring", ', '.join(missing))
+                self._forget(missing)
+
+            present = [name for name in signal_names if name in signal_docs]
+            if present:
+                devices[device_name] = (
+                    (device_doc.host, device_doc.port, device_doc.unit_id or 1),
+                    present,
+                    [SignalRequest.from_signal(signal_docs[name]) for name in present],
+                )
+
+        self._devices = {"signature": signature, "devices": devices}
+        self._devices_loaded = time.monotonic()
+        return devices
+
+    def check_signals(self) -> int:
+        """Poll monitored signals once and publish changes
+
+        Returns:
+            int: Number of signals that changed
+        """
+        monitored = self.active_signals
+        frappe.cache().set_value(HEARTBEAT_KEY, time.time())
 
-        if not self.active_signals:
+        if not monitored:
             logger.debug("No active signals to monitor")
-            return
+            return 0
+
+        devices = self._load_devices(monitored)
+        previous = live_values.get_values(monitored)
+        readings = []
+        changes = []
+        changed = 0
 
         # Process signals grouped by device to minimize connections
-        for device_name, signal_names in self.device_signals.items():
+        for device_name, (address, signal_names, requests) in devices.items():
             try:
-                device_doc = cast(ModbusConnection, frappe.get_doc(
-                    "Modbus Connection", device_name))
-
-                if not device_doc.enabled:
-                    logger.warning(
-                        f"Device {device_name} disabled - stopping monitoring of all its signals")
-                    for signal_name in signal_names:
-                        if signal_name in self.active_signals:
-                            del self.active_signals[signal_name]
-                    del self.device_signals[device_name]
+                # Lease a single pooled client connection for all signals on this device
+                with lease_client(*address) as client:
+                    values = SignalHandler(client, address[2]).read_many(requests)
+            except Exception as e:
+                logger.error(
+                    "Error processing device %s: %s", device_name, e)
+                continue
+
+            ts = time.time()
+            for signal_name, current_value in zip(signal_names, values):
+                if isinstance(current_value, Exception):
+                    logger.error(
+                        "Error checking signal %s: %s", signal_name, current_value)
                     continue
 
-                # Get a single client connection for all signals on this device
-                client = device_doc.get_client()
-
-                for signal_name in signal_names:
-                    try:
-                        signal_doc = frappe.get_doc(
-                            "Modbus Signal", signal_name)
-                        if not signal_doc:
-                            raise frappe.DoesNotExistError(
-                                f"Signal {signal_name} not found")
-
-                        last_value = self.active_signals.get(signal_name)
-                        current_value = device_doc.read_signal(signal_doc)
-
-                        if current_value != last_value:
-                            # Value changed - update cache and publish
-                            self.active_signals[signal_name] = current_value
-
-                            # Log the value change
-                            logger.info(
-                                f"Signal {signal_name} value changed: {last_value} -> {current_value}")
-
-                            # Publish realtime update
-                            update_data = {
-                                'signal': signal_name,
-                                'value': current_value,
-                                'timestamp': now()
-                            }
-                            publish_realtime(
-                                'modbus_signal_update', update_data)
-                            logger.debug(
-                                f"Published update for {signal_name}: {current_value}")
-
-                            # Find and execute relevant actions
-                            actions = frappe.get_all(
-                                "Modbus Action",
-                                filters={
-                                    "signal": signal_name,
-                                    "enabled": 1,
-                                    "trigger_type": "API"
-                                }
-                            )
-
-                            for action in actions:
-                                try:
-                                    action_doc = cast(ModbusAction, frappe.get_doc(
-                                        "Modbus Action", action.name))
-                                    action_doc.execute_script()
-                                except Exception as e:
-                                    logger.error(
-                                        f"Error executing action {action.name}: {str(e)}")
-
-                    except frappe.DoesNotExistError:
-                        logger.warning(
-                            f"Signal {signal_name} no longer exists - removing from monitoring")
-                        if signal_name in self.active_signals:
-                            del self.active_signals[signal_name]
-                        self.device_signals[device_name].remove(signal_name)
-                    except Exception as e:
-                        logger.error(
-                            f"Error checking signal {signal_name}: {str(e)}")
+                readings.append({"signal": signal_name, "value": current_value, "source": LIVE_SOURCE, "ts": ts})
+
+                last_value = (previous.get(signal_name) or {}).get("value")
+                if current_value != last_value:
+                    changed += 1
+                    logger.info(
+                        "Signal %s value changed: %s -> %s", signal_name, last_value, current_value)
+
+                    # Queue realtime update for the next batch
+                    queue_signal_update(signal_name, current_value, timestamp=now(), source=LIVE_SOURCE)
+                    changes.append((signal_name, current_value, ts))
+
+        # Refresh every value's timestamp so it isn't reported stale, changed or not.
+        # Before any action runs, so actions see the new values.
+        live_values.set_values(readings)
+
+        for signal_name, value, ts in changes:
+            self._run_actions(signal_name, value, ts)
+
+        # Publish everything that changed in this pass as one batch
+        flush_realtime()
+        return changed
+
+    def _run_actions(self, signal_name: str, value: SignalValue, changed_at: float) -> None:
+        """Run the Signal Change actions of a signal that changed
+
+        Goes through the same claim, condition checks and action_dispatch as changes
+        reported by the PLC Bridge, so a change both report runs its actions once.
+        Never raises, so one failing action can't stop the scan.
+        """
+        from epibus.api.plc import process_signal_actions
+
+        try:
+            process_signal_actions(signal_name, value, changed_at)
+        except Exception as e:
+            logger.error("Error running actions for %s: %s", signal_name, e)
+
+    def run(self, interval: float = SCAN_INTERVAL) -> None:
+        """Scan until SIGTERM or SIGINT - the body of ``bench run-signal-monitor``
 
+        Scans start every ``interval`` seconds; a scan that overruns is followed
+        immediately by the next one.
+        """
+        stopping = []
+
+        def stop(signum, frame):
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        logger.info("Signal monitor started, scanning every %ss", interval)
+        while not stopping:
+            started = time.monotonic()
+            try:
+                self.check_signals()
+                frappe.db.commit()
             except Exception as e:
-                logger.error(
-                    f"Error processing device {device_name}: {str(e)}")
+                frappe.db.rollback()
+                logger.error("Error in signal monitor scan: %s", e)
 
-            # Clean up empty device groups
-            if not self.device_signals[device_name]:
-                del self.device_signals[device_name]
+            try:
+                # Trailing Modbus Action runs come due at the monitor's resolution
+                action_throttle.run_due()
+            except Exception as e:
+                logger.error("Error enqueueing due trailing action runs: %s", e)
+
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+
+        frappe.cache().delete_value(HEARTBEAT_KEY)
+        logger.info("Signal monitor stopped")
 
 
 # Create singleton instance
 _signal_monitor = SignalMonitor()
 
 
+def get_monitored_signals() -> Dict[str, str]:
+    """Monitored signals: {signal_name: connection_name}
+
+    RedisWrapper.hgetall unpickles the values but leaves the field names as bytes.
+    """
+    return {
+        (name.decode() if isinstance(name, bytes) else name): connection
+        for name, connection in (frappe.cache().hgetall(MONITORED_KEY) or {}).items()
+    }
+
+
+def is_monitor_running() -> bool:
+    """Check whether a signal monitor has scanned recently"""
+    heartbeat = frappe.cache().get_value(HEARTBEAT_KEY)
+    return bool(heartbeat) and time.time() - heartbeat < HEARTBEAT_TIMEOUT
+
+
 @frappe.whitelist(allow_guest=False, methods=['POST'])
 def start_monitoring(**kwargs) -> Dict[str, Any]:
     """Start monitoring a signal. This is the public API endpoint.
@@ -200,56 +324,55 @@ def start_monitoring(**kwargs) -> Dict[str, Any]:
     return _signal_monitor._start_monitoring_impl(kwargs['signal_id'])
 
 
+@frappe.whitelist(allow_guest=False, methods=['POST'])
+def stop_monitoring(signal_id: str) -> Dict[str, Any]:
+    """Stop monitoring a signal
+
+    Returns:
+        dict: Status of the request
+    """
+    try:
+        return _signal_monitor._stop_monitoring_impl(signal_id)
+    except Exception as e:
+        logger.error("Error stopping monitoring for %s: %s", signal_id, e)
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+def get_monitor_status() -> Dict[str, Any]:
+    """Whether the monitor is running, and the monitored signals"""
+    return {
+        "success": True,
+        "running": is_monitor_running(),
+        "signals": _signal_monitor.active_signals,
+    }
+
+
 def check_signals():
-    """Wrapper for scheduler to call singleton instance method"""
+    """Run a single scan - the monitor normally runs continuously via ``bench run-signal-monitor``"""
     _signal_monitor.check_signals()
 
 
-def setup_scheduler_job():
-    """Create or update the scheduler job for signal monitoring"""
-    try:
-        job_name = "Check Modbus Signals"
-
-        # Check if job exists
-        existing_job = frappe.db.exists(
-            "Scheduled Job Type",
-            {"method": "epibus.epibus.utils.signal_monitor.check_signals"}
-        )
-
-        if not existing_job:
-            job = frappe.get_doc({
-                "doctype": "Scheduled Job Type",
-                "method": "epibus.epibus.utils.signal_monitor.check_signals",
-                "frequency": "Cron",
-                "cron_format": "*/5 * * * *",  # Run every 5 minutes instead of "All"
-                "title": job_name
-            })
-            job.insert()
-            logger.info(f"Created scheduler job: {job_name}")
-    except Exception as e:
-        logger.error(f"Error setting up scheduler job: {str(e)}")
+def run_monitor(interval: float = SCAN_INTERVAL) -> None:
+    """Scan monitored signals until stopped"""
+    _signal_monitor.run(interval)
 
 
 def publish_signal_update(signal_name: str, value: SignalValue) -> None:
-    """Publish a signal update to the realtime system and update monitoring cache.
+    """Publish a signal update to the realtime system.
+
+    The live value cache is updated by the caller, so the monitor sees the new
+    value and doesn't publish it again.
 
     Args:
         signal_name: Name of the Modbus Signal document
         value: New value to publish
     """
     try:
-        # Update monitoring cache
-        _signal_monitor.active_signals[signal_name] = value
-
-        # Publish realtime update
-        update_data = {
-            'signal': signal_name,
-            'value': value,
-            'timestamp': now()
-        }
-        publish_realtime('modbus_signal_update', update_data)
-        logger.debug(f"Published immediate update for {signal_name}: {value}")
+        # Queue realtime update; it is published with the current batch
+        queue_signal_update(signal_name, value, timestamp=now())
+        logger.debug("Queued immediate update for %s: %s", signal_name, value)
 
     except Exception as e:
         logger.error(
-            f"Error publishing signal update for {signal_name}: {str(e)}")
+            "Error publishing signal update for %s: %s", signal_name, e)
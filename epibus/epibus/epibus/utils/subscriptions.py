@@ -0,0 +1,157 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Signal subscriptions: who is interested in which signals, so only those are polled fast.
+
+A subscriber (a dashboard, an open form, ...) takes a lease on a set of signals and
+renews it while it is interested; a lease that isn't renewed expires after its TTL,
+so a closed browser tab stops costing scan time on its own. Leases are kept in one
+Redis hash shared by all workers.
+
+A signal's demand is the number of live leases on it, plus one for each of:
+
+- being watched by the signal monitor (``signal_monitor.get_monitored_signals``)
+- being the trigger of an enabled Signal Change Modbus Action
+
+The PLC Bridge fetches the demand (``epibus.api.plc.get_demand``) and polls signals
+with demand at its fast rate and all others at its slow background rate.
+"""
+
+import time
+from collections.abc import Iterable
+from typing import Any, Optional, Union
+
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils.epinomy_logger import get_logger
+
+logger = get_logger(__name__)
+
+# Redis hash of lease id -> {signals, expires, source}
+LEASES_KEY = "epibus:subscriptions"
+
+# Cache key of the signals that trigger enabled Signal Change actions
+ACTION_SIGNALS_KEY = "epibus:action_signals"
+
+# Seconds a lease lives unless renewed
+DEFAULT_TTL = 60
+MAX_TTL = 3600
+
+
+def _parse_signals(signals: str | Iterable[str]) -> list[str]:
+    if isinstance(signals, str):
+        signals = frappe.parse_json(signals) if signals.startswith("[") else signals.split(",")
+    return sorted({str(s).strip() for s in signals if s and str(s).strip()})
+
+
+def subscribe(signals: str | Iterable[str], lease_id: str | None = None,
+              ttl: int | None = None, source: str = "api") -> dict[str, Any]:
+    """Take or renew a lease on a set of signals
+
+    Renewing replaces the lease's signals, so a dashboard can pass whatever it
+    currently shows.
+
+    Args:
+        signals: Modbus Signal names (list, JSON list or comma separated)
+        lease_id: Lease to renew; a new one is created if omitted or expired
+        ttl: Seconds until the lease expires unless renewed
+        source: Who holds the lease (dashboard, form, ...), for diagnostics
+
+    Returns:
+        dict: lease_id, expires (epoch seconds) and ttl
+    """
+    ttl = min(cint(ttl) or DEFAULT_TTL, MAX_TTL)
+    lease_id = lease_id or frappe.generate_hash(length=12)
+    lease = {
+        "signals": _parse_signals(signals),
+        "expires": time.time() + ttl,
+        "source": source,
+        "user": frappe.session.user if getattr(frappe.local, "session", None) else None,
+    }
+    frappe.cache().hset(LEASES_KEY, lease_id, lease)
+    return {"lease_id": lease_id, "expires": lease["expires"], "ttl": ttl}
+
+
+def unsubscribe(lease_id: str) -> None:
+    """Release a lease before it expires"""
+    frappe.cache().hdel(LEASES_KEY, lease_id)
+
+
+def get_leases() -> dict[str, dict[str, Any]]:
+    """Live leases by id; expired leases are removed"""
+    now = time.time()
+    leases = frappe.cache().hgetall(LEASES_KEY) or {}
+
+    live = {}
+    for lease_id, lease in leases.items():
+        if (lease or {}).get("expires", 0) > now:
+            live[lease_id] = lease
+        else:
+            frappe.cache().hdel(LEASES_KEY, lease_id)
+    return live
+
+
+def get_action_signals() -> list[str]:
+    """Signals that trigger enabled Signal Change actions"""
+    return frappe.cache().get_value(ACTION_SIGNALS_KEY, generator=lambda: frappe.get_all(
+        "Modbus Action",
+        filters={"enabled": 1, "script_type": "Signal Change", "modbus_signal": ["is", "set"]},
+        pluck="modbus_signal",
+        distinct=True,
+    ))
+
+
+def invalidate_action_signals(doc=None, method=None) -> None:
+    """Forget the cached action signals (Modbus Action on_update / on_trash hook)"""
+    frappe.cache().delete_value(ACTION_SIGNALS_KEY)
+
+
+def get_demand() -> dict[str, int]:
+    """Reference count of every signal with any interest
+
+    Returns:
+        dict: Signal name -> number of leases and other subscribers
+    """
+    from epibus.epibus.utils.signal_monitor import get_monitored_signals
+
+    demand: dict[str, int] = {}
+
+    def add(signal_names):
+        for signal_name in signal_names:
+            demand[signal_name] = demand.get(signal_name, 0) + 1
+
+    for lease in get_leases().values():
+        add(lease["signals"])
+    add(get_monitored_signals())
+    add(get_action_signals() or [])
+    return demand
+
+
+@frappe.whitelist(methods=["POST"])
+def subscribe_signals(signals, lease_id: str | None = None, ttl: int | None = None,
+                      source: str = "dashboard") -> dict[str, Any]:
+    """Take or renew a lease on signals - see subscribe"""
+    try:
+        if not frappe.has_permission("Modbus Connection", "read"):
+            return {"success": False, "message": "Not permitted to read Modbus signals"}
+
+        lease = subscribe(signals, lease_id=lease_id, ttl=ttl, source=source)
+        lease["success"] = True
+        return lease
+
+    except Exception as e:
+        logger.error("Error subscribing to signals: %s", e)
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist(methods=["POST"])
+def unsubscribe_signals(lease_id: str) -> dict[str, Any]:
+    """Release a lease"""
+    try:
+        unsubscribe(lease_id)
+        return {"success": True}
+
+    except Exception as e:
+        logger.error("Error releasing subscription %s: %s", lease_id, e)
+        return {"success": False, "message": str(e)}
@@ -0,0 +1,42 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+import math
+
+from frappe.tests.utils import FrappeTestCase
+
+from epibus.epibus.utils.downsample import lttb
+
+
+class TestLTTB(FrappeTestCase):
+	def test_short_series_unchanged(self):
+		points = [(float(i), float(i % 3)) for i in range(10)]
+
+		self.assertEqual(lttb(points, 10), points)
+		self.assertEqual(lttb(points, 50), points)
+		self.assertEqual(lttb(points, 2), points)
+		self.assertEqual(lttb([], 100), [])
+		self.assertIsNot(lttb(points, 50), points)
+
+	def test_threshold(self):
+		points = [(float(i), math.sin(i / 10)) for i in range(1000)]
+
+		for threshold in (3, 10, 99, 500, 999):
+			with self.subTest(threshold=threshold):
+				sampled = lttb(points, threshold)
+				self.assertEqual(len(sampled), threshold)
+				self.assertEqual(sampled[0], points[0])
+				self.assertEqual(sampled[-1], points[-1])
+				times = [x for x, _ in sampled]
+				self.assertEqual(times, sorted(set(times)))
+				self.assertTrue(set(sampled) <= set(points))
+
+	def test_keeps_peaks(self):
+		points = [(float(i), 0.0) for i in range(1000)]
+		points[137] = (137.0, 50.0)
+		points[612] = (612.0, -80.0)
+
+		sampled = lttb(points, 20)
+
+		self.assertIn((137.0, 50.0), sampled)
+		self.assertIn((612.0, -80.0), sampled)
@@ -0,0 +1,77 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+import inspect
+
+from frappe.tests.utils import FrappeTestCase
+from pymodbus.client import ModbusTcpClient
+
+from epibus.epibus.utils.signal_handler import (
+	MAX_BLOCK_BITS,
+	MAX_BLOCK_REGISTERS,
+	MAX_GAP_BITS,
+	MAX_GAP_REGISTERS,
+	UNIT_KEYWORD,
+	SignalHandler,
+	plan_blocks,
+)
+
+
+class TestPlanBlocks(FrappeTestCase):
+	def test_contiguous_registers(self):
+		blocks = plan_blocks([(3, 1, "c"), (0, 1, "a"), (1, 2, "b")], bits=False)
+
+		self.assertEqual(blocks, [(0, 4, [(0, "a"), (1, "b"), (3, "c")])])
+
+	def test_register_gaps(self):
+		end = 1 + MAX_GAP_REGISTERS
+		self.assertEqual(
+			plan_blocks([(0, 1, "a"), (end, 1, "b")], bits=False),
+			[(0, end + 1, [(0, "a"), (end, "b")])],
+		)
+		self.assertEqual(
+			plan_blocks([(0, 1, "a"), (end + 1, 1, "b")], bits=False),
+			[(0, 1, [(0, "a")]), (end + 1, 1, [(0, "b")])],
+		)
+
+	def test_bit_gaps(self):
+		end = 1 + MAX_GAP_BITS
+		self.assertEqual(len(plan_blocks([(0, 1, "a"), (end, 1, "b")], bits=True)), 1)
+		self.assertEqual(len(plan_blocks([(0, 1, "a"), (end + 1, 1, "b")], bits=True)), 2)
+
+	def test_max_gap(self):
+		blocks = plan_blocks([(0, 1, "a"), (1, 1, "b"), (3, 1, "c")], bits=False, max_gap=0)
+
+		self.assertEqual(blocks, [(0, 2, [(0, "a"), (1, "b")]), (3, 1, [(0, "c")])])
+
+	def test_block_size_limit(self):
+		last = MAX_BLOCK_REGISTERS - 2
+		# A two-register value must not be split across blocks
+		self.assertEqual(len(plan_blocks([(0, 1, "a"), (last, 2, "b")], bits=False, max_gap=last)), 1)
+		self.assertEqual(
+			plan_blocks([(0, 1, "a"), (last + 1, 2, "b")], bits=False, max_gap=last),
+			[(0, 1, [(0, "a")]), (last + 1, 2, [(0, "b")])],
+		)
+
+		coils = [(address, 1, address) for address in range(MAX_BLOCK_BITS + 1)]
+		blocks = plan_blocks(coils, bits=True)
+		self.assertEqual([(start, count) for start, count, _ in blocks], [(0, MAX_BLOCK_BITS), (MAX_BLOCK_BITS, 1)])
+
+	def test_overlapping_signals(self):
+		blocks = plan_blocks([(0, 2, "float"), (1, 1, "low word"), (0, 1, "high word")], bits=False)
+
+		self.assertEqual(len(blocks), 1)
+		start, count, members = blocks[0]
+		self.assertEqual((start, count), (0, 2))
+		self.assertEqual(sorted(members), [(0, "float"), (0, "high word"), (1, "low word")])
+
+	def test_empty(self):
+		self.assertEqual(plan_blocks([], bits=False), [])
+
+
+class TestSignalHandler(FrappeTestCase):
+	def test_unit_keyword(self):
+		# The installed pymodbus takes the unit id by this keyword
+		self.assertIn(UNIT_KEYWORD, inspect.signature(ModbusTcpClient.read_holding_registers).parameters)
+		self.assertEqual(SignalHandler(None, 3).unit_kwargs, {UNIT_KEYWORD: 3})
+		self.assertEqual(SignalHandler(None, 1).unit_kwargs, {})
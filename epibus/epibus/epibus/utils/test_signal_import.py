@@ -0,0 +1,68 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+from pathlib import Path
+from unittest import skipUnless
+
+from frappe.tests.utils import FrappeTestCase
+
+from epibus.epibus.utils.signal_import import normalize_name, parse_signal_map
+
+# The sample signal map sits at the repository root, next to the app
+BEACHSIDE_CSV = Path(__file__).resolve().parents[4] / "plc_programs" / "Beachside.csv"
+
+
+class TestParseSignalMap(FrappeTestCase):
+	@skipUnless(BEACHSIDE_CSV.exists(), "plc_programs/Beachside.csv is not in this checkout")
+	def test_beachside(self):
+		signals, errors = parse_signal_map(BEACHSIDE_CSV.read_text(encoding="utf-8-sig"))
+
+		self.assertEqual(errors, [])
+		by_name = {signal["signal_name"]: signal for signal in signals}
+		self.assertEqual(len(by_name), len(signals))
+
+		counts = {}
+		for signal in signals:
+			counts[signal["signal_type"]] = counts.get(signal["signal_type"], 0) + 1
+		self.assertEqual(counts, {"Digital Output Coil": 37, "Digital Input Contact": 9, "Holding Register": 2})
+
+		# ERP to PLC: type from the %QX address
+		self.assertEqual(
+			{key: by_name["PICK BIN 01"][key] for key in ("signal_type", "modbus_address", "plc_address")},
+			{"signal_type": "Digital Output Coil", "modbus_address": 11, "plc_address": "%QX1.3"},
+		)
+		# PLC to ERP: the section title row keeps the columns of the section above
+		self.assertEqual(by_name["PLC CYCLE RUNNING"]["signal_type"], "Digital Input Contact")
+		self.assertEqual(by_name["PLC CYCLE RUNNING"]["plc_address"], "%IX0.1")
+		self.assertEqual(by_name["PICK TO STORAGE COMPLETE"]["plc_address"], "%IX1.0")
+		self.assertIn("PICK ERROR", by_name)
+		# Robots: type from the "Modbus Coils" and "Modbus Register" columns
+		self.assertEqual(by_name["BIN 12 PRESENT"]["signal_type"], "Digital Output Coil")
+		self.assertEqual(by_name["BIN 12 PRESENT"]["modbus_address"], 51)
+		self.assertEqual(by_name["STORAGE ROBOT REG2 BIN"]["signal_type"], "Holding Register")
+		self.assertEqual(by_name["STORAGE ROBOT REG2 BIN"]["plc_address"], "%MW1")
+		# The sequence notes below the signal tables are not signals
+		self.assertFalse(any(name.startswith("Sequence Step") for name in by_name))
+
+	def test_errors(self):
+		content = "\n".join([
+			"Signals,Modbus Address,PLC Address",
+			"GOOD,9,%QX1.1",
+			"WRONG PREFIX,1,%ZZ0.1",
+			"MISMATCH,9,%QX0.1",
+			"OUT OF RANGE,1000,%QX125.0",
+			"NO TYPE,5,",
+		])
+
+		signals, errors = parse_signal_map(content)
+
+		self.assertEqual([signal["signal_name"] for signal in signals], ["GOOD"])
+		self.assertEqual([error["line"] for error in errors], [3, 4, 5, 6])
+		self.assertIn("unknown PLC address", errors[0]["message"])
+		self.assertIn("does not match", errors[1]["message"])
+		self.assertIn("out of range", errors[2]["message"])
+		self.assertIn("cannot infer signal type", errors[3]["message"])
+
+	def test_normalize_name(self):
+		self.assertEqual(normalize_name("PLC_CYCLE_RUNNING"), normalize_name("plc cycle  running "))
+		self.assertEqual(normalize_name(None), "")
@@ -0,0 +1,65 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+import time
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from epibus.api import plc
+from epibus.epibus.utils import live_values, sequence
+from epibus.epibus.utils.signal_monitor import SignalMonitor
+
+SIGNAL = "_Test Claimed Signal"
+
+
+def _get_all(doctype, **kwargs):
+	if doctype == "Modbus Signal":
+		return [frappe._dict(
+			name=SIGNAL, parent="_Test PLC", signal_name=SIGNAL, signal_type="Digital Output Coil"
+		)]
+	return [frappe._dict(
+		name="_Test Action", signal_condition="Any Change", signal_value=None, server_script="_Test Script",
+		execution_mode="Inline", rate_limit_mode=None, rate_limit_edge=None, min_interval_ms=0, max_in_flight=0,
+	)]
+
+
+class TestSignalChangeActions(FrappeTestCase):
+	def setUp(self):
+		sequence.reset(SIGNAL)
+		live_values.clear(SIGNAL)
+
+	def tearDown(self):
+		sequence.reset(SIGNAL)
+		live_values.clear(SIGNAL)
+
+	def run_both_paths(self, value, bridge_value, bridge_first=False):
+		"""Report one change through the monitor and the bridge; returns the dispatch mock"""
+		ts = time.time()
+		with (
+			patch.object(plc.frappe, "get_all", side_effect=_get_all),
+			patch.object(plc.action_dispatch, "dispatch") as dispatch,
+			patch.object(plc.event_sink, "log_events"),
+			patch.object(plc, "queue_signal_update"),
+		):
+			paths = [
+				lambda: SignalMonitor()._run_actions(SIGNAL, value, ts),
+				lambda: self.assertEqual(
+					plc._apply_signal_updates([{"name": SIGNAL, "value": bridge_value, "timestamp": ts + 0.1}]),
+					["applied"],
+				),
+			]
+			for path in reversed(paths) if bridge_first else paths:
+				path()
+		return dispatch
+
+	def test_change_seen_by_monitor_and_bridge_runs_actions_once(self):
+		self.assertEqual(self.run_both_paths(True, "1").call_count, 1)
+		# The next change runs them again, whichever path reports it first
+		self.assertEqual(self.run_both_paths(False, "false", bridge_first=True).call_count, 1)
+		self.assertEqual(self.run_both_paths(True, True, bridge_first=True).call_count, 1)
+
+	def test_repeated_value_does_not_run_actions(self):
+		self.assertEqual(self.run_both_paths(True, True).call_count, 1)
+		self.assertEqual(self.run_both_paths(True, True).call_count, 0)
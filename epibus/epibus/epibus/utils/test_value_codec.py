@@ -0,0 +1,123 @@
+# Copyright (c) 2026, Applied Relevance and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from epibus.epibus.utils.value_codec import (
+	BIG_ENDIAN,
+	DATA_TYPES,
+	LITTLE_ENDIAN,
+	ValueSpec,
+	coerce,
+	decode_block,
+	decode_registers,
+	encode,
+	encode_value,
+	register_count,
+)
+
+ORDERS = [(word, byte) for word in (BIG_ENDIAN, LITTLE_ENDIAN) for byte in (BIG_ENDIAN, LITTLE_ENDIAN)]
+
+
+class TestValueCodec(FrappeTestCase):
+	def test_round_trip(self):
+		samples = {
+			"UINT16": [0, 1, 0x1234, 0xFFFF],
+			"INT16": [-32768, -1, 0, 32767],
+			"UINT32": [0, 0x12345678, 0xFFFFFFFF],
+			"INT32": [-(2**31), -1, 0, 2**31 - 1],
+			"FLOAT32": [0.0, 1.5, -273.25, 1e6],
+		}
+		self.assertEqual(set(samples), set(DATA_TYPES))
+
+		for data_type, values in samples.items():
+			for word_order, byte_order in ORDERS:
+				for value in values:
+					with self.subTest(data_type=data_type, word=word_order, byte=byte_order, value=value):
+						registers = encode_value(value, data_type, word_order, byte_order)
+						self.assertEqual(len(registers), register_count("Holding Register", data_type))
+						self.assertEqual(decode_registers(registers, data_type, word_order, byte_order), value)
+
+	def test_word_and_byte_order(self):
+		self.assertEqual(encode_value(0x12345678, "UINT32"), [0x1234, 0x5678])
+		self.assertEqual(encode_value(0x12345678, "UINT32", word_order=LITTLE_ENDIAN), [0x5678, 0x1234])
+		self.assertEqual(encode_value(0x12345678, "UINT32", byte_order=LITTLE_ENDIAN), [0x3412, 0x7856])
+		self.assertEqual(
+			encode_value(0x12345678, "UINT32", word_order=LITTLE_ENDIAN, byte_order=LITTLE_ENDIAN),
+			[0x7856, 0x3412],
+		)
+		self.assertEqual(encode_value(1.0, "FLOAT32"), [0x3F80, 0x0000])
+		self.assertEqual(decode_registers([0x0000, 0x3F80], "FLOAT32", word_order=LITTLE_ENDIAN), 1.0)
+		self.assertEqual(decode_registers([0xFFFF], "INT16"), -1.0)
+		self.assertEqual(decode_registers([0xFFFF], "UINT16"), 65535.0)
+
+	def test_scale(self):
+		self.assertEqual(encode_value(12.5, "UINT16", scale=0.1), [125])
+		self.assertAlmostEqual(decode_registers([125], "UINT16", scale=0.1), 12.5)
+		self.assertEqual(encode_value(-2.0, "INT32", scale=0.5), [0xFFFF, 0xFFFC])
+		self.assertEqual(decode_registers([0xFFFF, 0xFFFC], "INT32", scale=0.5), -2.0)
+		# Integer types round the unscaled value
+		self.assertEqual(encode_value(1.26, "UINT16", scale=0.1), [13])
+
+	def test_encode_errors(self):
+		with self.assertRaises(ValueError):
+			encode_value(70000, "UINT16")
+		with self.assertRaises(ValueError):
+			encode_value(-1, "UINT32")
+		with self.assertRaises(ValueError):
+			encode_value(1, "INT64")
+		with self.assertRaises(ValueError):
+			encode(ValueSpec("Holding Register"), "not a number")
+
+	def test_decode_block(self):
+		little = ValueSpec("Holding Register", "INT32", word_order=LITTLE_ENDIAN)
+		# INT32 values at an odd and an even offset of one block
+		data = [7, *encode_value(-5, "INT32", LITTLE_ENDIAN), 0, *encode_value(123456, "INT32", LITTLE_ENDIAN)]
+		members = [
+			(0, ValueSpec("Holding Register", scale=2.0)),
+			(1, little),
+			(4, little),
+			(5, ValueSpec("Holding Register", "FLOAT32")),
+			(3, ValueSpec("Holding Register", "INT64")),
+		]
+
+		values = decode_block(data, members)
+
+		self.assertEqual(values[:3], [14.0, -5.0, 123456.0])
+		self.assertTrue(all(isinstance(value, float) for value in values[:3]))
+		self.assertIsInstance(values[3], ValueError)
+		self.assertIsInstance(values[4], ValueError)
+
+	def test_decode_block_bits(self):
+		coil = ValueSpec("Digital Output Coil")
+		values = decode_block([1, 0, True], [(0, coil), (1, coil), (2, coil), (3, coil)])
+
+		self.assertEqual(values[:3], [True, False, True])
+		self.assertIsInstance(values[3], ValueError)
+
+	def test_encode_bits(self):
+		coil = ValueSpec("Digital Output Coil")
+		self.assertEqual(encode(coil, "true"), [True])
+		self.assertEqual(encode(coil, "0"), [False])
+		self.assertEqual(encode(coil, 2), [True])
+
+	def test_coerce(self):
+		self.assertIs(coerce("Digital Input Contact", "Yes"), True)
+		self.assertIs(coerce("Digital Output Coil", "no"), False)
+		self.assertIs(coerce("Digital Output Coil", ""), False)
+		self.assertIs(coerce("Digital Output Coil", "0.0"), False)
+		self.assertIs(coerce("Digital Output Coil", 1), True)
+		self.assertEqual(coerce("Holding Register", "3.5"), 3.5)
+		self.assertIsInstance(coerce("Analog Input Register", 4), float)
+		with self.assertRaises(ValueError):
+			coerce("Holding Register", "abc")
+		with self.assertRaises(ValueError):
+			coerce("Holding Register", None)
+
+	def test_spec_from_fields(self):
+		spec = ValueSpec.from_fields({"signal_type": "Holding Register", "data_type": "", "scale": 0})
+
+		self.assertEqual(spec, ValueSpec("Holding Register", "UINT16", BIG_ENDIAN, BIG_ENDIAN, 1.0))
+		self.assertFalse(spec.bits)
+		self.assertEqual(ValueSpec("Holding Register", "FLOAT32").width, 2)
+		self.assertEqual(ValueSpec("Digital Output Coil", "FLOAT32").width, 1)
@@ -0,0 +1,285 @@
+# Copyright (c) 2025, Applied Relevance and contributors
+# For license information, please see license.txt
+
+"""Typed encoding and decoding of Modbus Signal values.
+
+Every path a signal value takes goes through this codec: SignalHandler's reads
+and writes, the PLC Bridge's scan and writes, the bridge's updates arriving at
+signal_updates and values typed into the dashboard. Whichever path a value took,
+a digital signal's value is a bool and an analog signal's a float, scaled per the
+signal's data type, word order and byte order.
+
+Decoding works on whole blocks: a block read's registers are packed into bytes
+once per byte order (and word pairing), and each signal in it is unpacked with a
+precompiled struct, cached per data type. Strings (from form posts) are parsed
+through small LRU caches, so the same "1" or "true" isn't parsed again on every
+update.
+
+Standard library only: the PLC Bridge container, which can't import the app,
+ships a copy of this file (plc/bridge/value_codec.py). run_tests.sh there checks
+the two are identical.
+"""
+
+import struct
+from collections.abc import Callable, Iterable, Sequence
+from functools import cache, lru_cache
+from typing import Any, NamedTuple
+
+SignalValue = bool | float
+
+BIT_SIGNAL_TYPES = frozenset(("Digital Output Coil", "Digital Input Contact"))
+REGISTER_SIGNAL_TYPES = frozenset(("Analog Input Register", "Analog Output Register", "Holding Register"))
+
+# Register data types: (registers, struct format)
+DATA_TYPES = {
+    "UINT16": (1, "H"),
+    "INT16": (1, "h"),
+    "UINT32": (2, "I"),
+    "INT32": (2, "i"),
+    "FLOAT32": (2, "f"),
+}
+DEFAULT_DATA_TYPE = "UINT16"
+
+BIG_ENDIAN = "Big"
+LITTLE_ENDIAN = "Little"
+
+# Strings read as digital values, as the dashboard has always accepted them
+TRUE_STRINGS = frozenset(("true", "t", "yes", "y", "1"))
+FALSE_STRINGS = frozenset(("false", "f", "no", "n", "0", ""))
+
+
+class ValueSpec(NamedTuple):
+    """How a signal's value is stored: its signal type and register encoding"""
+    signal_type: str
+    data_type: str = DEFAULT_DATA_TYPE
+    word_order: str = BIG_ENDIAN
+    byte_order: str = BIG_ENDIAN
+    scale: float = 1.0
+
+    @classmethod
+    def from_fields(cls, signal) -> "ValueSpec":
+        """Build a spec from a Modbus Signal document, row or dict"""
+        return cls(
+            signal.get("signal_type"),
+            signal.get("data_type") or DEFAULT_DATA_TYPE,
+            signal.get("word_order") or BIG_ENDIAN,
+            signal.get("byte_order") or BIG_ENDIAN,
+            float(signal.get("scale") or 0) or 1.0,
+        )
+
+    @property
+    def bits(self) -> bool:
+        """Whether the signal is bit addressed"""
+        return self.signal_type in BIT_SIGNAL_TYPES
+
+    @property
+    def width(self) -> int:
+        """Number of bits or registers the signal occupies"""
+        return register_count(self.signal_type, self.data_type)
+
+
+def register_count(signal_type: str, data_type: str | None = None) -> int:
+    """Number of bits or registers a signal of this type and data type occupies"""
+    if signal_type not in REGISTER_SIGNAL_TYPES:
+        return 1
+    return DATA_TYPES.get(data_type or DEFAULT_DATA_TYPE, DATA_TYPES[DEFAULT_DATA_TYPE])[0]
+
+
+# Bounded: the strings come from guest endpoints (signal_update(s))
+@lru_cache(maxsize=1024)
+def _parse_bool(text: str) -> bool:
+    key = text.strip().lower()
+    if key in TRUE_STRINGS:
+        return True
+    if key in FALSE_STRINGS:
+        return False
+    try:
+        return float(key) != 0
+    except ValueError:
+        # Any other non-empty string is truthy
+        return True
+
+
+@lru_cache(maxsize=1024)
+def _parse_number(text: str) -> float:
+    return float(text)
+
+
+def to_bool(value: Any) -> bool:
+    """A digital signal value as bool
+
+    Strings read as true/false words and numbers; any other non-empty string is True.
+    """
+    if value.__class__ is bool:
+        return value
+    if isinstance(value, str):
+        return _parse_bool(value)
+    return bool(value)
+
+
+def to_number(value: Any) -> float:
+    """An analog signal value as float
+
+    Raises:
+        ValueError: If the value is not a number
+    """
+    if value.__class__ is float:
+        return value
+    if isinstance(value, str):
+        return _parse_number(value)
+    try:
+        return float(value)
+    except TypeError:
+        raise ValueError(f"Cannot convert {value!r} to a number")
+
+
+def coerce(signal_type: str, value: Any) -> SignalValue:
+    """A value as the type of its signal: bool for digital signals, float otherwise
+
+    Raises:
+        ValueError: If an analog value is not a number
+    """
+    cls = value.__class__
+    if signal_type in BIT_SIGNAL_TYPES:
+        if cls is bool:
+            return value
+        return _parse_bool(value) if cls is str else bool(value)
+    if cls is float:
+        return value
+    return to_number(value)
+
+
+def _words_format(byte_order: str) -> str:
+    return "<%dH" if byte_order == LITTLE_ENDIAN else ">%dH"
+
+
+def _pack_block(data: Sequence[int], byte_order: str, swap_from: int | None = None) -> bytes:
+    """Pack a block's registers into bytes
+
+    With swap_from, the register pairs starting at that offset (0 or 1) swap places,
+    so the block reads as big word order for two-register values at offsets of the
+    same parity.
+    """
+    words = [word & 0xFFFF for word in data]
+    if swap_from is not None:
+        end = swap_from + (len(words) - swap_from) // 2 * 2
+        words[swap_from:end:2], words[swap_from + 1:end:2] = words[swap_from + 1:end:2], words[swap_from:end:2]
+    return struct.pack(_words_format(byte_order) % len(words), *words)
+
+
+@cache
+def _decoder(data_type: str, word_order: str) -> tuple[int, bool, Callable]:
+    """(registers, swap words, unpack_from) of an encoding"""
+    if data_type not in DATA_TYPES:
+        raise ValueError(f"Unsupported data type: {data_type}")
+    count, fmt = DATA_TYPES[data_type]
+    return count, count > 1 and word_order == LITTLE_ENDIAN, struct.Struct(">" + fmt).unpack_from
+
+
+def decode_block(data: Sequence[Any], members: Iterable[tuple[int, Any]]) -> list[SignalValue | Exception]:
+    """Decode the signals of one block read
+
+    Args:
+        data: The block's bits or registers
+        members: (offset in the block, spec) per signal. A spec is a ValueSpec or
+            anything with the same fields, such as a SignalRequest.
+
+    Returns:
+        Values in member order: bool for digital signals, float for analog signals.
+        A signal that could not be decoded holds a ValueError instead of a value.
+    """
+    length = len(data)
+    packed = {}
+    values: list[SignalValue | Exception] = []
+    append = values.append
+
+    for offset, spec in members:
+        if spec.signal_type in BIT_SIGNAL_TYPES:
+            append(bool(data[offset]) if 0 <= offset < length
+                   else ValueError(f"No bit at offset {offset}, block has {length}"))
+            continue
+
+        try:
+            count, swap, unpack_from = _decoder(spec.data_type, spec.word_order)
+        except ValueError as e:
+            append(e)
+            continue
+        if offset < 0 or offset + count > length:
+            append(ValueError(f"{spec.data_type} needs {count} registers at offset {offset}, block has {length}"))
+            continue
+
+        layout = (spec.byte_order, offset & 1 if swap else None)
+        block = packed.get(layout)
+        if block is None:
+            block = packed[layout] = _pack_block(data, *layout)
+
+        value = unpack_from(block, offset * 2)[0]
+        scale = spec.scale
+        append(float(value * scale) if scale != 1 else float(value))
+
+    return values
+
+
+def decode_registers(registers: Sequence[int], data_type: str = DEFAULT_DATA_TYPE,
+                     word_order: str = BIG_ENDIAN, byte_order: str = BIG_ENDIAN,
+                     scale: float = 1.0) -> float:
+    """Decode the registers of one value
+
+    Args:
+        registers: The value's registers, in address order
+        data_type: A key of DATA_TYPES
+        word_order: Big if the first register holds the most significant word
+        byte_order: Big if each register's high byte comes first
+        scale: Multiplier applied to the decoded value
+
+    Returns:
+        float: The scaled value
+    """
+    value = decode_block(registers, [(0, ValueSpec("Holding Register", data_type, word_order, byte_order, scale))])[0]
+    if isinstance(value, Exception):
+        raise value
+    return value
+
+
+def encode_value(value: int | float, data_type: str = DEFAULT_DATA_TYPE,
+                 word_order: str = BIG_ENDIAN, byte_order: str = BIG_ENDIAN,
+                 scale: float = 1.0) -> list[int]:
+    """Encode a value into registers, the inverse of decode_registers
+
+    Raises:
+        ValueError: If the value does not fit the data type
+    """
+    if data_type not in DATA_TYPES:
+        raise ValueError(f"Unsupported data type: {data_type}")
+    count, fmt = DATA_TYPES[data_type]
+    raw_value = value / scale if scale != 1 else value
+    if fmt != "f":
+        raw_value = round(raw_value)
+
+    try:
+        raw = struct.pack(">" + fmt, raw_value)
+    except struct.error as e:
+        raise ValueError(f"Value {value} does not fit {data_type}: {e!s}")
+
+    words = list(struct.unpack(_words_format(byte_order) % count, raw))
+    if word_order == LITTLE_ENDIAN:
+        words.reverse()
+    return words
+
+
+def encode(spec: Any, value: Any) -> list[bool | int]:
+    """The bits or registers to write for a value
+
+    Args:
+        spec: A ValueSpec or anything with the same fields
+        value: The value, typed or as a string
+
+    Returns:
+        [bool] for digital signals, the registers for analog signals
+
+    Raises:
+        ValueError: If the value is not a number or does not fit the data type
+    """
+    if spec.signal_type in BIT_SIGNAL_TYPES:
+        return [to_bool(value)]
+    return encode_value(to_number(value), spec.data_type, spec.word_order, spec.byte_order, spec.scale)
@@ -44,7 +44,66 @@ web_include_css = [
     "/assets/epibus/vendor/font-awesome/css/font-awesome.min.css",
 ]
 
+# Document events
+# Keep the per-worker Modbus Action context cache and the signal address index
+# in sync with saved documents
+doc_events = {
+    # DocType Event Modbus Actions, looked up in a cached (doctype, event) dispatch table
+    "*": {
+        method: "epibus.epibus.utils.signal_handler.handle_doc_event"
+        for method in (
+            "before_insert", "after_insert", "validate", "on_update",
+            "before_submit", "on_submit", "before_cancel", "on_cancel",
+            "on_trash", "after_delete", "before_update_after_submit", "on_update_after_submit",
+        )
+    },
+    "Modbus Action": {
+        "on_update": [
+            "epibus.epibus.utils.action_cache.invalidate_doc",
+            "epibus.epibus.utils.subscriptions.invalidate_action_signals",
+        ],
+        "on_trash": [
+            "epibus.epibus.utils.action_cache.invalidate_doc",
+            "epibus.epibus.utils.subscriptions.invalidate_action_signals",
+        ],
+    },
+    "Modbus Connection": {
+        "on_update": [
+            "epibus.epibus.utils.action_cache.invalidate_doc",
+            "epibus.epibus.utils.address_index.invalidate",
+        ],
+        "on_trash": [
+            "epibus.epibus.utils.action_cache.invalidate_doc",
+            "epibus.epibus.utils.address_index.invalidate",
+        ],
+    },
+    "Server Script": {
+        "on_update": "epibus.epibus.utils.action_cache.invalidate_doc",
+        "on_trash": "epibus.epibus.utils.action_cache.invalidate_doc",
+    },
+}
+
+# Publish any coalesced realtime signal updates at the end of each request or job,
+# report ingestion load to the PLC Bridge, and write out queued log records
+# before a job's process exits
+after_request = [
+    "epibus.epibus.utils.realtime_batcher.flush",
+    "epibus.epibus.utils.ingest_load.add_load_headers",
+]
+after_job = [
+    "epibus.epibus.utils.realtime_batcher.flush",
+    "epibus.epibus.utils.epinomy_logger.flush",
+]
+
 # Scheduler configuration for signal monitoring
+scheduler_events = {
+    "all": [
+        "epibus.epibus.utils.event_sink.flush_events",
+        "epibus.epibus.utils.action_throttle.run_due",
+    ],
+    "hourly": ["epibus.epibus.utils.event_retention.rollup_events"],
+    "daily_long": ["epibus.epibus.utils.event_retention.purge_expired_events"],
+}
 
 # Setup signal monitor on app install/update  
 after_install = "epibus.install.after_install"
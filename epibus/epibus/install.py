@@ -63,6 +63,51 @@ environment=PATH="{os.path.join(bench_path, 'env', 'bin')}:/usr/bin:/bin"
         return # Stop if we can't create the file
 
     # --- 2. Update supervisor.conf to add PLC bridge to workers group ---
+    add_to_workers_group(main_supervisor_conf_path, "bench-frappe-plc-bridge")
+    logger.info("Supervisor configuration for PLC Bridge completed.")
+
+    # --- 3. Signal monitor ---
+    configure_signal_monitor(bench_path, user)
+    logger.info("Run 'bench setup supervisor' and 'sudo supervisorctl reread && sudo supervisorctl update' to apply changes.")
+
+
+def configure_signal_monitor(bench_path, user):
+    """Configure supervisor to keep `bench run-signal-monitor` running for this site"""
+    logger.info("Configuring supervisor for the signal monitor...")
+
+    supervisor_config_dir = os.path.join(bench_path, "config", "supervisor")
+    signal_monitor_conf_path = os.path.join(supervisor_config_dir, "signal_monitor.conf")
+    logs_dir = os.path.join(bench_path, "logs")
+    bench_bin = os.path.join(bench_path, "env", "bin")
+
+    signal_monitor_conf_content = f"""\
+[program:bench-frappe-signal-monitor]
+command={os.path.join(bench_bin, 'bench')} --site {frappe.local.site} run-signal-monitor
+directory={bench_path}
+user={user}
+autostart=true
+autorestart=true
+stopsignal=TERM
+stopwaitsecs=10
+stdout_logfile={os.path.join(logs_dir, 'signal_monitor.log')}
+stderr_logfile={os.path.join(logs_dir, 'signal_monitor.error.log')}
+priority=4
+environment=PATH="{bench_bin}:/usr/bin:/bin"
+"""
+    try:
+        os.makedirs(supervisor_config_dir, exist_ok=True)
+        with open(signal_monitor_conf_path, "w") as f:
+            f.write(signal_monitor_conf_content)
+        logger.info(f"Created supervisor config: {signal_monitor_conf_path}")
+    except Exception as e:
+        logger.error(f"Failed to create {signal_monitor_conf_path}: {e}")
+        return
+
+    add_to_workers_group(os.path.join(bench_path, "config", "supervisor.conf"), "bench-frappe-signal-monitor")
+
+
+def add_to_workers_group(main_supervisor_conf_path, program):
+    """Add a supervisor program to the bench workers group"""
     try:
         if os.path.exists(main_supervisor_conf_path):
             with open(main_supervisor_conf_path, "r") as f:
@@ -73,10 +118,10 @@ environment=PATH="{os.path.join(bench_path, 'env', 'bin')}:/usr/bin:/bin"
             workers_group_match = re.search(workers_group_pattern, content)
             
             if workers_group_match:
-                # Add plc-bridge to the workers group if not already there
+                # Add the program to the workers group if not already there
                 programs = workers_group_match.group(1)
-                if "plc-bridge" not in programs:
-                    new_programs = programs.strip() + ",bench-frappe-plc-bridge"
+                if program not in programs:
+                    new_programs = programs.strip() + f",{program}"
                     updated_content = re.sub(
                         workers_group_pattern,
                         f"[group:frappe-bench-workers]\\nprograms={new_programs}",
@@ -86,15 +131,12 @@ environment=PATH="{os.path.join(bench_path, 'env', 'bin')}:/usr/bin:/bin"
                     with open(main_supervisor_conf_path, "w") as f:
                         f.write(updated_content)
                     
-                    logger.info(f"Added PLC bridge to workers group in {main_supervisor_conf_path}")
+                    logger.info(f"Added {program} to workers group in {main_supervisor_conf_path}")
                 else:
-                    logger.info(f"PLC bridge already in workers group in {main_supervisor_conf_path}")
+                    logger.info(f"{program} already in workers group in {main_supervisor_conf_path}")
             else:
                 logger.warning(f"Could not find workers group in {main_supervisor_conf_path}")
 
-        logger.info("Supervisor configuration for PLC Bridge completed.")
-        logger.info("Run 'bench setup supervisor' and 'sudo supervisorctl reread && sudo supervisorctl update' to apply changes.")
-
     except Exception as e:
         logger.error(f"Failed to update {main_supervisor_conf_path}: {e}")
 
@@ -0,0 +1,10 @@
+import frappe
+
+
+def execute():
+	"""Publish Per-Signal Events was on by default, doubling every realtime update.
+
+	The setting is new and nothing in the app listens to the per-signal event, so an
+	enabled setting only ever came from that default: turn it off.
+	"""
+	frappe.db.set_single_value("Modbus Settings", "publish_per_signal_events", 0)
@@ -0,0 +1,35 @@
+import frappe
+from frappe.utils import cint
+
+from epibus.epibus.utils.event_sink import NAME_PREFIX, name_series_key
+
+
+def execute():
+	"""Bulk-inserted Modbus Events used to be numbered from their own "EPI-EVT-" series.
+
+	Move the autoname's counter past every name handed out so far, so the two can't collide.
+	"""
+	key = name_series_key()
+	if key == NAME_PREFIX:
+		return
+
+	counters = frappe.db.sql(
+		"select `name`, `current` from `tabSeries` where `name` in (%s, %s) for update", (key, NAME_PREFIX)
+	)
+	highest = max([cint(current) for _, current in counters] + [_highest_event_number()])
+	if not highest:
+		return
+
+	if any(name == key for name, _ in counters):
+		frappe.db.sql("update `tabSeries` set `current` = %s where `name` = %s", (highest, key))
+	else:
+		frappe.db.sql("insert into `tabSeries` (`name`, `current`) values (%s, %s)", (key, highest))
+	frappe.db.sql("delete from `tabSeries` where `name` = %s", (NAME_PREFIX,))
+
+
+def _highest_event_number() -> int:
+	names = frappe.db.sql(
+		"select `name` from `tabModbus Event` where `name` like %s order by length(`name`) desc, `name` desc limit 1",
+		(NAME_PREFIX + "%",),
+	)
+	return cint(names[0][0][len(NAME_PREFIX):]) if names else 0
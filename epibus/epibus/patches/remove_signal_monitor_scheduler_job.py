@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+	"""Signals are monitored by `bench run-signal-monitor` now, not a 5-minute scheduled job"""
+	for name in frappe.get_all(
+		"Scheduled Job Type",
+		filters={"method": "epibus.epibus.utils.signal_monitor.check_signals"},
+		pluck="name",
+	):
+		frappe.delete_doc("Scheduled Job Type", name, ignore_permissions=True)
@@ -8,6 +8,7 @@ import ConnectionStatusIndicator from './ConnectionStatusIndicator';
 import { EventLog } from './EventLog';
 import { PLCStatus } from './PLCStatus';
 import { useSignalMonitorContext } from '../contexts/SignalMonitorContext';
+import { useSignalSubscription } from '../hooks/useSignalSubscription';
 import { clearAllSortPreferences } from '../utils/storageUtils';
 import './ModbusDashboard.css';
 
@@ -28,6 +29,11 @@ const ModbusDashboard: React.FC<ModbusDashboardProps> = ({
     signalType: ''
   });
   const [filteredConnections, setFilteredConnections] = useState<ModbusConnection[]>([]);
+
+  // Signals on screen are polled at the fast rate
+  useSignalSubscription(
+    filteredConnections.flatMap(conn => (conn.signals || []).map(signal => signal.name))
+  );
   
   // Update page title
   useEffect(() => {
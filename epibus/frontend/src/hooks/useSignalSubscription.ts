@@ -0,0 +1,62 @@
+import { useEffect, useRef } from 'react';
+import { fetchWrapper } from '../utils/fetchWrapper';
+
+// Seconds a subscription lives unless renewed; it is renewed at half that
+const SUBSCRIPTION_TTL = 60;
+
+const SUBSCRIBE_ENDPOINT = '/api/method/epibus.epibus.utils.subscriptions.subscribe_signals';
+const UNSUBSCRIBE_ENDPOINT = '/api/method/epibus.epibus.utils.subscriptions.unsubscribe_signals';
+
+/**
+ * Keep a lease on the signals the dashboard shows, so the PLC Bridge polls them
+ * at its fast rate. The lease is renewed while mounted and released on unmount;
+ * if the tab just disappears, it expires on its own.
+ */
+export function useSignalSubscription(signalNames: string[]) {
+  const leaseId = useRef<string | null>(null);
+  const key = [...signalNames].sort().join(',');
+
+  useEffect(() => {
+    if (!key) {
+      return;
+    }
+
+    const renew = async () => {
+      try {
+        const response = await fetchWrapper(SUBSCRIBE_ENDPOINT, {
+          method: 'POST',
+          body: JSON.stringify({
+            signals: key.split(','),
+            lease_id: leaseId.current,
+            ttl: SUBSCRIPTION_TTL,
+            source: 'dashboard'
+          })
+        });
+        if (response?.message?.success) {
+          leaseId.current = response.message.lease_id;
+        }
+      } catch (error) {
+        console.warn('⚠️ Could not renew signal subscription:', error);
+      }
+    };
+
+    renew();
+    const timer = setInterval(renew, SUBSCRIPTION_TTL * 500);
+
+    return () => {
+      clearInterval(timer);
+    };
+  }, [key]);
+
+  // Release the lease when the dashboard goes away
+  useEffect(() => {
+    return () => {
+      if (leaseId.current) {
+        fetchWrapper(UNSUBSCRIBE_ENDPOINT, {
+          method: 'POST',
+          body: JSON.stringify({ lease_id: leaseId.current })
+        }).catch(() => undefined);
+      }
+    };
+  }, []);
+}
@@ -3,63 +3,118 @@
 Simplified PLC Bridge - No complexity, just basic functionality
 
 This replaces the overly complex bridge.py with:
-- Simple 3-second polling loop
-- No retry logic, no exponential backoff
+- Simple 3-second polling loop for signals someone subscribed to in Frappe, and a
+  slow background rate for everything else
+- Signal changes delivered to Frappe in batches by a separate thread, so a slow
+  or overloaded Frappe never slows the Modbus scan
+- Writes from Frappe go through one write queue, so each PLC sees a single client
 - No SSE - just HTTP polling
 - Basic error handling - if something fails, try again next cycle
 """
 
+import json
+import logging
 import os
+import queue
 import sys
-import time
-import logging
 import threading
+import time
+from typing import ClassVar
+
 import requests
-import json
-from typing import Dict, List, Union, Optional
-from pymodbus.client import ModbusTcpClient
 from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+from pymodbus.client import ModbusTcpClient
+from value_codec import ValueSpec, decode_block, encode
+
 
 class SimplePLCBridge:
     """Dead simple PLC Bridge - no complexity"""
-    
-    def __init__(self, frappe_url: str, poll_interval: float = 3.0):
+
+    # Read method per signal type; "Input Register" is an older name of Analog Input Register
+    SIGNAL_READERS: ClassVar[dict[str, str]] = {
+        "Digital Output Coil": "read_coils",
+        "Digital Input Contact": "read_discrete_inputs",
+        "Analog Input Register": "read_input_registers",
+        "Input Register": "read_input_registers",
+        "Analog Output Register": "read_holding_registers",
+        "Holding Register": "read_holding_registers",
+    }
+    WRITABLE_TYPES = ("Digital Output Coil", "Analog Output Register", "Holding Register")
+
+    def __init__(self, frappe_url: str, poll_interval: float = 3.0, slow_poll_interval: float = 30.0):
         self.frappe_url = frappe_url
         self.poll_interval = poll_interval
-        
+        self.slow_poll_interval = max(slow_poll_interval, poll_interval)
+
         # Simple logging with debug enabled
         logging.basicConfig(
             level=logging.DEBUG,
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger(__name__)
-        
+
         # Current signal values - just a simple dict
         self.current_signals = {}
         self.last_values = {}
-        
+
+        # Updates are numbered (epoch, seq) per signal so Frappe can drop retried duplicates.
+        # The epoch changes on every start, so sequences restarting at 1 are still accepted.
+        self.epoch = int(time.time() * 1000)
+        self.sequences = {}
+
+        # Signal changes waiting for delivery to Frappe - latest value per signal wins
+        self.pending_updates = {}
+        self.updates_lock = threading.Lock()
+        self.updates_ready = threading.Event()
+
+        # Delivery batch window: widens while Frappe sheds load, shrinks as it recovers
+        self.min_batch_window = 0.05
+        self.max_batch_window = 10.0
+        self.batch_window = self.min_batch_window
+
         # MODBUS connections - just store what we need
         self.connections = {}
-        
+
+        # Block reads planned by Frappe from its address index: one request per run of
+        # adjacent addresses. Empty means every signal is read on its own.
+        self.read_plan = []
+
         # Connection status tracking
         self.connection_status = {}
-        
+
+        # Subscriber count per signal from Frappe. Signals with subscribers are read every
+        # poll_interval, the rest every slow_poll_interval. None means unknown - read all.
+        self.demand = None
+        self.demand_refresh = 2.0
+        self.demand_loaded = 0.0
+
+        # Writes requested over HTTP, applied in order by the writer thread
+        self.write_queue = queue.Queue()
+        self.write_timeout = 5.0
+
+        # Events for Frappe, sent as one batch per polling cycle
+        self.pending_events = []
+        self.events_lock = threading.Lock()
+        self.max_pending_events = 1000
+
         # Simple Flask app for the dashboard
         self.app = Flask(__name__)
         CORS(self.app)
-        
+
         # Set up routes
         self.app.route('/')(self.dashboard)
-        self.app.route('/signals')(self.get_signals) 
+        self.app.route('/signals')(self.get_signals)
         self.app.route('/connections')(self.get_connections)
         self.app.route('/write_signal', methods=['POST'])(self.write_signal)
-        
+
         # Control flags
         self.running = False
         self.poll_thread = None
+        self.delivery_thread = None
+        self.write_thread = None
         self.flask_thread = None
-    
+
     def load_signals_from_frappe(self):
         """Load signal definitions from Frappe - simple, no retry logic"""
         try:
@@ -71,7 +126,7 @@ class SimplePLCBridge:
             )
             response.raise_for_status()
             data = response.json()
-            
+
             # Handle Frappe's response format
             if 'message' in data:
                 if isinstance(data['message'], list):
@@ -86,23 +141,23 @@ class SimplePLCBridge:
             else:
                 self.logger.error(f"Unexpected response format: {data}")
                 return False
-            
+
             # Process connections and signals
             self.connections = {}
             self.current_signals = {}
             self.connection_status = {}
-            
+
             for conn_data in connections_data:
                 conn_name = conn_data['name']
                 host = conn_data['host']
                 port = conn_data['port']
-                
+
                 self.connections[conn_name] = {
                     'host': host,
                     'port': port,
                     'client': None
                 }
-                
+
                 # Initialize connection status
                 self.connection_status[conn_name] = {
                     'status': 'Unknown',
@@ -111,7 +166,7 @@ class SimplePLCBridge:
                     'error_count': 0,
                     'success_count': 0
                 }
-                
+
                 # Process signals for this connection
                 for signal_data in conn_data.get('signals', []):
                     signal_id = signal_data['name']
@@ -120,30 +175,177 @@ class SimplePLCBridge:
                         'signal_name': signal_data['signal_name'],
                         'type': signal_data['signal_type'],
                         'address': signal_data['modbus_address'],
+                        'codec': ValueSpec.from_fields(signal_data),
                         'connection': conn_name,
                         'value': None,
-                        'timestamp': None
+                        'timestamp': None,
+                        'last_attempt': None,
+                        'read_error': None
                     }
-            
+
             self.logger.info(f"Loaded {len(self.current_signals)} signals from {len(self.connections)} connections")
+            self.load_read_plan()
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Failed to load signals: {e}")
             return False
-    
+
+    def load_read_plan(self):
+        """Load the block read plan from Frappe; without one, signals are read one by one"""
+        try:
+            response = requests.get(
+                f"{self.frappe_url}/api/method/epibus.api.plc.get_read_plan",
+                headers={'Host': 'intralogistics.lab'},
+                timeout=10
+            )
+            response.raise_for_status()
+            result = response.json().get('message') or {}
+            if not result.get('success'):
+                raise ValueError(result.get('message', 'Unknown error'))
+
+            # Only keep blocks for signals we actually loaded
+            self.read_plan = [
+                block for block in result['data']
+                if block['connection'] in self.connections
+                and all(name in self.current_signals for _, name in block['signals'])
+            ]
+            for conflict in result.get('conflicts', []):
+                self.logger.warning(f"Signals {conflict['signals']} share address {conflict['modbus_address']} "
+                                    f"(function code {conflict['function_code']}) on {conflict['connection']}")
+
+            self.logger.info(f"Loaded read plan: {len(self.read_plan)} block(s) for {len(self.current_signals)} signals")
+        except Exception as e:
+            self.read_plan = []
+            self.logger.warning(f"No read plan, reading signals individually: {e}")
+
+    def load_demand(self):
+        """Refresh the subscriber count per signal from Frappe every demand_refresh seconds"""
+        if time.monotonic() - self.demand_loaded < self.demand_refresh:
+            return
+        self.demand_loaded = time.monotonic()
+
+        try:
+            response = requests.get(
+                f"{self.frappe_url}/api/method/epibus.api.plc.get_demand",
+                headers={'Host': 'intralogistics.lab'},
+                timeout=2
+            )
+            response.raise_for_status()
+            result = response.json().get('message') or {}
+            if not result.get('success'):
+                raise ValueError(result.get('message', 'Unknown error'))
+            self.demand = result['data']
+        except Exception as e:
+            if self.demand is not None:
+                self.logger.warning(f"Signal demand unavailable, polling every signal at the fast rate: {e}")
+            self.demand = None
+
+    def is_subscribed(self, signal_id):
+        return self.demand is None or self.demand.get(signal_id, 0) > 0
+
+    def due_signals(self):
+        """Signals to read in this cycle: subscribed ones, and the rest once per slow_poll_interval"""
+        now = time.monotonic()
+        return {
+            signal_id for signal_id, signal in self.current_signals.items()
+            if self.is_subscribed(signal_id)
+            or signal['last_attempt'] is None
+            or now - signal['last_attempt'] >= self.slow_poll_interval
+        }
+
+    def read_block(self, client, block):
+        """Read one planned block and return {signal_id: value}, or None if the read failed"""
+        readers = {
+            1: client.read_coils,
+            2: client.read_discrete_inputs,
+            3: client.read_holding_registers,
+            4: client.read_input_registers,
+        }
+        result = readers[block['function_code']](address=block['start'], count=block['count'])
+        if result.isError():
+            self.logger.warning(f"Block read of {block['count']} at {block['start']} "
+                                f"(function code {block['function_code']}) failed: {result}")
+            return None
+
+        data = result.bits if block['function_code'] in (1, 2) else result.registers
+        values = decode_block(data, [(offset, self.current_signals[name]['codec']) for offset, name in block['signals']])
+        # Signals that can't be decoded are left out, so they're read individually and the error recorded
+        return {name: value for (_, name), value in zip(block['signals'], values, strict=True) if not isinstance(value, Exception)}
+
+    def scan_signals(self, due=None):
+        """Read the due signals, using the block plan where there is one
+
+        A planned block is read whole if any of its signals is due, since the other
+        signals in it come at no extra cost.
+
+        Args:
+            due: Signal ids to read; all signals if None
+
+        Returns:
+            dict: {signal_id: value} for every signal read successfully
+        """
+        values = {}
+        unreachable = set()
+        if due is None:
+            due = set(self.current_signals)
+
+        now = time.monotonic()
+        for signal_id in due:
+            self.current_signals[signal_id]['last_attempt'] = now
+
+        blocks_by_connection = {}
+        for block in self.read_plan:
+            if any(name in due for _, name in block['signals']):
+                blocks_by_connection.setdefault(block['connection'], []).append(block)
+
+        for connection_name, blocks in blocks_by_connection.items():
+            client = self.get_modbus_client(connection_name)
+            if client is None:
+                unreachable.add(connection_name)
+                continue
+            try:
+                for block in blocks:
+                    block_values = self.read_block(client, block)
+                    if block_values is not None:
+                        values.update(block_values)
+                        self.record_connection_result(connection_name, True)
+            except Exception as e:
+                self.logger.warning(f"Exception reading blocks from {connection_name}: {e}")
+                self.record_connection_result(connection_name, False, str(e))
+                unreachable.add(connection_name)
+            finally:
+                try:
+                    client.close()
+                except Exception:
+                    pass
+
+        # Signals outside the plan, or whose block failed, are read individually so a
+        # bad address only costs its own signal
+        for signal_id in due:
+            signal = self.current_signals[signal_id]
+            if signal_id in values:
+                continue
+            if signal['connection'] in unreachable:
+                continue
+            value = self.read_signal_value(signal)
+            if value is not None:
+                values[signal_id] = value
+
+        return values
+
     def get_modbus_client(self, connection_name):
         """Get a MODBUS client - simplified version that actually works"""
         if connection_name not in self.connections:
             self.logger.error(f"Unknown connection: {connection_name}")
             return None
-        
+
         conn = self.connections[connection_name]
-        
+
         # Always create a fresh client - don't reuse connections
         self.logger.debug(f"Creating fresh MODBUS client for {connection_name} at {conn['host']}:{conn['port']}")
         client = ModbusTcpClient(host=conn['host'], port=conn['port'], timeout=5)
-        
+
         # Try to connect
         try:
             if client.connect():
@@ -151,11 +353,90 @@ class SimplePLCBridge:
                 return client
             else:
                 self.logger.error(f"Connection to {connection_name} ({conn['host']}:{conn['port']}) failed")
+                self.record_connection_result(connection_name, False, "Connection failed")
                 return None
         except Exception as e:
             self.logger.error(f"Exception connecting to {connection_name}: {e}")
+            self.record_connection_result(connection_name, False, str(e))
             return None
-    
+
+    def record_connection_result(self, connection_name, success, error=None):
+        """Track connection health so Frappe can use it instead of probing devices itself"""
+        status = self.connection_status.get(connection_name)
+        if status is None:
+            return
+
+        previous = status['status']
+        if success:
+            status['status'] = 'Connected'
+            status['last_success'] = time.time()
+            status['success_count'] += 1
+            if previous == 'Connection Failed':
+                self.queue_event('Connection Test', 'Success', connection=connection_name,
+                                 message=f"Connection {connection_name} restored")
+        else:
+            status['status'] = 'Connection Failed'
+            status['last_error'] = error
+            status['error_count'] += 1
+            # Only report the drop, not every failed read while the device is down
+            if previous != 'Connection Failed':
+                self.queue_event('Connection Test', 'Failed', connection=connection_name,
+                                 message=f"Connection {connection_name} lost", error_message=error)
+
+    def record_read_error(self, signal, error):
+        """Report a read error once, until the signal reads successfully again"""
+        if signal.get('read_error') is None:
+            self.queue_event('Read', 'Failed', connection=signal['connection'], signal=signal['name'],
+                             message=f"Failed to read {signal['signal_name']} at {signal['address']}",
+                             error_message=error)
+        signal['read_error'] = error
+
+    def queue_event(self, event_type, status, connection=None, signal=None, message=None, error_message=None):
+        """Queue an event for the next batch sent to Frappe"""
+        event = {
+            'event_type': event_type,
+            'status': status,
+            'connection': connection,
+            'signal': signal,
+            'message': message,
+            'error_message': error_message,
+            'timestamp': time.time()
+        }
+        with self.events_lock:
+            self.pending_events.append(event)
+            # While Frappe is unreachable keep only the most recent events
+            if len(self.pending_events) > self.max_pending_events:
+                del self.pending_events[:len(self.pending_events) - self.max_pending_events]
+
+    def send_events_to_frappe(self):
+        """Send all queued events to Frappe in a single request"""
+        with self.events_lock:
+            events = self.pending_events
+            self.pending_events = []
+
+        if not events:
+            return
+
+        try:
+            response = requests.post(
+                f"{self.frappe_url}/api/method/epibus.api.plc.log_events",
+                json={'events': events},
+                headers={'Host': 'intralogistics.lab'},
+                timeout=5
+            )
+
+            if response.status_code == 200:
+                self.logger.debug(f"Sent {len(events)} event(s) to Frappe")
+                return
+
+            self.logger.warning(f"Failed to send events: HTTP {response.status_code}")
+        except Exception as e:
+            self.logger.warning(f"Failed to send events: {e}")
+
+        # Put them back in front of anything queued meanwhile; retried next cycle
+        with self.events_lock:
+            self.pending_events = (events + self.pending_events)[-self.max_pending_events:]
+
     def read_signal_value(self, signal):
         """Read a single signal value - simple, no complex error handling"""
         client = None
@@ -163,189 +444,354 @@ class SimplePLCBridge:
             client = self.get_modbus_client(signal['connection'])
             if client is None:
                 return None
-            
+
             address = signal['address']
-            signal_type = signal['type']
-            
-            # Read based on signal type
-            result = None
-            if signal_type == "Digital Input Contact":
-                result = client.read_discrete_inputs(address=address, count=1)
-                if not result.isError():
-                    value = result.bits[0]
-                    self.logger.debug(f"Read {signal['signal_name']} at {address}: {value}")
-                    return value
-            elif signal_type == "Digital Output Coil":
-                result = client.read_coils(address=address, count=1)
-                if not result.isError():
-                    value = result.bits[0]
-                    self.logger.debug(f"Read {signal['signal_name']} at {address}: {value}")
-                    return value
-            elif signal_type == "Input Register":
-                result = client.read_input_registers(address=address, count=1)
-                if not result.isError():
-                    value = result.registers[0]
-                    self.logger.debug(f"Read {signal['signal_name']} at {address}: {value}")
-                    return value
-            elif signal_type == "Holding Register":
-                result = client.read_holding_registers(address=address, count=1)
-                if not result.isError():
-                    value = result.registers[0]
-                    self.logger.debug(f"Read {signal['signal_name']} at {address}: {value}")
-                    return value
-            
-            if result and result.isError():
+            codec = signal['codec']
+            reader = self.SIGNAL_READERS.get(signal['type'])
+            if reader is None:
+                self.logger.error(f"Unknown signal type {signal['type']} for {signal['signal_name']}")
+                return None
+
+            result = getattr(client, reader)(address=address, count=codec.width)
+            if result.isError():
                 self.logger.error(f"MODBUS read error for {signal['signal_name']} at {address}: {result}")
-            else:
-                self.logger.error(f"Unknown signal type {signal_type} for {signal['signal_name']}")
-            
-            return None
-            
+                # The device answered, so this is a read error rather than a connection failure
+                self.record_read_error(signal, str(result))
+                return None
+
+            value = decode_block(result.bits if codec.bits else result.registers, [(0, codec)])[0]
+            if isinstance(value, Exception):
+                self.logger.error(f"Cannot decode {signal['signal_name']} at {address}: {value}")
+                self.record_read_error(signal, str(value))
+                return None
+
+            self.logger.debug(f"Read {signal['signal_name']} at {address}: {value}")
+            self.record_connection_result(signal['connection'], True)
+            return value
+
         except Exception as e:
             self.logger.warning(f"Exception reading {signal['signal_name']}: {e}")
+            self.record_connection_result(signal['connection'], False, str(e))
             return None
         finally:
             # Always close the client connection
             if client:
                 try:
                     client.close()
-                except:
+                except Exception:
                     pass
-    
-    def send_signal_change_to_frappe(self, signal_id, old_value, new_value):
-        """Send signal change to Frappe - simple, no complex retry"""
-        try:
-            data = {
+
+    def queue_signal_change(self, signal_id, new_value):
+        """Queue a signal change for delivery, replacing any undelivered value of the same signal"""
+        # The scan and the write path both queue changes: number them under the lock,
+        # so no two updates of a signal share a seq
+        with self.updates_lock:
+            seq = self.sequences.get(signal_id, 0) + 1
+            self.sequences[signal_id] = seq
+            self.pending_updates[signal_id] = {
                 'name': signal_id,
                 'value': new_value,
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'epoch': self.epoch,
+                'seq': seq
             }
-            
+        self.updates_ready.set()
+
+    def requeue_updates(self, batch):
+        """Put back undelivered updates, unless a newer value arrived meanwhile"""
+        with self.updates_lock:
+            for signal_id, update in batch.items():
+                self.pending_updates.setdefault(signal_id, update)
+
+    def delivery_loop(self):
+        """Deliver queued signal changes and events to Frappe, pacing to its load"""
+        self.logger.info("Starting delivery loop...")
+
+        while self.running:
+            try:
+                self.updates_ready.wait(timeout=self.poll_interval)
+
+                # Let more changes accumulate into this batch
+                time.sleep(self.batch_window)
+                self.updates_ready.clear()
+
+                with self.updates_lock:
+                    batch = self.pending_updates
+                    self.pending_updates = {}
+
+                delay = self.send_signal_changes_to_frappe(batch) if batch else 0
+                self.send_events_to_frappe()
+
+                if delay:
+                    time.sleep(delay)
+
+            except Exception as e:
+                self.logger.error(f"Error in delivery loop: {e}")
+                time.sleep(self.poll_interval)
+
+    def send_signal_changes_to_frappe(self, batch):
+        """Send a batch of signal changes to Frappe
+
+        Frappe ignores duplicates by sequence number, so failed batches are simply requeued.
+
+        Returns:
+            float: Seconds to wait before the next delivery
+        """
+        try:
             response = requests.post(
-                f"{self.frappe_url}/api/method/epibus.api.plc.signal_update",
-                json=data,
+                f"{self.frappe_url}/api/method/epibus.api.plc.signal_updates",
+                json={'updates': list(batch.values())},
                 headers={'Host': 'intralogistics.lab'},
                 timeout=5
             )
-            
+
             if response.status_code == 200:
-                self.logger.info(f"Sent signal change: {self.current_signals[signal_id]['signal_name']} = {new_value}")
-            else:
-                self.logger.warning(f"Failed to send signal change: HTTP {response.status_code}")
-                
+                self.batch_window = max(self.min_batch_window, self.batch_window / 2)
+                self.logger.info(f"Sent {len(batch)} signal change(s)")
+                return 0
+
+            self.requeue_updates(batch)
+            self.batch_window = min(self.max_batch_window, self.batch_window * 2)
+
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.headers.get('Retry-After', 1))
+                except ValueError:
+                    retry_after = 1.0
+                self.logger.warning(
+                    f"Frappe is overloaded, retrying {len(batch)} signal change(s) in {retry_after}s "
+                    f"(batch window {self.batch_window:.2f}s)"
+                )
+                return retry_after
+
+            self.logger.warning(f"Failed to send signal changes: HTTP {response.status_code}")
+            return self.batch_window
+
         except Exception as e:
-            self.logger.warning(f"Failed to send signal change: {e}")
-    
+            self.requeue_updates(batch)
+            self.batch_window = min(self.max_batch_window, self.batch_window * 2)
+            self.logger.warning(f"Failed to send signal changes: {e}")
+            return self.batch_window
+
     def polling_loop(self):
         """Simple polling loop - no complexity"""
         self.logger.info("Starting simple polling loop...")
-        
+
         while self.running:
             try:
-                # Read all signals
+                # Read the signals that are due
                 changes = []
-                
+                self.load_demand()
+                due = self.due_signals()
+                values = self.scan_signals(due)
+
                 for signal_id, signal in self.current_signals.items():
-                    new_value = self.read_signal_value(signal)
+                    if signal_id not in due and signal_id not in values:
+                        continue
+                    new_value = values.get(signal_id)
                     self.logger.debug(f"Read signal {signal['signal_name']} ({signal_id}): {new_value}")
-                    
+
                     if new_value is not None:
                         old_value = signal['value']
-                        
+                        signal['read_error'] = None
+
                         # Always update timestamp when we get a successful read
                         signal['value'] = new_value
                         signal['timestamp'] = time.time()
-                        
+
                         # Check for changes and notify Frappe
                         if new_value != old_value:
                             changes.append((signal_id, old_value, new_value))
-                            
-                            # Send to Frappe
-                            self.send_signal_change_to_frappe(signal_id, old_value, new_value)
+
+                            # Queue for delivery to Frappe
+                            self.queue_signal_change(signal_id, new_value)
                     else:
                         self.logger.warning(f"Failed to read signal {signal['signal_name']} ({signal_id})")
-                
+
                 if changes:
                     self.logger.info(f"Processed {len(changes)} signal changes")
-                
+
                 # Sleep and repeat
                 time.sleep(self.poll_interval)
-                
+
             except Exception as e:
                 self.logger.error(f"Error in polling loop: {e}")
                 time.sleep(self.poll_interval)  # Just try again
-    
+
+    def write_loop(self):
+        """Apply queued writes, grouping whatever is queued by connection"""
+        self.logger.info("Starting write loop...")
+
+        while self.running:
+            try:
+                job = self.write_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            jobs = [job]
+            while True:
+                try:
+                    jobs.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            by_connection = {}
+            for job in jobs:
+                by_connection.setdefault(job['signal']['connection'], []).append(job)
+
+            for connection_name, connection_jobs in by_connection.items():
+                self.apply_writes(connection_name, connection_jobs)
+
+    def apply_writes(self, connection_name, jobs):
+        """Write a group of queued jobs over one client and complete each job"""
+        client = self.get_modbus_client(connection_name)
+        try:
+            for job in jobs:
+                if client is None:
+                    job['result'] = ({'success': False, 'message': 'Connection failed'}, 500)
+                else:
+                    job['result'] = self.write_with_client(client, job['signal'], job['value'], job['verify'])
+                job['done'].set()
+        finally:
+            if client:
+                try:
+                    client.close()
+                except Exception:
+                    pass
+
+    def write_with_client(self, client, signal, value, verify=False):
+        """Write one signal and return the (payload, HTTP status) for the caller"""
+        address = signal['address']
+        signal_type = signal['type']
+        codec = signal['codec']
+
+        if signal_type not in self.WRITABLE_TYPES:
+            return {'success': False, 'message': f'Cannot write to {signal_type}'}, 400
+        try:
+            words = encode(codec, value)
+        except ValueError as e:
+            return {'success': False, 'message': f'Invalid value for {signal["signal_name"]}: {e}'}, 400
+
+        try:
+            if codec.bits:
+                result = client.write_coil(address, words[0])
+            elif len(words) == 1:
+                result = client.write_register(address, words[0])
+            else:
+                result = client.write_registers(address, words)
+
+            if result.isError():
+                return {'success': False, 'message': f'MODBUS write error: {result}'}, 500
+
+            if verify:
+                readback = getattr(client, self.SIGNAL_READERS[signal_type])(address=address, count=codec.width)
+                if readback.isError():
+                    return {'success': False, 'message': f'MODBUS read-back error: {readback}'}, 500
+                words = readback.bits if codec.bits else readback.registers
+
+            # The value as the PLC now holds it, after rounding to the data type
+            value = decode_block(words, [(0, codec)])[0]
+            if isinstance(value, Exception):
+                return {'success': False, 'message': f'MODBUS read-back error: {value}'}, 500
+
+            self.record_connection_result(signal['connection'], True)
+
+            # Update our local copy; report the change like a scanned one so Frappe's actions still fire
+            old_value = signal['value']
+            signal['value'] = value
+            signal['timestamp'] = time.time()
+            signal['read_error'] = None
+            if value != old_value:
+                self.queue_signal_change(signal['name'], value)
+
+            return {'success': True, 'value': value, 'message': f'Signal {signal["signal_name"]} updated'}, 200
+
+        except Exception as e:
+            self.record_connection_result(signal['connection'], False, str(e))
+            return {'success': False, 'message': f'Write failed: {e}'}, 500
+
     def start(self):
         """Start the bridge"""
         self.logger.info("Starting Simple PLC Bridge...")
-        
+
         # Load signals from Frappe
         if not self.load_signals_from_frappe():
             self.logger.error("Failed to load signals - cannot start")
             return False
-        
+
         # Start polling thread
         self.running = True
         self.poll_thread = threading.Thread(target=self.polling_loop, daemon=True)
         self.poll_thread.start()
-        
+
+        # Deliver changes to Frappe separately, so slow responses never delay the scan
+        self.delivery_thread = threading.Thread(target=self.delivery_loop, daemon=True)
+        self.delivery_thread.start()
+
+        # Apply writes from Frappe one at a time, between the scan's reads
+        self.write_thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.write_thread.start()
+
         # Start Flask server in separate thread
         self.flask_thread = threading.Thread(
             target=lambda: self.app.run(host='0.0.0.0', port=7654, debug=False, use_reloader=False),
             daemon=True
         )
         self.flask_thread.start()
-        
+
         self.logger.info("Simple PLC Bridge started successfully")
         return True
-    
+
     def stop(self):
         """Stop the bridge"""
         self.logger.info("Stopping Simple PLC Bridge...")
         self.running = False
-        
+        self.updates_ready.set()
+
         # Close MODBUS connections
         for conn in self.connections.values():
             if conn['client']:
                 try:
                     conn['client'].close()
-                except:
+                except Exception:
                     pass
-    
+
     # ========== FLASK ROUTES ==========
-    
+
     def get_signals(self):
         """API endpoint to get all current signal values"""
         signals_list = []
         current_time = time.time()
-        
+
         for signal in self.current_signals.values():
             # Only return values that are fresh (within last poll cycle + 1 second buffer)
             # If no timestamp or too old, return None instead of stale values
             value = signal['value']
             timestamp = signal['timestamp']
-            
-            # Fresh means within the last poll interval + longer buffer for debugging  
-            max_age = self.poll_interval + 10.0
-            
+
+            # Fresh means within the signal's poll interval + longer buffer for debugging
+            subscribed = self.is_subscribed(signal['name'])
+            max_age = (self.poll_interval if subscribed else self.slow_poll_interval) + 10.0
+
             if timestamp is None or (current_time - timestamp) > max_age:
                 value = None  # Don't lie - return None for stale/unknown values
-                
+
             signals_list.append({
                 'name': signal['name'],
                 'signal_name': signal['signal_name'],
                 'value': value,
                 'timestamp': timestamp,
                 'address': signal.get('address', '--'),
-                'signal_type': signal.get('type', 'UNKNOWN')
+                'signal_type': signal.get('type', 'UNKNOWN'),
+                'subscribed': subscribed
             })
-        
+
         return jsonify({'signals': signals_list})
-    
+
     def get_connections(self):
         """API endpoint to get connection status details"""
         connections_list = []
-        
+
         for conn_name, conn_data in self.connections.items():
             status = self.connection_status.get(conn_name, {})
             connections_list.append({
@@ -358,52 +804,39 @@ class SimplePLCBridge:
                 'error_count': status.get('error_count', 0),
                 'success_count': status.get('success_count', 0)
             })
-        
+
         return jsonify({'connections': connections_list})
-    
+
     def write_signal(self):
-        """API endpoint to write a signal value"""
+        """API endpoint to write a signal value through the write queue"""
         try:
             data = request.get_json()
             signal_id = data.get('signal_id')
             value = data.get('value')
-            
+            verify = bool(data.get('verify', False))
+
             if signal_id not in self.current_signals:
                 return jsonify({'success': False, 'message': 'Signal not found'}), 404
-            
-            signal = self.current_signals[signal_id]
-            client = self.get_modbus_client(signal['connection'])
-            
-            if client is None:
-                return jsonify({'success': False, 'message': 'Connection failed'}), 500
-            
-            # Write the signal
-            address = signal['address']
-            signal_type = signal['type']
-            
-            try:
-                if signal_type == "Digital Output Coil":
-                    result = client.write_coil(address, bool(value))
-                elif signal_type == "Holding Register":
-                    result = client.write_register(address, int(value))
-                else:
-                    return jsonify({'success': False, 'message': f'Cannot write to {signal_type}'}), 400
-                
-                if result.isError():
-                    return jsonify({'success': False, 'message': f'MODBUS write error: {result}'}), 500
-                
-                # Update our local copy
-                signal['value'] = value
-                signal['timestamp'] = time.time()
-                
-                return jsonify({'success': True, 'message': f'Signal {signal["signal_name"]} updated'})
-                
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'Write failed: {e}'}), 500
-            
+
+            job = {
+                'signal': self.current_signals[signal_id],
+                'value': value,
+                'verify': verify,
+                'done': threading.Event(),
+                'result': None
+            }
+            self.write_queue.put(job)
+
+            if not job['done'].wait(self.write_timeout):
+                # Still queued or in progress - it may yet be applied
+                return jsonify({'success': False, 'message': 'Write timed out in the bridge write queue'}), 504
+
+            payload, status_code = job['result']
+            return jsonify(payload), status_code
+
         except Exception as e:
             return jsonify({'success': False, 'message': f'Request error: {e}'}), 400
-    
+
     def dashboard(self):
         """Simple dashboard - no SSE complexity"""
         html = '''<!DOCTYPE html>
@@ -498,7 +931,7 @@ class SimplePLCBridge:
                 <tbody id="signals"></tbody>
             </table>
         </div>
-        
+
         <div class="refresh-info">
             Dashboard refreshes every 3 seconds via simple HTTP polling
         </div>
@@ -511,11 +944,11 @@ class SimplePLCBridge:
                 .then(data => {
                     const container = document.getElementById('signals');
                     const signals = data.signals || [];
-                    
+
                     container.innerHTML = signals.map(signal => {
                         // All OpenPLC signals are BOOL
                         const signalType = 'BOOL';
-                        
+
                         // Display value based on actual value
                         let displayValue, valueClass;
                         if (signal.value === null || signal.value === undefined) {
@@ -532,10 +965,10 @@ class SimplePLCBridge:
                             displayValue = signal.value.toString();
                             valueClass = 'value-numeric';
                         }
-                        
+
                         // Use placeholder address for now - we'd need to get this from Frappe
                         const address = signal.address || '--';
-                        
+
                         return `
                             <tr>
                                 <td><strong>${signal.signal_name || signal.name}</strong></td>
@@ -545,7 +978,7 @@ class SimplePLCBridge:
                             </tr>
                         `;
                     }).join('');
-                    
+
                     document.getElementById('signal-count').textContent = signals.length;
                     document.getElementById('last-update').textContent = new Date().toLocaleTimeString();
                     document.getElementById('status').textContent = 'Connected';
@@ -555,18 +988,18 @@ class SimplePLCBridge:
                     console.error('Error:', error);
                 });
         }
-        
+
         function updateConnections() {
             fetch('/connections')
                 .then(response => response.json())
                 .then(data => {
                     const container = document.getElementById('connections');
                     const connections = data.connections || [];
-                    
+
                     container.innerHTML = connections.map(conn => {
-                        const statusClass = conn.status === 'Connected' ? 'value-true' : 
+                        const statusClass = conn.status === 'Connected' ? 'value-true' :
                                            conn.status.includes('Failed') ? 'value-false' : 'value-null';
-                        
+
                         return `
                             <div style="margin-bottom: 15px; padding: 10px; border-left: 3px solid #007bff;">
                                 <strong>${conn.name}</strong><br>
@@ -583,12 +1016,12 @@ class SimplePLCBridge:
                     console.error('Connections error:', error);
                 });
         }
-        
+
         function updateAll() {
             updateSignals();
             updateConnections();
         }
-        
+
         // Update immediately and then every 3 seconds
         updateAll();
         setInterval(updateAll, 3000);
@@ -601,28 +1034,31 @@ class SimplePLCBridge:
 def main():
     """Entry point"""
     import argparse
-    
+
     parser = argparse.ArgumentParser(description="Simple PLC Bridge")
     parser.add_argument("--frappe-url", default="http://backend:8000", help="Frappe server URL")
     parser.add_argument("--poll-interval", type=float, default=3.0, help="Polling interval in seconds")
-    
+    parser.add_argument("--slow-poll-interval", type=float, default=30.0,
+                        help="Polling interval in seconds for signals nobody is subscribed to")
+
     args = parser.parse_args()
-    
+
     bridge = SimplePLCBridge(
         frappe_url=args.frappe_url,
-        poll_interval=args.poll_interval
+        poll_interval=args.poll_interval,
+        slow_poll_interval=args.slow_poll_interval
     )
-    
+
     # Signal handlers
     import signal
     def signal_handler(sig, frame):
         print("Shutting down...")
         bridge.stop()
         sys.exit(0)
-    
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
-    
+
     try:
         if bridge.start():
             print("Simple PLC Bridge running on http://localhost:7654")
@@ -632,7 +1068,7 @@ def main():
         else:
             print("Failed to start bridge")
             sys.exit(1)
-    
+
     except KeyboardInterrupt:
         bridge.stop()
     except Exception as e:
@@ -641,4 +1077,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -10,4 +10,4 @@ fi
 
 # Start the PLC bridge service (no API keys needed for guest endpoints)
 echo "🚀 Starting PLC Bridge with guest API access"
-python bridge.py --frappe-url "$FRAPPE_URL" --poll-interval "${PLC_POLL_INTERVAL:-3.0}"
\ No newline at end of file
+python bridge.py --frappe-url "$FRAPPE_URL" --poll-interval "${PLC_POLL_INTERVAL:-3.0}" --slow-poll-interval "${PLC_SLOW_POLL_INTERVAL:-30.0}"
\ No newline at end of file
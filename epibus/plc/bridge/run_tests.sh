@@ -5,6 +5,13 @@
 # Change to script directory
 cd "$(dirname "$0")"
 
+# value_codec.py is a copy of the app's codec; the two must not drift apart
+APP_CODEC=../../epibus/epibus/utils/value_codec.py
+if [ -f "$APP_CODEC" ] && ! cmp -s value_codec.py "$APP_CODEC"; then
+    echo "value_codec.py differs from $APP_CODEC - copy the app's version here"
+    exit 1
+fi
+
 # Run tests
 python3 -m unittest test_bridge.py
 
@@ -99,6 +99,7 @@ cleanup_existing
 echo "Starting PLC Bridge..."
 echo "Frappe URL: $FRAPPE_URL"
 echo "Poll Interval: ${PLC_POLL_INTERVAL:-1.0}"
+echo "Slow Poll Interval: ${PLC_SLOW_POLL_INTERVAL:-30.0}"
 echo "Log Level: ${PLC_LOG_LEVEL:-INFO}"
 
 # Use the Python from the Frappe bench environment
@@ -128,7 +129,8 @@ $BENCH_PYTHON bridge.py \
     --frappe-url "$FRAPPE_URL" \
     --api-key "$FRAPPE_API_KEY" \
     --api-secret "$FRAPPE_API_SECRET" \
-    --poll-interval "${PLC_POLL_INTERVAL:-1.0}" &
+    --poll-interval "${PLC_POLL_INTERVAL:-1.0}" \
+    --slow-poll-interval "${PLC_SLOW_POLL_INTERVAL:-30.0}" &
 
 BRIDGE_PID=$!
 echo "PLC Bridge started with PID: $BRIDGE_PID"